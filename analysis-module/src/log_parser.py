@@ -1,4 +1,5 @@
 # Python Imports
+import os
 import sys
 import json
 
@@ -6,10 +7,25 @@ import json
 from src import analysis_logger
 
 
+def iter_messages(messages_file):
+    """ Read a streamed (NDJSON) messages log one record at a time """
+    with open(messages_file, 'r') as f:
+        for line in f:
+            # A crashed WLS may leave a truncated last line behind
+            if not line.endswith('\n'):
+                analysis_logger.G_LOGGER.warning(f'Skipping truncated record at the end of {messages_file}')
+                break
+            msg = json.loads(line)
+            yield msg.pop('hash'), msg
+
+
 def load_messages(simulation_path):
     try:
-        with open(f'{simulation_path}/messages.json', 'r') as f:
-            injected_msgs_dict = json.load(f)
+        if os.path.exists(f'{simulation_path}/messages.ndjson'):
+            injected_msgs_dict = dict(iter_messages(f'{simulation_path}/messages.ndjson'))
+        else:
+            with open(f'{simulation_path}/messages.json', 'r') as f:
+                injected_msgs_dict = json.load(f)
     except OSError as e:
         analysis_logger.G_LOGGER.error('%s: %s' % (e.__doc__, e))
         sys.exit()
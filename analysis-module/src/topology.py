@@ -1,6 +1,8 @@
 # Python Imports
+import os
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     import tomllib
@@ -12,28 +14,95 @@ from src import analysis_logger
 from src import vars
 
 
-def _load_topics(node_info, nodes, node, tomls_folder):
-    topics = None
+def _parse_topics(node_info, tomls_folder):
     with open(tomls_folder + node_info["node_config"], mode='rb') as read_file:
         toml_config = tomllib.load(read_file)
         if node_info["image"] == vars.G_NWAKU_IMAGE_NAME:
-            topics = list(toml_config["topics"].split(" "))
+            return list(toml_config["topics"].split(" "))
         elif node_info["image"] == vars.G_GOWAKU_IMAGE_NAME:
-            topics = toml_config["topics"]
+            return toml_config["topics"]
         else:
             raise ValueError("Unknown image type")
-    # Load topics into topology for easier access
-    nodes[node]["topics"] = topics
+
+
+def _load_topics_index(tomls_folder):
+    index_file = tomls_folder + vars.G_TOPICS_INDEX_FILE_NAME
+    if not os.path.exists(index_file):
+        return None
+
+    with open(index_file, 'r') as read_file:
+        return json.load(read_file)
+
+
+def _load_topics_cache(cache_file):
+    if not os.path.exists(cache_file):
+        return {}
+
+    try:
+        with open(cache_file, 'r') as read_file:
+            return json.load(read_file)
+    except (OSError, ValueError) as e:
+        analysis_logger.G_LOGGER.warning(f'Ignoring unreadable topics cache {cache_file}: {e}')
+        return {}
+
+
+def _save_topics_cache(cache_file, cache):
+    try:
+        with open(cache_file, 'w') as write_file:
+            json.dump(cache, write_file, separators=(',', ':'))
+    except OSError as e:
+        analysis_logger.G_LOGGER.warning(f'Could not save the topics cache {cache_file}: {e}')
+
+
+def _parse_topics_cached(node_info, tomls_folder, cache):
+    """ Returns the node topics and their cache entry, or None if the toml cannot be cached """
+    try:
+        mtime = os.stat(tomls_folder + node_info["node_config"]).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    cached = cache.get(node_info["node_config"])
+    if mtime is not None and cached is not None and cached["mtime"] == mtime and \
+            cached["image"] == node_info["image"]:
+        return cached["topics"], cached
+
+    topics = _parse_topics(node_info, tomls_folder)
+    if mtime is None:
+        return topics, None
+
+    return topics, {"mtime": mtime, "image": node_info["image"], "topics": topics}
 
 
 def load_topics_into_topology(topology, tomls_folder):
+    """ Load the topics of every node from the gennet topics index if there is one. Otherwise
+    parse the node tomls in a thread pool, reusing the topics cached by a previous run for the
+    tomls that did not change since """
     nodes = topology["nodes"]
-    for node, node_info in nodes.items():
-        try:
-            _load_topics(node_info, nodes, node, tomls_folder)
-        except ValueError as e:
-            analysis_logger.G_LOGGER.error('%s: %s' % (e.__doc__, e))
-            sys.exit()
+
+    topics_index = _load_topics_index(tomls_folder)
+    if topics_index is not None and all(node in topics_index for node in nodes):
+        for node, node_info in nodes.items():
+            node_info["topics"] = topics_index[node]
+        analysis_logger.G_LOGGER.info('Loaded nodes topics from the topics index')
+        return
+
+    cache_file = tomls_folder + vars.G_TOPICS_CACHE_FILE_NAME
+    cache = _load_topics_cache(cache_file)
+    new_cache = {}
+    try:
+        with ThreadPoolExecutor(max_workers=vars.G_TOPICS_LOADER_THREADS) as executor:
+            results = executor.map(lambda node_info: _parse_topics_cached(node_info, tomls_folder, cache),
+                                   nodes.values())
+            for (node, node_info), (topics, cache_entry) in zip(nodes.items(), results):
+                node_info["topics"] = topics
+                if cache_entry is not None:
+                    new_cache[node_info["node_config"]] = cache_entry
+    except ValueError as e:
+        analysis_logger.G_LOGGER.error('%s: %s' % (e.__doc__, e))
+        sys.exit()
+
+    if new_cache and new_cache != cache:
+        _save_topics_cache(cache_file, new_cache)
 
     analysis_logger.G_LOGGER.info('Loaded nodes topics from toml files')
 
@@ -3,6 +3,10 @@ G_DEFAULT_SIMULATION_PATH = "/simulation_data/"
 G_DEFAULT_FIG_FILENAME = 'analysis.pdf'
 G_DEFAULT_SUMMARY_FILENAME = 'summary.json'
 G_TOPOLOGY_FILE_NAME = "network_data.json"
+# Written by gennet next to the node tomls
+G_TOPICS_INDEX_FILE_NAME = "topics.json"
+G_TOPICS_CACHE_FILE_NAME = ".topics_cache.json"
+G_TOPICS_LOADER_THREADS = 16
 
 
 G_NWAKU_IMAGE_NAME = "nim-waku"
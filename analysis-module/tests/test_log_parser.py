@@ -1,4 +1,7 @@
 # Python Imports
+import os
+import json
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -21,6 +24,18 @@ class TestLogParser(unittest.TestCase):
         mock_json_load.assert_called_once_with(mock_file)
         self.assertEqual(data, mock_data)
 
+    def test_load_messages_ndjson(self):
+        with tempfile.TemporaryDirectory() as simulation_path:
+            with open(os.path.join(simulation_path, 'messages.ndjson'), 'w') as f:
+                f.write(json.dumps({'hash': 'a', 'nonce': 0}) + '\n')
+                f.write(json.dumps({'hash': 'b', 'nonce': 1}) + '\n')
+                # Truncated record of a crashed run
+                f.write('{"hash": "c", "no')
+
+            data = log_parser.load_messages(simulation_path)
+
+        self.assertEqual(data, {'a': {'nonce': 0}, 'b': {'nonce': 1}})
+
     def test_prepare_node_in_logs(self):
         node_pbar = ['node1', 'node2']
         topology = {'nodes': {'node1': {'peer_id': 'peer1'}, 'node2': {'peer_id': 'peer2'}}}
@@ -1,9 +1,13 @@
 # Python Imports
+import os
+import json
+import tempfile
 import unittest
 from unittest.mock import patch
 
 # Project Imports
 from src import topology
+from src import vars
 
 
 class TestTopology(unittest.TestCase):
@@ -14,14 +18,13 @@ class TestTopology(unittest.TestCase):
             "node_config": "config.toml",
             "image": "nim-waku",
         }
-        mock_nodes = {"node1": {}, "node2": {}}
         mock_toml_config = {"topics": "topic1 topic2 topic3"}
         mock_toml_load.return_value = mock_toml_config
 
-        topology._load_topics(mock_node_info, mock_nodes, "node1", "/path/to/tomls/")
+        topics = topology._parse_topics(mock_node_info, "/path/to/tomls/")
         mock_open.assert_called_once_with('/path/to/tomls/config.toml', mode='rb')
         mock_toml_load.assert_called_once_with(mock_open.return_value.__enter__.return_value)
-        self.assertListEqual(mock_nodes["node1"]["topics"], ["topic1", "topic2", "topic3"])
+        self.assertListEqual(topics, ["topic1", "topic2", "topic3"])
 
     @patch('builtins.open')
     @patch('tomllib.load')
@@ -30,14 +33,13 @@ class TestTopology(unittest.TestCase):
             "node_config": "config.toml",
             "image": "go-waku",
         }
-        mock_nodes = {"node1": {}, "node2": {}}
         mock_toml_config = {"topics": ["topic1", "topic2", "topic3"]}
         mock_toml_load.return_value = mock_toml_config
 
-        topology._load_topics(mock_node_info, mock_nodes, "node1", "/path/to/tomls/")
+        topics = topology._parse_topics(mock_node_info, "/path/to/tomls/")
         mock_open.assert_called_once_with('/path/to/tomls/config.toml', mode='rb')
         mock_toml_load.assert_called_once_with(mock_open.return_value.__enter__.return_value)
-        self.assertListEqual(mock_nodes["node1"]["topics"], ["topic1", "topic2", "topic3"])
+        self.assertListEqual(topics, ["topic1", "topic2", "topic3"])
 
     @patch('builtins.open')
     @patch('tomllib.load')
@@ -60,3 +62,31 @@ class TestTopology(unittest.TestCase):
 
         self.assertEqual(nodes["nodes"]["node1"]["topics"], ["topic1", "topic2", "topic3"])
         self.assertEqual(nodes["nodes"]["node2"]["topics"], ["topic1", "topic2", "topic3"])
+
+    @patch('tomllib.load')
+    def test_load_topics_into_topology_index(self, mock_toml_load):
+        with tempfile.TemporaryDirectory() as tomls_folder:
+            with open(os.path.join(tomls_folder, vars.G_TOPICS_INDEX_FILE_NAME), 'w') as f:
+                json.dump({"node1": ["topic1", "topic2"]}, f)
+
+            nodes = {"nodes": {"node1": {"node_config": "config.toml", "image": "nim-waku"}}}
+            topology.load_topics_into_topology(nodes, tomls_folder + '/')
+
+            self.assertEqual(nodes["nodes"]["node1"]["topics"], ["topic1", "topic2"])
+            mock_toml_load.assert_not_called()
+
+    def test_load_topics_into_topology_cache(self):
+        with tempfile.TemporaryDirectory() as tomls_folder:
+            tomls_folder += '/'
+            with open(tomls_folder + 'node1.toml', 'w') as f:
+                f.write('topics = ["topic1", "topic2"]\n')
+            nodes = {"nodes": {"node1": {"node_config": "node1.toml", "image": "go-waku"}}}
+
+            topology.load_topics_into_topology(nodes, tomls_folder)
+            self.assertTrue(os.path.exists(tomls_folder + vars.G_TOPICS_CACHE_FILE_NAME))
+
+            # Unchanged tomls are not parsed again
+            with patch('tomllib.load') as mock_toml_load:
+                topology.load_topics_into_topology(nodes, tomls_folder)
+                mock_toml_load.assert_not_called()
+            self.assertEqual(nodes["nodes"]["node1"]["topics"], ["topic1", "topic2"])
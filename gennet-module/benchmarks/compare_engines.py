@@ -0,0 +1,52 @@
+""" Compare the networks of the sparse and the networkx engines: degree statistics, plus the time and
+peak memory to generate them. Run from gennet-module: python -m benchmarks.compare_engines [num_nodes] """
+# Python Imports
+import sys
+import time
+import random
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+# Project Imports
+import gennet
+
+""" Globals """
+G_NETWORK_TYPES = [gennet.networkType.REGULAR, gennet.networkType.NEWMANWATTSSTROGATZ,
+                   gennet.networkType.SCALEFREE, gennet.networkType.BALANCEDTREE]
+G_FANOUT = 3
+G_PRNG_SEED = 1
+
+
+def _generate(network_type, engine, num_nodes):
+    ctx = SimpleNamespace(params={"num_nodes": num_nodes, "fanout": G_FANOUT, "network_type": network_type,
+                                  "engine": engine, "prng_seed": G_PRNG_SEED})
+    random.seed(G_PRNG_SEED)
+    np.random.seed(G_PRNG_SEED)
+    tracemalloc.start()
+    start = time.time()
+    G = gennet.generate_network(ctx)
+    took = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if isinstance(G, gennet.CSRGraph):
+        degrees = G.degrees()
+    else:
+        degrees = np.array([d for _, d in G.degree()])
+
+    return G, degrees, took, peak
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for network_type in G_NETWORK_TYPES:
+        for engine in gennet.graphEngine:
+            G, degrees, took, peak = _generate(network_type, engine, num_nodes)
+            print(f"{network_type.value:>20} {engine.value:>8}: {G.number_of_nodes():>8} nodes "
+                  f"{G.number_of_edges():>9} edges, degree mean {degrees.mean():6.2f} std {degrees.std():7.2f} "
+                  f"max {degrees.max():6d}, {took:7.2f} s, peak {peak / (1024 * 1024):8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
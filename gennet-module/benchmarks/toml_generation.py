@@ -0,0 +1,77 @@
+""" Compare generating and writing the per node tomls re-reading every trait file per node, one write at
+a time, against the cached trait templates and the write thread pool. Run from gennet-module:
+python -m benchmarks.toml_generation [num_nodes] [traits_dir] """
+# Python Imports
+import os
+import sys
+import time
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Project Imports
+import gennet
+
+""" Globals """
+G_TRAITS = ["nwaku:rpc:metrics:relay:store", "gowaku:rpc:metrics:relay"]
+G_NUM_TOPICS = 20
+G_WRITE_THREADS = 8
+
+
+def _legacy_generate_toml(traits_dir, topics, traits_list):
+    node_type, tomls = traits_list[0], ""
+    if node_type == gennet.nodeType.GOWAKU:
+        topic_str = ", ".join(f"\"{t}\"" for t in topics)
+        topic_str = f"[{topic_str}]"
+    else:
+        topic_str = " ".join(topics)
+        topic_str = f"\"{topic_str}\""
+
+    for trait in traits_list[1:]:
+        toml = f'#{trait}\n'
+        tomlf = f"{traits_dir}/{trait}.toml"
+        if not os.path.isfile(tomlf):
+             raise ValueError(f"traits: missing trait file {tomlf}")
+        with open(tomlf, 'rb') as f:
+            strlines = [l.decode("utf-8").strip() for l in f if not len(l.split()) == 0]
+            toml += ''.join([f'{l}\n' for l in strlines if not l.startswith('#')])
+        tomls += toml + '\n'
+    return f"{tomls}#topics\ntopics = {topic_str}\n"
+
+
+def _legacy(output_dir, traits_dir, nodes):
+    for node, traits_list, topics in nodes:
+        gennet.write_toml(output_dir, node, _legacy_generate_toml(traits_dir, topics, traits_list))
+
+
+def _cached_pooled(output_dir, traits_dir, nodes):
+    gennet.load_trait.cache_clear()
+    gennet.compile_toml_template.cache_clear()
+    with ThreadPoolExecutor(max_workers=G_WRITE_THREADS) as executor:
+        writes = [executor.submit(gennet.write_toml, output_dir, node,
+                                  gennet.generate_toml(traits_dir, topics, traits_list))
+                  for node, traits_list, topics in nodes]
+    for write in writes:
+        write.result()
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    traits_dir = sys.argv[2] if len(sys.argv) > 2 else "../config/traits"
+    random.seed(1)
+    topics = gennet.generate_topics(G_NUM_TOPICS)
+    nodes = [(f"node-{i}", random.choice(G_TRAITS).split(":"), gennet.get_random_sublist(topics))
+             for i in range(num_nodes)]
+
+    took = {}
+    for name, generate in (("legacy", _legacy), ("cached+pooled", _cached_pooled)):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.time()
+            generate(output_dir, traits_dir, nodes)
+            took[name] = time.time() - start
+        print(f"{name:>13}: {num_nodes} tomls in {took[name]:6.2f} s")
+    print(f"speedup: {took['legacy'] / took['cached+pooled']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
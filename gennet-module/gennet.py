@@ -7,11 +7,14 @@ import numpy as np
 import random, math
 import sys, os, shutil
 import json, ast
+from array import array
 from collections import defaultdict
 
 from pathlib import Path
 
 import time, tracemalloc
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import string
 import typer
 import yaml
@@ -81,7 +84,14 @@ class networkType(Enum):
     REGULAR = "regular"  # gossip-sub / waku
 
 
+# networkx builds the graphs as dicts of dicts; sparse builds them as numpy edge/CSR arrays (100k+ nodes)
+class graphEngine(Enum):
+    NETWORKX = "networkx"
+    SPARSE = "sparse"
+
+
 NW_DATA_FNAME = "network_data.json"
+TOPICS_INDEX_FNAME = "topics.json"
 NODES_JSON, NODE_PREFIX, SUBNET_PREFIX, CONTAINERS_JSON, CONTAINER_PREFIX = \
     "nodes", "node", "subnetwork", "containers", "containers"
 ID_STR_SEPARATOR = "-"
@@ -95,6 +105,13 @@ def write_json(dirname, json_dump):
         json.dump(json_dump, f, indent=2)
 
 
+# Dump the node -> topics index, so consumers need not parse every toml
+def write_topics_index(dirname, topics_index):
+    fname = os.path.join(dirname, TOPICS_INDEX_FNAME)
+    with open(fname, "w") as f:
+        json.dump(topics_index, f, separators=(",", ":"))
+
+
 def write_toml(dirname, node_name, toml):
     fname = os.path.join(dirname, f"{node_name}.toml")
     with open(fname, "w") as f:
@@ -268,6 +285,8 @@ networkTypeSwitch = {
 # Generate the network from nw type
 def generate_network(ctx):
     network_type = networkType(ctx.params["network_type"])
+    if graphEngine(ctx.params["engine"]) == graphEngine.SPARSE:
+        return generate_sparse_network(ctx, network_type)
     return postprocess_network(networkTypeSwitch.get(network_type)(ctx))
 
 
@@ -279,6 +298,165 @@ def postprocess_network(G):
     return nx.relabel_nodes(G, mapping)  # label the nodes
 
 
+### sparse engine fns ##############################################################
+# The sparse engine builds the edges as numpy arrays and stores the graph in CSR form:
+# the neighbours of node i are indices[indptr[i]:indptr[i+1]]. The generators follow the
+# networkx models, so the networks are statistically alike, but draw from their own
+# numpy Generator seeded with prng_seed, so they are not the same networks.
+
+# Read-only graph over CSR arrays with the bits of the networkx API the writers use
+class CSRGraph:
+    def __init__(self, num_nodes, indptr, indices):
+        self.indptr, self.indices = indptr, indices
+        self.nodes = [f"{NODE_PREFIX}{ID_STR_SEPARATOR}{i}" for i in range(num_nodes)]
+        self.node2idx = {node: i for i, node in enumerate(self.nodes)}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def neighbors(self, node):
+        i = self.node2idx[node]
+        return [self.nodes[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def edges(self, node):
+        return [(node, neighbor) for neighbor in self.neighbors(node)]
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def to_networkx(self):
+        G = nx.Graph()
+        G.add_nodes_from(self.nodes)
+        G.add_edges_from(edge for node in self.nodes for edge in self.edges(node))
+        return G
+
+
+# Build the CSR graph from edge arrays: drops self-loops and parallel edges, like postprocess_network
+def edges_to_csr(num_nodes, src, dst):
+    src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+    keep = src != dst
+    lo, hi = np.minimum(src[keep], dst[keep]), np.maximum(src[keep], dst[keep])
+    keys = np.unique(lo * num_nodes + hi)
+    lo, hi = keys // num_nodes, keys % num_nodes
+    rows, cols = np.concatenate((lo, hi)), np.concatenate((hi, lo))
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    return CSRGraph(num_nodes, indptr, cols[order])
+
+
+# Simple random d-regular graph: random stub matching, then degree-preserving swaps of the
+# self-loops and parallel edges with random edges until there are none
+def generate_sparse_regular(rng, n, d, max_rounds=1000):
+    if n * d % 2:
+        n += 1
+    if d >= n:
+        raise ValueError(f"regular: fanout {d} must be < num_nodes {n}")
+    stubs = rng.permutation(np.repeat(np.arange(n, dtype=np.int64), d))
+    src, dst = stubs[0::2].copy(), stubs[1::2].copy()
+    for _ in range(max_rounds):
+        keys = np.minimum(src, dst) * n + np.maximum(src, dst)
+        _, first = np.unique(keys, return_index=True)
+        bad = np.ones(len(keys), dtype=bool)
+        bad[first] = False
+        bad |= src == dst
+        bad = np.flatnonzero(bad)
+        if len(bad) == 0:
+            return n, src, dst
+        # Swap (a, b), (c, e) for (a, c), (b, e); the partners must be distinct good edges
+        partners = rng.integers(0, len(src), size=len(bad))
+        partners, idx = np.unique(partners, return_index=True)
+        bad = bad[idx]
+        ok = ~np.isin(partners, bad)
+        bad, partners = bad[ok], partners[ok]
+        src[bad], dst[bad], src[partners] = src[bad], src[partners], dst[bad]
+    raise ValueError(f"regular: could not generate a simple {d}-regular graph of {n} nodes")
+
+
+# Newman-Watts-Strogatz: ring lattice to the fanout//2 nearest neighbours on each side, plus a
+# shortcut to a random node for every ring edge with probability p
+def generate_sparse_newmanwattsstrogatz(rng, n, k, p=0.5):
+    if k > n:
+        raise ValueError(f"newmanwattsstrogatz: fanout {k} must be <= num_nodes {n}")
+    ring = np.arange(n, dtype=np.int64)
+    src = np.tile(ring, k // 2)
+    dst = (src + np.repeat(np.arange(1, k // 2 + 1, dtype=np.int64), n)) % n
+    shortcut = rng.random(len(src)) < p
+    targets = rng.integers(0, n, size=int(shortcut.sum()))
+    return n, np.concatenate((src, src[shortcut])), np.concatenate((dst, targets))
+
+
+# Bollobas et al. directed scale-free graph, with the networkx scale_free_graph defaults.
+# Nodes are drawn proportionally to their in (out) degree from the list of edge targets (sources)
+def generate_sparse_scalefree(rng, n, alpha=0.41, beta=0.54, gamma=0.05, delta_in=0.2, delta_out=0):
+    src, dst = array('q', (0, 1, 2)), array('q', (1, 2, 0))
+    num_edges, num_nodes = 3, 3
+    # The process is sequential, so uniform draws are taken from blocks of python floats
+    draws = iter(())
+
+    def draw():
+        nonlocal draws
+        u = next(draws, None)
+        if u is None:
+            draws = iter(rng.random(3 * n).tolist())
+            u = next(draws)
+        return u
+
+    def choose(candidates, delta):
+        if delta > 0 and draw() < num_nodes * delta / (num_nodes * delta + num_edges):
+            return int(draw() * num_nodes)
+        return candidates[int(draw() * num_edges)]
+
+    while num_nodes < n:
+        r = draw()
+        if r < alpha:
+            v, w = num_nodes, choose(dst, delta_in)
+            num_nodes += 1
+        elif r < alpha + beta:
+            v, w = choose(src, delta_out), choose(dst, delta_in)
+        else:
+            v, w = choose(src, delta_out), num_nodes
+            num_nodes += 1
+        src.append(v)
+        dst.append(w)
+        num_edges += 1
+    return n, np.frombuffer(src, dtype=np.int64), np.frombuffer(dst, dtype=np.int64)
+
+
+# Balanced tree in breadth-first order: the parent of node c is (c - 1) // fanout
+def generate_sparse_balanced_tree(rng, n, fanout):
+    height = int(math.log(n) / math.log(fanout))
+    num_nodes = height + 1 if fanout == 1 else (fanout ** (height + 1) - 1) // (fanout - 1)
+    children = np.arange(1, num_nodes, dtype=np.int64)
+    return num_nodes, (children - 1) // fanout, children
+
+
+sparseNetworkTypeSwitch = {
+    networkType.REGULAR: lambda rng, p: generate_sparse_regular(rng, p["num_nodes"], p["fanout"]),
+    networkType.NEWMANWATTSSTROGATZ:
+        lambda rng, p: generate_sparse_newmanwattsstrogatz(rng, p["num_nodes"], p["fanout"]),
+    networkType.SCALEFREE: lambda rng, p: generate_sparse_scalefree(rng, p["num_nodes"]),
+    networkType.BALANCEDTREE: lambda rng, p: generate_sparse_balanced_tree(rng, p["num_nodes"], p["fanout"])
+}
+
+
+# Generate the network with the sparse engine; other network types are built by networkx and converted
+def generate_sparse_network(ctx, network_type):
+    if network_type not in sparseNetworkTypeSwitch:
+        print(f"{network_type.value}: no sparse generator, using networkx")
+        G = nx.convert_node_labels_to_integers(nx.Graph(networkTypeSwitch.get(network_type)(ctx)))
+        edges = np.array(G.edges(), dtype=np.int64).reshape(-1, 2)
+        return edges_to_csr(len(G), edges[:, 0], edges[:, 1])
+    rng = np.random.default_rng(ctx.params["prng_seed"])
+    return edges_to_csr(*sparseNetworkTypeSwitch[network_type](rng, ctx.params))
+
+
 def generate_subnets(G, num_subnets):
     n = len(G.nodes)
     if num_subnets == n:  # if num_subnets == size of the network
@@ -309,9 +487,29 @@ def generate_subnets(G, num_subnets):
 
 
 ### file format related fns ###########################################################
+# Load a trait file once: its stripped, non-comment lines under a #trait header
+@functools.lru_cache(maxsize=None)
+def load_trait(traits_dir, trait):
+    toml = f'#{trait}\n'
+    tomlf = f"{traits_dir}/{trait}.toml"
+    if not os.path.isfile(tomlf):
+         raise ValueError(f"traits: missing trait file {tomlf}")
+    with open(tomlf, 'rb') as f:
+        strlines = [l.decode("utf-8").strip() for l in f if not len(l.split()) == 0]
+        toml += ''.join([f'{l}\n' for l in strlines if not l.startswith('#')])
+    return toml + '\n'
+
+
+# Precompile the toml of a traits combination once: everything but the topics
+@functools.lru_cache(maxsize=None)
+def compile_toml_template(traits_dir, traits):
+    # skip the first trait as it is docker/node selector.
+    return ''.join(load_trait(traits_dir, trait) for trait in traits[1:]) + "#topics\ntopics = "
+
+
 # Generate per node toml configs
 def generate_toml(traits_dir, topics, traits_list):
-    topics, node_type, tomls = get_random_sublist(topics), traits_list[0], ""
+    node_type = traits_list[0]
     if node_type == nodeType.GOWAKU:    # comma separated list of quoted topics
         topic_str = ", ".join(f"\"{t}\"" for t in topics)
         topic_str = f"[{topic_str}]"
@@ -319,16 +517,7 @@ def generate_toml(traits_dir, topics, traits_list):
         topic_str = " ".join(topics)
         topic_str = f"\"{topic_str}\""
 
-    for trait in traits_list[1:]:       # skip the first trait as it is docker/node selector.
-        toml = f'#{trait}\n'
-        tomlf = f"{traits_dir}/{trait}.toml"
-        if not os.path.isfile(tomlf):
-             raise ValueError(f"traits: missing trait file {tomlf}")
-        with open(tomlf, 'rb') as f:
-            strlines = [l.decode("utf-8").strip() for l in f if not len(l.split()) == 0]
-            toml += ''.join([f'{l}\n' for l in strlines if not l.startswith('#')])
-        tomls += toml + '\n'
-    return f"{tomls}#topics\ntopics = {topic_str}\n"
+    return f"{compile_toml_template(traits_dir, tuple(traits_list))}{topic_str}\n"
 
 
 # Convert a dict to pair of arrays
@@ -417,27 +606,34 @@ def generate_and_write_files(ctx: typer, G):
     for container, nodes in container2nodes.items():
         json_dump[CONTAINERS_JSON][container] = nodes
 
-    i, traits_dir = 0, ctx.params["traits_dir"]
-    for node in G.nodes:
-        # write the per node toml for the i^ith node of appropriate type
-        traits_list, i = traits_distribution[i].split(":"), i + 1
-        node_type = nodeType(traits_list[0])
-        write_toml(ctx.params["output_dir"], node, generate_toml(traits_dir, topics, traits_list))
-        json_dump[NODES_JSON][node] = {}
-        json_dump[NODES_JSON][node]["static_nodes"] = []
-        for edge in G.edges(node):
-            json_dump[NODES_JSON][node]["static_nodes"].append(edge[1])
-        json_dump[NODES_JSON][node][SUBNET_PREFIX] = node2subnet[node]
-        json_dump[NODES_JSON][node]["image"] = nodeTypeToDocker.get(node_type)
-        # the per node tomls will continue for now as they include topics
-        json_dump[NODES_JSON][node]["node_config"] = f"{node}.toml"
-        # logs ought to continue as they need to be unique
-        json_dump[NODES_JSON][node]["node_log"] = f"{node}.log"
-        port_shift, cid = node2container[node]
-        json_dump[NODES_JSON][node]["port_shift"] = port_shift
-        json_dump[NODES_JSON][node]["container_id"] = cid
-
+    i, traits_dir, topics_index, writes = 0, ctx.params["traits_dir"], {}, []
+    # the per node tomls are written by a thread pool while the json is built
+    with ThreadPoolExecutor(max_workers=ctx.params["write_threads"]) as executor:
+        for node in G.nodes:
+            # write the per node toml for the i^ith node of appropriate type
+            traits_list, i = traits_distribution[i].split(":"), i + 1
+            node_type = nodeType(traits_list[0])
+            topics_index[node] = get_random_sublist(topics)
+            writes.append(executor.submit(write_toml, ctx.params["output_dir"], node,
+                                          generate_toml(traits_dir, topics_index[node], traits_list)))
+            json_dump[NODES_JSON][node] = {}
+            json_dump[NODES_JSON][node]["static_nodes"] = []
+            for edge in G.edges(node):
+                json_dump[NODES_JSON][node]["static_nodes"].append(edge[1])
+            json_dump[NODES_JSON][node][SUBNET_PREFIX] = node2subnet[node]
+            json_dump[NODES_JSON][node]["image"] = nodeTypeToDocker.get(node_type)
+            # the per node tomls will continue for now as they include topics
+            json_dump[NODES_JSON][node]["node_config"] = f"{node}.toml"
+            # logs ought to continue as they need to be unique
+            json_dump[NODES_JSON][node]["node_log"] = f"{node}.log"
+            port_shift, cid = node2container[node]
+            json_dump[NODES_JSON][node]["port_shift"] = port_shift
+            json_dump[NODES_JSON][node]["container_id"] = cid
+
+    for write in writes:    # re-raise the first failed write, if any
+        write.result()
     write_json(ctx.params["output_dir"], json_dump)  # network wide json
+    write_topics_index(ctx.params["output_dir"], topics_index)
 
 
 def generate_and_write_files_nomos(ctx: typer, G):
@@ -526,6 +722,14 @@ def _num_partitions_callback(num_partitions: int):
     return num_partitions
 
 
+# sanity check : write_threads >= 1
+def _write_threads_callback(write_threads: int):
+    if write_threads < 1:
+        raise ValueError(
+            f"--write-threads {write_threads}, at least one thread must write the tomls")
+    return write_threads
+
+
 # sanity check :  num_subnets < num_nodes
 def _num_subnets_callback(ctx: typer, Context, num_subnets: int):
     num_nodes = ctx.params["num_nodes"]
@@ -545,6 +749,8 @@ def main(ctx: typer.Context,
              help="Draw the generated network"),
          container_size: int =  typer.Option(1,
              help="Set the number of nodes per container"),
+         write_threads: int = typer.Option(8, callback=_write_threads_callback,
+             help="Set the number of threads writing the per node tomls"),
          output_dir: str = typer.Option("network_data",
              help="Set the output directory for Gennet generated files"),
          prng_seed: int = typer.Option(1,
@@ -559,6 +765,8 @@ def main(ctx: typer.Context,
              callback=ast.literal_eval, help="Set the node type distribution"),
          network_type: networkType = typer.Option(networkType.REGULAR.value,
              help="Set the node type"),
+         engine: graphEngine = typer.Option(graphEngine.NETWORKX.value,
+             help="Set the graph engine: sparse builds numpy/CSR arrays and scales to 100k+ nodes"),
          num_subnets: int = typer.Option(1, callback=_num_subnets_callback,
              help="Set the number of subnets"),
          num_partitions: int = typer.Option(1, callback=_num_partitions_callback,
@@ -596,7 +804,7 @@ def main(ctx: typer.Context,
 
     # Draw the graph if need be
     if draw:
-        draw_network(ctx, output_dir, G)
+        draw_network(ctx, output_dir, G.to_networkx() if isinstance(G, CSRGraph) else G)
 
     end = time.time()
     time_took = end - start
@@ -0,0 +1,116 @@
+# Python Imports
+import unittest
+from types import SimpleNamespace
+
+import networkx as nx
+import numpy as np
+
+# Project Imports
+import gennet
+
+
+class TestSparseEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+
+    def assert_valid_csr(self, G):
+        """ Rows are sorted, without self-loops nor parallel edges, and every edge is stored both ways """
+        for i in range(len(G)):
+            row = G.indices[G.indptr[i]:G.indptr[i + 1]]
+            self.assertTrue(np.all(np.diff(row) > 0))
+            self.assertNotIn(i, row)
+            for j in row:
+                self.assertIn(i, G.indices[G.indptr[j]:G.indptr[j + 1]])
+        self.assertEqual(G.degrees().sum(), 2 * G.number_of_edges())
+
+    def test_edges_to_csr(self):
+        # A self-loop and the same edge three times, in both directions
+        G = gennet.edges_to_csr(4, [0, 1, 2, 1, 2], [1, 1, 3, 0, 3])
+
+        self.assert_valid_csr(G)
+        self.assertEqual(G.number_of_edges(), 2)
+        self.assertEqual(G.degrees().tolist(), [1, 1, 1, 1])
+        self.assertEqual(G.neighbors(G.nodes[2]), [G.nodes[3]])
+        self.assertEqual(sorted(G.to_networkx().edges()), [(G.nodes[0], G.nodes[1]), (G.nodes[2], G.nodes[3])])
+
+    def test_generate_sparse_regular(self):
+        G = gennet.edges_to_csr(*gennet.generate_sparse_regular(self.rng, 100, 4))
+
+        self.assert_valid_csr(G)
+        self.assertEqual(len(G), 100)
+        self.assertEqual(G.number_of_edges(), 100 * 4 // 2)
+        self.assertTrue(np.all(G.degrees() == 4))
+        self.assertTrue(nx.is_connected(G.to_networkx()))
+
+    def test_generate_sparse_regular_odd(self):
+        # Like the networkx engine, one node is added when num_nodes * fanout is odd
+        G = gennet.edges_to_csr(*gennet.generate_sparse_regular(self.rng, 51, 3))
+
+        self.assertEqual(len(G), 52)
+        self.assertEqual(G.number_of_edges(), 52 * 3 // 2)
+        self.assertTrue(np.all(G.degrees() == 3))
+
+    def test_generate_sparse_regular_error(self):
+        with self.assertRaises(ValueError):
+            gennet.generate_sparse_regular(self.rng, 4, 4)
+
+    def test_generate_sparse_newmanwattsstrogatz(self):
+        n, src, dst = gennet.generate_sparse_newmanwattsstrogatz(self.rng, 100, 4)
+        G = gennet.edges_to_csr(n, src, dst)
+
+        self.assert_valid_csr(G)
+        self.assertEqual(len(G), 100)
+        # The ring lattice, plus the shortcuts that are not already edges
+        ring_edges = 100 * (4 // 2)
+        self.assertGreater(G.number_of_edges(), ring_edges)
+        self.assertLessEqual(G.number_of_edges(), len(src))
+        self.assertTrue(np.all(G.degrees() >= 4))
+        self.assertTrue(nx.is_connected(G.to_networkx()))
+
+    def test_generate_sparse_scalefree(self):
+        n, src, dst = gennet.generate_sparse_scalefree(self.rng, 200)
+        G = gennet.edges_to_csr(n, src, dst)
+
+        self.assert_valid_csr(G)
+        self.assertEqual(len(G), 200)
+        self.assertGreaterEqual(G.number_of_edges(), 200 - 1)
+        self.assertLessEqual(G.number_of_edges(), len(src))
+        self.assertTrue(nx.is_connected(G.to_networkx()))
+
+    def test_generate_sparse_balanced_tree(self):
+        G = gennet.edges_to_csr(*gennet.generate_sparse_balanced_tree(self.rng, 40, 3))
+
+        self.assert_valid_csr(G)
+        # Height 3: 1 + 3 + 9 + 27 nodes
+        self.assertEqual(len(G), 40)
+        self.assertEqual(G.number_of_edges(), 40 - 1)
+        self.assertTrue(nx.is_tree(G.to_networkx()))
+
+    def test_sparse_and_dense_balanced_tree_agree(self):
+        ctx = SimpleNamespace(params={"num_nodes": 40, "fanout": 3})
+        dense = gennet.postprocess_network(gennet.generate_balanced_tree(ctx))
+        sparse = gennet.edges_to_csr(*gennet.generate_sparse_balanced_tree(self.rng, 40, 3)).to_networkx()
+
+        self.assertEqual(sorted(map(sorted, dense.edges())), sorted(map(sorted, sparse.edges())))
+
+    def test_sparse_and_dense_regular_agree(self):
+        ctx = SimpleNamespace(params={"num_nodes": 51, "fanout": 3})
+        dense = gennet.postprocess_network(gennet.generate_regular_graph(ctx))
+        sparse = gennet.edges_to_csr(*gennet.generate_sparse_regular(self.rng, 51, 3))
+
+        self.assertEqual(dense.number_of_nodes(), sparse.number_of_nodes())
+        self.assertEqual(dense.number_of_edges(), sparse.number_of_edges())
+        self.assertEqual(sorted(d for _, d in dense.degree()), sorted(sparse.degrees().tolist()))
+
+    def test_generate_sparse_network_seeded(self):
+        ctx = SimpleNamespace(params={"num_nodes": 60, "fanout": 3, "prng_seed": 7})
+        first = gennet.generate_sparse_network(ctx, gennet.networkType.NEWMANWATTSSTROGATZ)
+        second = gennet.generate_sparse_network(ctx, gennet.networkType.NEWMANWATTSSTROGATZ)
+
+        self.assertTrue(np.array_equal(first.indptr, second.indptr))
+        self.assertTrue(np.array_equal(first.indices, second.indices))
+
+
+if __name__ == '__main__':
+    unittest.main()
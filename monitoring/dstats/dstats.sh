@@ -47,7 +47,7 @@ dstats_pid=$!
 
 echo "dstats: started and running as $dstats_pid"
 echo "dstats: signalling WLS"
-docker exec $wait_cid touch /wls/start.signal
+docker exec $wait_cid sh /wls/signal_start.sh
 
 echo "dstats: waiting for WLS to finish : dstats $dstats_pid is running"
 docker container wait $wait_cid
@@ -234,7 +234,7 @@ class MetricsCollector:
                 #f'CPU-Process CPUUTIME CPUSTIME 
                 f'CPU CPUPerc\n'))
         log.info("Metrics: launch_procfs_monitor: signalling WLS")
-        signal_wls = f'docker exec {wls_cid} touch /wls/start.signal'
+        signal_wls = f'docker exec {wls_cid} sh /wls/signal_start.sh'
         subprocess.run(signal_wls, shell=True) # revisit after Jordi's pending branch merge
         self.set_last_cpu_totals()
         self.start_time = time.time()
@@ -150,7 +150,7 @@ wls_cid="$wls_sname--$wls_suuid"
 ##################### MONITORING MODULE EPILOGUE: WLS SIGNALLING
 if [ "$metrics_infra" = "cadvisor" ]; then
     echo "cadvisor: signaling WLS"
-    docker exec $wls_cid touch /wls/start.signal
+    docker exec $wls_cid sh /wls/signal_start.sh
 elif [ "$metrics_infra" = "dstats" ]; then
     echo "Starting dstats measurements.."
     # collect container/node mapping via kurtosis
@@ -234,8 +234,18 @@ echo "- Configuration file:  $wakurtosis_config_file" >> ./${enclave_name}_logs/
 
 # Copy simulation results
 docker cp "$wls_cid:/wls/network_topology/network_data.json" "./${enclave_name}_logs"
-docker cp "$wls_cid:/wls/messages.json" "./${enclave_name}_logs"
-docker cp "$wls_cid:/wls/prometheus_data.json" "./${enclave_name}_logs"
+docker cp "$wls_cid:/wls/messages.json" "./${enclave_name}_logs" > /dev/null 2>&1
+docker cp "$wls_cid:/wls/messages.ndjson" "./${enclave_name}_logs" > /dev/null 2>&1
+docker cp "$wls_cid:/wls/prometheus_data.csv" "./${enclave_name}_logs"
+
+# Render the Nomos plots off the WLS container, caching the layouts on the host across runs
+if docker cp "$wls_cid:/wls/summary.json" "./${enclave_name}_logs" > /dev/null 2>&1; then
+    docker cp "$wls_cid:/wls/topology.json" "./${enclave_name}_logs"
+    layout_cache_dir="${HOME}/.cache/wakurtosis/nomos_layouts"
+    mkdir -p "$layout_cache_dir"
+    echo "Rendering the Nomos plots"
+    docker run --rm --user $usr:$grp -e MPLCONFIGDIR=/tmp -v "$(pwd)/${enclave_name}_logs:/simulation_data/" -v "$layout_cache_dir:/layout_cache/" --entrypoint python wls:0.0.1 src/nomos_plots.py -topo /simulation_data/topology.json -sum /simulation_data/summary.json -out /simulation_data/ --layout_cache_dir /layout_cache/ >/dev/null 2>&1
+fi
 
 # Run analysis
 if jq -e ."plotting" >/dev/null 2>&1 "./config/${wakurtosis_config_file}"; then
@@ -0,0 +1,51 @@
+""" Compare building the relay RPC body and message hash with build_waku_message against the
+dict + json.dumps path it replaces. Run from wls-module: python -m benchmarks.message_builder """
+# Python Imports
+import json
+import base64
+import random
+import hashlib
+import timeit
+
+# Project Imports
+from src.utils import waku_messaging
+
+""" Globals """
+G_PAYLOAD_SIZES = {'100 B': 100, '10 KB': 10 * 1024, '1 MB': 1024 * 1024}
+G_REPEAT = 5
+
+
+def _legacy_build(topic, payload, nonce):
+    waku_msg = waku_messaging._create_waku_msg(waku_messaging._get_waku_payload(nonce, payload))
+    data = waku_messaging._create_waku_rpc_data(topic, waku_msg, 'http://127.0.0.1:8545/')
+    body = json.dumps(data)
+    msg_hash = hashlib.sha256(json.dumps(waku_msg).encode('utf-8')).hexdigest()
+
+    return body, msg_hash
+
+
+def _single_pass_build(transport, topic, payload, nonce):
+    waku_msg, msg_hash, _ = waku_messaging.build_waku_message(payload, nonce)
+    _, body = transport.get_request('http://127.0.0.1:8545/', topic, waku_msg)
+
+    return body, msg_hash
+
+
+def main():
+    waku_messaging.wls_logger.G_LOGGER.setLevel('WARNING')
+    transport = waku_messaging.JsonRpcTransport({})
+    topic = 'test'
+    for name, size in G_PAYLOAD_SIZES.items():
+        payload = base64.b64encode(random.randbytes(size)).decode('utf-8')
+        number = max(1, 2 * 1024 * 1024 // size)
+
+        legacy = min(timeit.repeat(lambda: _legacy_build(topic, payload, 1), number=number, repeat=G_REPEAT))
+        single = min(timeit.repeat(lambda: _single_pass_build(transport, topic, payload, 1),
+                                   number=number, repeat=G_REPEAT))
+
+        print(f"{name:>6}: legacy {legacy / number * 1e6:10.2f} us/msg, "
+              f"single pass {single / number * 1e6:10.2f} us/msg ({legacy / single:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+#!/bin/sh
+# Signal the WLS to start injecting traffic. Writes the current time to the start FIFO the WLS
+# waits on, or touches the start file if the WLS has not created the FIFO yet.
+fifo=/wls/start.fifo
+
+if [ -p "$fifo" ]; then
+    date +%s.%N > "$fifo"
+else
+    touch /wls/start.signal
+fi
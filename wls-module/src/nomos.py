@@ -1,128 +1,159 @@
-import requests
+import os
+import sys
 import time
+import asyncio
+import aiohttp
 import json
 import random
-import matplotlib.pyplot as plt
-import networkx as nx
 import statistics
-from PIL import Image
+import subprocess
 
 LOGGER = None
-
-# Histogram of time delta in millis of tx being sent
-# and received by all nodes.
-
-def hist_delta(name, iterations):
-    results = []
-    for iteration in iterations:
-        iteration_results = [result["delta"] for result in iteration["results"]]
-        results.extend(iteration_results)
-
-    plt.hist(results, bins=30, color="#000000")
-    plt.xlabel("Delta time (milliseconds)", fontsize=12)
-    plt.ylabel("Frequency", fontsize=12)
-    plt.title("TX dissemination over network", fontsize=14)
-
-    plt.savefig(name, dpi=200)
-    plt.close()
-
-def network_graph(name, topology):
-    G = nx.DiGraph()
-    for node_name, node_data in topology.items():
-        G.add_node(node_name)
-    for node_name, node_data in topology.items():
-        for connection in node_data["static_nodes"]:
-            G.add_edge(node_name, connection)
-
-    pos = nx.spring_layout(G, seed=1)
-    node_size = 100
-    font_size = 8
-
-    nx.draw(G, pos, with_labels=False, node_size=node_size, font_size=font_size, node_color='white', edge_color='black')
-    shift_amount = 0.07
-    label_pos = {k: (v[0], v[1]+shift_amount) for k, v in pos.items()}
-    nx.draw_networkx_labels(G, label_pos, font_size=font_size)
-    nx.draw_networkx_nodes(G, pos, node_size=node_size, node_color='black', edgecolors='white')
-
-    plt.savefig(name, dpi=200)
-    plt.close()
-
-def concat_images(name, images):
-    images = [Image.open(image) for image in images]
-
-    widths, heights = zip(*(i.size for i in images))
-    total_width = sum(widths)
-    max_height = max(heights)
-
-    collage = Image.new('RGB', (total_width, max_height))
-
-    x_offset = 0
-    for image in images:
-        collage.paste(image, (x_offset, 0))
-        x_offset += image.size[0]
-
-    collage.save(name)
-
-def check_nomos_node(node_address):
+G_DEFAULT_NOMOS_CONFIG = {
+    # Transactions added per iteration
+    'batch_size': 40,
+    # Transactions per second within a batch, 0 to add them all at once
+    'tx_rate': 0,
+    'connections_per_host': 100,
+    # Mempools are polled with exponential backoff until they hold every transaction sent
+    'poll_initial_ms': 10,
+    'poll_max_ms': 500,
+    'poll_backoff': 2,
+    'dissemination_timeout_s': 10,
+    # Plots are rendered by nomos_plots.py once the results are written. 'none' leaves it to the
+    # post-run step of run.sh, off the container, 'subprocess' runs it and waits for it before exiting
+    'plots': 'none',
+    'max_layout_nodes': 200,
+    # Only used with 'subprocess'. The WLS container is discarded after every run, so layouts are
+    # only cached in a mounted path
+    'layout_cache_dir': '',
+}
+G_PLOTS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nomos_plots.py')
+
+def get_nomos_config(config):
+    nomos_config = dict(G_DEFAULT_NOMOS_CONFIG)
+    nomos_config.update(config.get('wls', {}).get('nomos', {}))
+
+    return nomos_config
+
+def create_session(connections_per_host):
+    """ One keep-alive session for every node, pooling up to connections_per_host connections to each """
+    connector = aiohttp.TCPConnector(limit=0, limit_per_host=connections_per_host)
+
+    return aiohttp.ClientSession(connector=connector)
+
+async def check_nomos_node(session, node_address):
     url = node_address + "network/info"
- 
-    try:
-        response = requests.get(url)
-    except Exception as e:
-        LOGGER.debug('%s: %s' % (e.__doc__, e))
-        return False
 
     try:
-        response_obj = response.json()
+        async with session.get(url) as response:
+            response_obj = await response.json(content_type=None)
     except Exception as e:
         LOGGER.debug('%s: %s' % (e.__doc__, e))
         return False
 
     LOGGER.debug('Response from %s: %s' %(node_address, response_obj))
- 
+
     return True
 
-def add_nomos_tx(node_address, tx):
+async def add_nomos_tx(session, node_address, tx):
     url = node_address + "mempool/addtx"
 
     try:
-        response = requests.post(url, data=json.dumps(tx), headers={'content-type': 'application/json'})
+        async with session.post(url, data=json.dumps(tx), headers={'content-type': 'application/json'}) as response:
+            response_text = await response.text()
     except Exception as e:
         LOGGER.debug('%s: %s' % (e.__doc__, e))
         return False
 
-    if len(response.text) > 0:
-        LOGGER.debug('Response from %s: %s' %(url, response.text))
+    if len(response_text) > 0:
+        LOGGER.debug('Response from %s: %s' %(url, response_text))
         return False
- 
+
     return True
 
-def get_nomos_mempool_metrics(node_address, iteration_s):
+async def get_nomos_mempool_metrics(session, node_address, iteration_s):
     url = node_address + "mempool/metrics"
 
     try:
-        response = requests.get(url)
+        async with session.get(url) as response:
+            response_obj = await response.json(content_type=None)
     except Exception as e:
         LOGGER.debug('%s: %s' % (e.__doc__, e))
         return "error", -1
 
-    try:
-        response_obj = response.json()
-    except Exception as e:
-        LOGGER.debug('%s: %s' % (e.__doc__, e))
-        return "error", -1
     LOGGER.debug('Response from %s: %s' %(node_address, response_obj))
     time_e = int(time.time() * 1000)
- 
+
     return response_obj, time_e - iteration_s
 
-def run_tests(logger, config, targets, topology):
-    global LOGGER
-    LOGGER = logger
+async def _add_tx_at(session, delay_s, tx_target, tx_id):
+    # Open-loop: every transaction goes out at its own offset, however long the others take
+    await asyncio.sleep(delay_s)
+    LOGGER.debug('sending tx_id: %s to target: %s' %(tx_id, tx_target))
+    if not await add_nomos_tx(session, 'http://%s/' %tx_target, 'tx%s' %tx_id):
+        LOGGER.error('Unable to add new tx. Node %s.' %(tx_target))
+        return None
+
+    return int(time.time() * 1000)
+
+async def send_batch(session, batch, tx_rate):
+    """ Send a batch of (target, tx_id) concurrently, at tx_rate tx/s or all at once if 0. Returns
+    the time in ms every tx was added at, None for the failed ones """
+    interval_s = 1 / tx_rate if tx_rate > 0 else 0
+
+    return await asyncio.gather(*[_add_tx_at(session, j * interval_s, tx_target, tx_id)
+                                  for j, (tx_target, tx_id) in enumerate(batch)])
+
+async def wait_for_dissemination(session, node_address, expected_tx, iteration_s, last_tx_sent, nomos_config):
+    """ Poll the mempool of a node, backing off exponentially, until it holds expected_tx transactions
+    or dissemination_timeout_s goes by. Returns its last metrics ("error" if none could be pulled) and the
+    ms from the last tx sent to the poll that saw them all, None on timeout. The time is measured with the
+    local clock, so it is up to one poll interval late but not skewed by the node clock. """
+    delay_s = nomos_config['poll_initial_ms'] / 1000
+    deadline = time.monotonic() + nomos_config['dissemination_timeout_s']
+    res = "error"
+    while True:
+        metrics, _ = await get_nomos_mempool_metrics(session, node_address, iteration_s)
+        if 'error' not in metrics:
+            res = metrics
+            if res['pending_tx'] >= expected_tx:
+                return res, max(int(time.time() * 1000) - last_tx_sent, 0)
+
+        if time.monotonic() + delay_s > deadline:
+            return res, None
+        await asyncio.sleep(delay_s)
+        delay_s = min(delay_s * nomos_config['poll_backoff'], nomos_config['poll_max_ms'] / 1000)
+
+async def collect_dissemination(session, targets, expected_tx, iteration_s, last_tx_sent, nomos_config):
+    """ Wait for the dissemination at every node in parallel """
+    return await asyncio.gather(*[wait_for_dissemination(session, 'http://%s/' %target, expected_tx,
+                                                         iteration_s, last_tx_sent, nomos_config)
+                                  for target in targets])
+
+def _percentile(sorted_values, percentile):
+    return sorted_values[min(int(len(sorted_values) * percentile / 100), len(sorted_values) - 1)]
+
+def summarize_dissemination(iterations, num_nodes):
+    """ Distribution of the time to full dissemination of every node over the iterations """
+    summary = {}
+    for n in range(num_nodes):
+        results = [result for iteration in iterations for result in iteration["results"] if result["node"] == n]
+        times = sorted(result["delta"] for result in results if result["is_ok"])
+        summary[n] = {"iterations": len(results), "timeouts": len(results) - len(times)}
+        if times:
+            summary[n].update({"min": times[0], "p50": _percentile(times, 50), "p90": _percentile(times, 90),
+                               "p99": _percentile(times, 99), "max": times[-1]})
+
+    return summary
+
+async def _run_iterations(session, nomos_config, targets):
+    batch_size = nomos_config['batch_size']
 
     """ Check all nodes are reachable """
+    nodes_online = await asyncio.gather(*[check_nomos_node(session, 'http://%s/' %target) for target in targets])
     for i, target in enumerate(targets):
-        if not check_nomos_node('http://%s/' %target):
+        if not nodes_online[i]:
             LOGGER.error('Node %d (%s) is not online. Aborted.' %(i, target))
             sys.exit(1)
     LOGGER.info('All %d Waku nodes are reachable.' %len(targets))
@@ -133,7 +164,6 @@ def run_tests(logger, config, targets, topology):
     failed_metrics_cnt = 0
     s_time = time.time()
     failed_dissemination_cnt = 0
-    batch_size = 40
     iterations = []
     tx_id = 0
     all_response_deltas = []
@@ -144,56 +174,43 @@ def run_tests(logger, config, targets, topology):
         iteration_s = int(time.time() * 1000)
         last_tx_sent = iteration_s
 
+        # Targets and ids are drawn up front, in the same order as when sending one by one
         tx_id = tx_id + msg_cnt+failed_addtx_cnt+1
+        batch = []
         for j in range(batch_size):
             tx_id += j
-            tx_target = random.choice(targets)
-            LOGGER.debug('sending tx_id: %s to target: %s' %(tx_id, tx_target))
+            batch.append((random.choice(targets), tx_id))
 
-            if not add_nomos_tx('http://%s/' %tx_target, 'tx%s' %tx_id):
-                LOGGER.error('Unable to add new tx. Node %s.' %(tx_target))
+        for sent_time in await send_batch(session, batch, nomos_config['tx_rate']):
+            if sent_time is None:
                 failed_addtx_cnt += 1
                 continue
-
-            last_tx_sent = int(time.time() * 1000)
+            last_tx_sent = max(last_tx_sent, sent_time)
             msg_cnt += 1
 
-        time.sleep(1)
-
         results = []
-        """ Collect mempool metrics from nodes """
-        for n, target in enumerate(targets):
-            res, t = get_nomos_mempool_metrics('http://%s/' %target, iteration_s)
+        """ Wait for every node to hold all the transactions """
+        for n, (res, dissemination_ms) in enumerate(await collect_dissemination(session, targets, msg_cnt,
+                                                                                iteration_s, last_tx_sent,
+                                                                                nomos_config)):
             if 'error' in res:
-                LOGGER.error('Unable to pull metrics. Node %d (%s).' %(n, target))
+                LOGGER.error('Unable to pull metrics. Node %d (%s).' %(n, targets[n]))
                 failed_metrics_cnt += 1
                 continue
 
-            is_ok = True
-            delta = res['last_tx'] - last_tx_sent
+            is_ok = dissemination_ms is not None
             start_finish = res['last_tx'] - iteration_s
 
-            # Tolerate one second difference between finish and start times.
-            if -1000 < delta < 0:
-                delta = 0
-
-            if delta < 0:
-                LOGGER.error('delta should be gt that zero: %d' %delta)
-                delta = -1
-
-            LOGGER.debug('should be %s' %msg_cnt)
-            if res['pending_tx'] != msg_cnt:
-                delta = -1
-                is_ok = False
+            if not is_ok:
+                LOGGER.debug('Node %d holds %s transactions, should be %s' %(n, res['pending_tx'], msg_cnt))
                 failed_dissemination_cnt += 1
-
-            if delta >= 0:
-                all_response_deltas.append(delta)
+            else:
+                all_response_deltas.append(dissemination_ms)
 
             results.append({
                 "node": n,
                 "is_ok": is_ok,
-                "delta": delta,
+                "delta": dissemination_ms if is_ok else -1,
                 "start_finish": start_finish
             })
 
@@ -209,19 +226,53 @@ def run_tests(logger, config, targets, topology):
         "failed_dissemination_cnt": failed_dissemination_cnt,
         "batch_size": batch_size,
         "s_time": s_time,
-        "median_response_delta": statistics.median(all_response_deltas),
+        "median_response_delta": statistics.median(all_response_deltas) if all_response_deltas else None,
+        "dissemination_by_node": summarize_dissemination(iterations, len(targets)),
         "iterations": iterations,
     }
 
+    return stats
+
+async def run_tests_async(config, targets):
+    nomos_config = get_nomos_config(config)
+    session = create_session(nomos_config['connections_per_host'])
+    try:
+        return await _run_iterations(session, nomos_config, targets)
+    finally:
+        await session.close()
+
+def start_plots(nomos_config):
+    """ Start rendering the plots in a subprocess. Returns it, None if the plots are not rendered """
+    if nomos_config['plots'] == 'none':
+        LOGGER.info('Plots not rendered, run %s to render them' %G_PLOTS_SCRIPT)
+        return None
+    if nomos_config['plots'] != 'subprocess':
+        LOGGER.error('Unknown plots option %s, plots not rendered' %nomos_config['plots'])
+        return None
+
+    return subprocess.Popen([sys.executable, G_PLOTS_SCRIPT, '--topology_file', './topology.json',
+                             '--summary_file', './summary.json',
+                             '--max_layout_nodes', str(nomos_config['max_layout_nodes']),
+                             '--layout_cache_dir', nomos_config['layout_cache_dir']])
+
+def run_tests(logger, config, targets, topology):
+    global LOGGER
+    LOGGER = logger
+
+    stats = asyncio.run(run_tests_async(config, targets))
+
     with open('./topology.json', 'w') as summary_file:
         summary_file.write(json.dumps(topology, indent=4))
 
     with open('./summary.json', 'w') as summary_file:
         summary_file.write(json.dumps(stats, indent=4))
 
-    network_graph("1.png", topology)
-    hist_delta("2.png", stats['iterations'])
-    concat_images("collage.png", ["1.png", "2.png"])
+    plots = start_plots(get_nomos_config(config))
+    LOGGER.info('Results written to ./summary.json')
+
+    """ The renderer is killed when the container exits, so wait for it """
+    if plots is not None and plots.wait() != 0:
+        LOGGER.error('Rendering the plots failed with status %d' %plots.returncode)
 
     """ We are done """
     LOGGER.info('Ended')
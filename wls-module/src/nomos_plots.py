@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Description: Renders the plots of a Nomos WLS run from its topology.json and summary.json.
+Run apart from the measurements, so drawing large topologies does not hold the simulation up.
+
+"""
+
+""" Dependencies """
+import os
+import sys
+import json
+import hashlib
+import logging
+import argparse
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import networkx as nx
+from PIL import Image
+
+""" Globals """
+G_APP_NAME = 'WLS'
+G_DEFAULT_MAX_LAYOUT_NODES = 200
+# Outside of the WLS container, so layouts are reused across runs when rendering on the host
+G_DEFAULT_LAYOUT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'wakurtosis', 'nomos_layouts')
+G_LOGGER = logging.getLogger(G_APP_NAME)
+
+# Histogram of time delta in millis of tx being sent
+# and received by all nodes.
+
+def hist_delta(name, iterations):
+    results = []
+    for iteration in iterations:
+        iteration_results = [result["delta"] for result in iteration["results"]]
+        results.extend(iteration_results)
+
+    plt.hist(results, bins=30, color="#000000")
+    plt.xlabel("Delta time (milliseconds)", fontsize=12)
+    plt.ylabel("Frequency", fontsize=12)
+    plt.title("TX dissemination over network", fontsize=14)
+
+    plt.savefig(name, dpi=200)
+    plt.close()
+
+def build_graph(topology):
+    G = nx.DiGraph()
+    for node_name, node_data in topology.items():
+        G.add_node(node_name)
+    for node_name, node_data in topology.items():
+        for connection in node_data["static_nodes"]:
+            G.add_edge(node_name, connection)
+
+    return G
+
+def topology_hash(topology):
+    """ Hash of the nodes and connections of a topology, the only thing its layout depends on """
+    edges = {node_name: sorted(node_data["static_nodes"]) for node_name, node_data in topology.items()}
+
+    return hashlib.sha256(json.dumps(edges, sort_keys=True).encode()).hexdigest()
+
+def get_layout(G, topology, cache_dir):
+    """ Spring layout of the graph, read from cache_dir if this topology was already laid out """
+    cache_file = None
+    if cache_dir:
+        cache_file = os.path.join(cache_dir, 'layout-%s.json' %topology_hash(topology))
+        try:
+            with open(cache_file, 'r') as f:
+                G_LOGGER.info('Layout loaded from %s' %cache_file)
+                return {node: tuple(xy) for node, xy in json.load(f).items()}
+        except (OSError, ValueError):
+            pass
+
+    pos = nx.spring_layout(G, seed=1)
+
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file, 'w') as f:
+                json.dump({node: [float(x), float(y)] for node, (x, y) in pos.items()}, f)
+        except OSError as e:
+            G_LOGGER.warning('Could not cache the layout in %s: %s' %(cache_file, e))
+
+    return pos
+
+def network_graph(name, topology, max_layout_nodes=G_DEFAULT_MAX_LAYOUT_NODES, cache_dir=G_DEFAULT_LAYOUT_CACHE_DIR):
+    """ Draw the topology. Returns False if it was skipped for having more than max_layout_nodes nodes """
+    if max_layout_nodes and len(topology) > max_layout_nodes:
+        G_LOGGER.info('Skipped the network graph: %d nodes, more than %d' %(len(topology), max_layout_nodes))
+        return False
+
+    G = build_graph(topology)
+    pos = get_layout(G, topology, cache_dir)
+    node_size = 100
+    font_size = 8
+
+    nx.draw(G, pos, with_labels=False, node_size=node_size, font_size=font_size, node_color='white', edge_color='black')
+    shift_amount = 0.07
+    label_pos = {k: (v[0], v[1]+shift_amount) for k, v in pos.items()}
+    nx.draw_networkx_labels(G, label_pos, font_size=font_size)
+    nx.draw_networkx_nodes(G, pos, node_size=node_size, node_color='black', edgecolors='white')
+
+    plt.savefig(name, dpi=200)
+    plt.close()
+
+    return True
+
+def concat_images(name, images):
+    images = [Image.open(image) for image in images]
+
+    widths, heights = zip(*(i.size for i in images))
+    total_width = sum(widths)
+    max_height = max(heights)
+
+    collage = Image.new('RGB', (total_width, max_height))
+
+    x_offset = 0
+    for image in images:
+        collage.paste(image, (x_offset, 0))
+        x_offset += image.size[0]
+
+    collage.save(name)
+
+def render_plots(topology_file, summary_file, output_dir='.', max_layout_nodes=G_DEFAULT_MAX_LAYOUT_NODES,
+                 cache_dir=G_DEFAULT_LAYOUT_CACHE_DIR):
+    with open(topology_file, 'r') as f:
+        topology = json.load(f)
+    with open(summary_file, 'r') as f:
+        stats = json.load(f)
+
+    images = []
+    graph_file = os.path.join(output_dir, '1.png')
+    if network_graph(graph_file, topology, max_layout_nodes, cache_dir):
+        images.append(graph_file)
+    hist_file = os.path.join(output_dir, '2.png')
+    hist_delta(hist_file, stats['iterations'])
+    images.append(hist_file)
+    concat_images(os.path.join(output_dir, 'collage.png'), images)
+
+def main():
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO,
+                        format='[%(asctime)s.%(msecs)03d] [' + G_APP_NAME + '] %(message)s', datefmt='%d-%m-%Y %H:%M:%S')
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-topo", "--topology_file", help="Topology file", default='./topology.json')
+    parser.add_argument("-sum", "--summary_file", help="Summary file", default='./summary.json')
+    parser.add_argument("-out", "--output_dir", help="Directory the plots are written to", default='.')
+    parser.add_argument("--max_layout_nodes", help="Skip the network graph above this many nodes, 0 never skips it",
+                        type=int, default=G_DEFAULT_MAX_LAYOUT_NODES)
+    parser.add_argument("--layout_cache_dir", help="Directory of the cached layouts, empty disables the cache",
+                        default=G_DEFAULT_LAYOUT_CACHE_DIR)
+    args = parser.parse_args()
+
+    render_plots(args.topology_file, args.summary_file, args.output_dir, args.max_layout_nodes, args.layout_cache_dir)
+    G_LOGGER.info('Plots rendered in %s' %args.output_dir)
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,131 @@
+# Python Imports
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# Project Imports
+from src import nomos
+
+
+class TestNomos(unittest.TestCase):
+
+    def create_patch(self, name, **kwargs):
+        patcher = patch(name, **kwargs)
+        thing = patcher.start()
+        self.addCleanup(patcher.stop)
+        return thing
+
+    def setUp(self):
+        self.create_patch('src.nomos.LOGGER')
+
+    def test_get_nomos_config(self):
+        nomos_config = nomos.get_nomos_config({'wls': {'nomos': {'batch_size': 5}}})
+        self.assertEqual(nomos_config['batch_size'], 5)
+        self.assertEqual(nomos_config['tx_rate'], nomos.G_DEFAULT_NOMOS_CONFIG['tx_rate'])
+        self.assertEqual(nomos.get_nomos_config({}), nomos.G_DEFAULT_NOMOS_CONFIG)
+
+    def test_add_nomos_tx(self):
+        mock_response = MagicMock()
+        mock_response.text = AsyncMock(side_effect=['', 'error'])
+        mock_session = MagicMock()
+        mock_session.post.return_value.__aenter__.return_value = mock_response
+
+        self.assertTrue(asyncio.run(nomos.add_nomos_tx(mock_session, 'http://1:2/', 'tx1')))
+        self.assertFalse(asyncio.run(nomos.add_nomos_tx(mock_session, 'http://1:2/', 'tx2')))
+        mock_session.post.assert_called_with('http://1:2/mempool/addtx', data='"tx2"',
+                                             headers={'content-type': 'application/json'})
+
+    def test_get_nomos_mempool_metrics_error(self):
+        mock_session = MagicMock()
+        mock_session.get.side_effect = Exception('test')
+
+        self.assertEqual(asyncio.run(nomos.get_nomos_mempool_metrics(mock_session, 'http://1:2/', 0)),
+                         ("error", -1))
+
+    def test_send_batch(self):
+        mock_add = self.create_patch('src.nomos.add_nomos_tx', new_callable=AsyncMock)
+        mock_add.side_effect = [True, False, True]
+
+        sent_times = asyncio.run(nomos.send_batch('session', [('a', 1), ('b', 2), ('c', 3)], 0))
+
+        self.assertIsNone(sent_times[1])
+        self.assertTrue(all(sent_time is not None for sent_time in (sent_times[0], sent_times[2])))
+        self.assertEqual([call.args[1:] for call in mock_add.await_args_list],
+                         [('http://a/', 'tx1'), ('http://b/', 'tx2'), ('http://c/', 'tx3')])
+
+    def test_wait_for_dissemination(self):
+        mock_metrics = self.create_patch('src.nomos.get_nomos_mempool_metrics', new_callable=AsyncMock)
+        mock_metrics.side_effect = [("error", -1), ({'pending_tx': 1, 'last_tx': 3}, 3),
+                                    ({'pending_tx': 2, 'last_tx': 4}, 4)]
+        mock_sleep = self.create_patch('src.nomos.asyncio.sleep', new_callable=AsyncMock)
+        nomos_config = dict(nomos.G_DEFAULT_NOMOS_CONFIG, poll_initial_ms=100, poll_max_ms=300)
+
+        res, dissemination_ms = asyncio.run(nomos.wait_for_dissemination('session', 'http://a/', 2, 0, 0,
+                                                                         nomos_config))
+
+        self.assertEqual(res, {'pending_tx': 2, 'last_tx': 4})
+        self.assertGreater(dissemination_ms, 0)
+        self.assertEqual([call.args[0] for call in mock_sleep.await_args_list], [0.1, 0.2])
+
+    def test_wait_for_dissemination_timeout(self):
+        mock_metrics = self.create_patch('src.nomos.get_nomos_mempool_metrics', new_callable=AsyncMock)
+        mock_metrics.return_value = ({'pending_tx': 1, 'last_tx': 3}, 3)
+        nomos_config = dict(nomos.G_DEFAULT_NOMOS_CONFIG, poll_initial_ms=1, dissemination_timeout_s=0.01)
+
+        res, dissemination_ms = asyncio.run(nomos.wait_for_dissemination('session', 'http://a/', 2, 0, 0,
+                                                                         nomos_config))
+
+        self.assertEqual(res, {'pending_tx': 1, 'last_tx': 3})
+        self.assertIsNone(dissemination_ms)
+
+    def test_collect_dissemination(self):
+        mock_wait = self.create_patch('src.nomos.wait_for_dissemination', new_callable=AsyncMock)
+        mock_wait.side_effect = lambda session, node_address, *args: node_address
+
+        results = asyncio.run(nomos.collect_dissemination('session', ['a', 'b'], 2, 0, 0, {}))
+
+        self.assertEqual(results, ['http://a/', 'http://b/'])
+
+    def test_summarize_dissemination(self):
+        iterations = [{"results": [{"node": 0, "is_ok": True, "delta": 10},
+                                   {"node": 1, "is_ok": False, "delta": -1}]},
+                      {"results": [{"node": 0, "is_ok": True, "delta": 30}]}]
+
+        summary = nomos.summarize_dissemination(iterations, 2)
+
+        self.assertEqual(summary[0], {"iterations": 2, "timeouts": 0, "min": 10, "p50": 30, "p90": 30,
+                                      "p99": 30, "max": 30})
+        self.assertEqual(summary[1], {"iterations": 1, "timeouts": 1})
+
+    def test_start_plots(self):
+        mock_popen = self.create_patch('src.nomos.subprocess.Popen')
+
+        nomos.start_plots(dict(nomos.G_DEFAULT_NOMOS_CONFIG, plots='subprocess', max_layout_nodes=10))
+
+        args = mock_popen.call_args.args[0]
+        self.assertEqual(args[1], nomos.G_PLOTS_SCRIPT)
+        self.assertEqual(args[args.index('--max_layout_nodes') + 1], '10')
+        mock_popen.return_value.wait.assert_not_called()
+
+    def test_start_plots_none(self):
+        mock_popen = self.create_patch('src.nomos.subprocess.Popen')
+
+        self.assertIsNone(nomos.start_plots(dict(nomos.G_DEFAULT_NOMOS_CONFIG, plots='none')))
+        mock_popen.assert_not_called()
+
+    def test_start_plots_default(self):
+        mock_popen = self.create_patch('src.nomos.subprocess.Popen')
+
+        self.assertIsNone(nomos.start_plots(nomos.G_DEFAULT_NOMOS_CONFIG))
+        mock_popen.assert_not_called()
+
+    def test_run_tests_waits_for_plots(self):
+        self.create_patch('src.nomos.run_tests_async', new=MagicMock())
+        self.create_patch('src.nomos.asyncio.run').return_value = {'iterations': []}
+        self.create_patch('src.nomos.open')
+        mock_start_plots = self.create_patch('src.nomos.start_plots')
+        mock_start_plots.return_value.wait.return_value = 0
+
+        nomos.run_tests(MagicMock(), {}, ['a'], {})
+
+        mock_start_plots.return_value.wait.assert_called_once()
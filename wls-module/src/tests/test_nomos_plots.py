@@ -0,0 +1,68 @@
+# Python Imports
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Project Imports
+from src import nomos_plots
+
+
+class TestNomosPlots(unittest.TestCase):
+
+    def setUp(self):
+        self.topology = {'a': {'static_nodes': ['b', 'c']}, 'b': {'static_nodes': ['c']}, 'c': {'static_nodes': []}}
+
+    def test_topology_hash(self):
+        reordered = {'c': {'static_nodes': []}, 'b': {'static_nodes': ['c']},
+                     'a': {'static_nodes': ['c', 'b'], 'ip_address': '1'}}
+        self.assertEqual(nomos_plots.topology_hash(self.topology), nomos_plots.topology_hash(reordered))
+
+        self.topology['c']['static_nodes'].append('a')
+        self.assertNotEqual(nomos_plots.topology_hash(self.topology), nomos_plots.topology_hash(reordered))
+
+    def test_get_layout_cache(self):
+        G = nomos_plots.build_graph(self.topology)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            pos = nomos_plots.get_layout(G, self.topology, cache_dir)
+            with patch('src.nomos_plots.nx.spring_layout') as mock_layout:
+                cached_pos = nomos_plots.get_layout(G, self.topology, cache_dir)
+
+        mock_layout.assert_not_called()
+        self.assertEqual(cached_pos.keys(), pos.keys())
+        for node in pos:
+            self.assertAlmostEqual(cached_pos[node][0], pos[node][0])
+            self.assertAlmostEqual(cached_pos[node][1], pos[node][1])
+
+    def test_get_layout_no_cache(self):
+        G = nomos_plots.build_graph(self.topology)
+        with patch('src.nomos_plots.nx.spring_layout') as mock_layout:
+            mock_layout.return_value = {}
+            nomos_plots.get_layout(G, self.topology, '')
+            nomos_plots.get_layout(G, self.topology, '')
+
+        self.assertEqual(mock_layout.call_count, 2)
+
+    @patch('src.nomos_plots.build_graph')
+    def test_network_graph_skipped(self, mock_build_graph):
+        self.assertFalse(nomos_plots.network_graph('1.png', self.topology, max_layout_nodes=2))
+        mock_build_graph.assert_not_called()
+
+    @patch('src.nomos_plots.concat_images')
+    @patch('src.nomos_plots.hist_delta')
+    @patch('src.nomos_plots.network_graph')
+    def test_render_plots_without_graph(self, mock_network_graph, mock_hist_delta, mock_concat_images):
+        mock_network_graph.return_value = False
+        with tempfile.TemporaryDirectory() as output_dir:
+            topology_file = os.path.join(output_dir, 'topology.json')
+            summary_file = os.path.join(output_dir, 'summary.json')
+            with open(topology_file, 'w') as f:
+                f.write('{}')
+            with open(summary_file, 'w') as f:
+                f.write('{"iterations": []}')
+
+            nomos_plots.render_plots(topology_file, summary_file, output_dir)
+
+        mock_hist_delta.assert_called_once_with(os.path.join(output_dir, '2.png'), [])
+        mock_concat_images.assert_called_once_with(os.path.join(output_dir, 'collage.png'),
+                                                   [os.path.join(output_dir, '2.png')])
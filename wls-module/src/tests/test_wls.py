@@ -1,6 +1,11 @@
 # Python Imports
 import unittest
 import random
+import os
+import json
+import time
+import asyncio
+import tempfile
 from unittest.mock import mock_open, patch
 
 # Project Imports
@@ -39,48 +44,41 @@ class TestWLS(unittest.TestCase):
         self.assertEqual(args_parsed.config_file, wls.G_DEFAULT_CONFIG_FILE)
         self.assertEqual(args_parsed.topology_file, wls.G_DEFAULT_TOPOLOGY_FILE)
 
+    def test_parse_cli_metrics_port(self):
+        self.assertEqual(wls.parse_cli([]).metrics_port, wls.metrics.G_DEFAULT_METRICS_PORT)
+        self.assertEqual(wls.parse_cli(["-mp", "0"]).metrics_port, 0)
+
     def test_parse_cli_error(self):
         with self.assertRaises(SystemExit):
             wls.parse_cli(["-cfg", "test1", "-t", "test2", "-error"])
 
-    def test__load_topics_nwaku(self):
+    def test__parse_topics_nwaku(self):
         m = mock_open(read_data='asd')
         with patch('builtins.open', m) as mocked_open:
             mock_tomllib_load = self.create_patch('tomllib.load')
             mock_tomllib_load.return_value = {"topics": 'test1 test2'}
 
             node_info = {"image": "nim-waku", "node_config": "asd"}
-            node = {}
-            node["test"] = {}
-
-            wls._load_topics(node_info, node, "test")
-            self.assertEqual(node["test"]["topics"], ["test1", "test2"])
+            self.assertEqual(wls._parse_topics(node_info), ["test1", "test2"])
 
-    def test__load_topics_gowaku(self):
+    def test__parse_topics_gowaku(self):
         m = mock_open(read_data='asd')
         with patch('builtins.open', m) as mocked_open:
             mock_tomllib_load = self.create_patch('tomllib.load')
             mock_tomllib_load.return_value = {"topics": ['test1', 'test2']}
 
             node_info = {"image": "go-waku", "node_config": "asd"}
-            node = {}
-            node["test"] = {}
-
-            wls._load_topics(node_info, node, "test")
-            self.assertEqual(node["test"]["topics"], ["test1", "test2"])
+            self.assertEqual(wls._parse_topics(node_info), ["test1", "test2"])
 
-    def test__load_topics_error(self):
+    def test__parse_topics_error(self):
         m = mock_open(read_data='asd')
         with patch('builtins.open', m) as mocked_open:
             mock_tomllib_load = self.create_patch('tomllib.load')
             mock_tomllib_load.return_value = {"topics": 'test1 test2'}
 
             node_info = {"image": "error", "node_config": "asd"}
-            node = {}
-            node["test"] = {}
-
-            with self.assertRaises(Exception):
-                wls._load_topics(node_info, node, "test")
+            with self.assertRaises(ValueError):
+                wls._parse_topics(node_info)
 
     def test_load_topics_into_topology(self):
         m = mock_open(read_data='asd')
@@ -102,6 +100,29 @@ class TestWLS(unittest.TestCase):
             with self.assertRaises(SystemExit):
                 wls.load_topics_into_topology(topology)
 
+    def test_load_topics_into_topology_index(self):
+        with tempfile.TemporaryDirectory() as tomls_folder:
+            with open(os.path.join(tomls_folder, wls.G_TOPICS_INDEX_FILE), 'w') as f:
+                json.dump({"test": ["test1", "test2"]}, f)
+            mock_tomllib_load = self.create_patch('tomllib.load')
+
+            topology = {"nodes": {"test": {"image": "nim-waku", "node_config": "asd"}}}
+            wls.load_topics_into_topology(topology, tomls_folder + '/')
+            self.assertEqual(topology["nodes"]["test"]["topics"], ["test1", "test2"])
+            mock_tomllib_load.assert_not_called()
+
+    def test_load_topics_into_topology_no_cache(self):
+        with tempfile.TemporaryDirectory() as tomls_folder:
+            tomls_folder += '/'
+            with open(tomls_folder + 'test.toml', 'w') as f:
+                f.write('topics = "test1 test2"\n')
+            topology = {"nodes": {"test": {"image": "nim-waku", "node_config": "test.toml"}}}
+
+            wls.load_topics_into_topology(topology, tomls_folder)
+            self.assertEqual(topology["nodes"]["test"]["topics"], ["test1", "test2"])
+            # The tomls folder belongs to the run, nothing is written to it
+            self.assertEqual(os.listdir(tomls_folder), ['test.toml'])
+
     def test_get_random_emitters_all(self):
         topology = {"nodes": {"test1": 1, "test2": 2}}
         config = {"emitters_fraction": 1}
@@ -128,6 +149,62 @@ class TestWLS(unittest.TestCase):
         with self.assertRaises(SystemExit):
             wls.get_random_emitters(topology, config)
 
+    def test__uses_injector_processes(self):
+        wls_config = {'message_rate': 10, 'injector_processes': 2}
+        self.assertTrue(wls._uses_injector_processes(wls_config))
+        self.assertFalse(wls._uses_injector_processes(dict(wls_config, injector_processes=1)))
+        self.assertFalse(wls._uses_injector_processes(dict(wls_config, message_rate=0)))
+        self.assertFalse(wls._uses_injector_processes(dict(wls_config, mode='saturation')))
+        self.assertFalse(wls._uses_injector_processes(dict(wls_config, mode='replay')))
+
+    def test__shard_emitters(self):
+        emitters = {"test1": 1, "test2": 2, "test3": 3, "test4": 4, "test5": 5}
+        shards = wls._shard_emitters(emitters, 2)
+
+        self.assertEqual(shards, [{"test1": 1, "test3": 3, "test5": 5}, {"test2": 2, "test4": 4}])
+
+    def test__shard_emitters_more_shards_than_emitters(self):
+        emitters = {"test1": 1, "test2": 2}
+        shards = wls._shard_emitters(emitters, 4)
+
+        self.assertEqual(shards, [{"test1": 1}, {"test2": 2}])
+
+    def test__get_shards_popularity_weights(self):
+        emitters = {"test1": {"topics": ["a"]}, "test2": {"topics": ["b", "c"]}, "test3": {"topics": ["d"]}}
+        shards = wls._shard_emitters(emitters, 2)
+        wls_config = {"traffic_schedule": {"emitter_zipf": 1, "topic_zipf": 1}}
+
+        shards_weights = wls._get_shards_popularity_weights(emitters, shards, wls_config)
+
+        # Ranked over all the emitters, not within every shard
+        self.assertEqual(shards_weights, [([1, 1 / 3], [[1], [1]]), ([1 / 2], [[1, 1 / 2]])])
+        self.assertIsNone(wls._get_shards_popularity_weights(emitters, shards, {}))
+
+    def test__get_shares(self):
+        emitters = {"test1": 1, "test2": 2, "test3": 3, "test4": 4}
+        shards = wls._shard_emitters(emitters, 2)
+
+        self.assertEqual(wls._get_shares(emitters, shards, None), [0.5, 0.5])
+        shares = wls._get_shares(emitters, shards, [([3, 1], None), ([0, 0], None)])
+        self.assertEqual(shares, [1, 0])
+
+    def test__get_worker_config(self):
+        wls_config = {"message_rate": 30, "max_in_flight": 100, "max_queued": 10}
+        worker_config = wls._get_worker_config(wls_config, 1 / 3)
+
+        self.assertAlmostEqual(worker_config["message_rate"], 10)
+        self.assertEqual(worker_config["max_in_flight"], 34)
+        self.assertEqual(worker_config["max_queued"], 4)
+        self.assertEqual(wls_config["max_in_flight"], 100)
+
+    def test__get_worker_config_defaults(self):
+        worker_config = wls._get_worker_config({"message_rate": 30, "max_in_flight": 0}, 1 / 3)
+        self.assertEqual(worker_config["max_in_flight"], 0)
+        self.assertNotIn("max_queued", worker_config)
+
+        worker_config = wls._get_worker_config({"message_rate": 30}, 1 / 2)
+        self.assertEqual(worker_config["max_in_flight"], 500)
+
     def test__is_simulation_finished(self):
         # time.time returns the number of seconds passed since epoch
         mock_time = self.create_patch('time.time')
@@ -180,7 +257,10 @@ class TestWLS(unittest.TestCase):
                     "test3": {"ip_address": 10, "ports": {"rpc-test3": (11, "tcp")},
                               "topics": ["test3a", "test3b"]}}
 
-        emitter_address, topic = wls._select_emitter_with_topic(emitters)
+        mock_randrange = self.create_patch('random.randrange')
+        mock_randrange.side_effect = [0, 0]
+
+        emitter_address, topic = wls._select_emitter_with_topic(wls.emitters.EmitterIndex(emitters))
 
         self.assertEqual(emitter_address, "http://1:2/")
         self.assertEqual(topic, "test1a")
@@ -215,3 +295,67 @@ class TestWLS(unittest.TestCase):
         wls._inject_message("1.1.1.1", "test", messages_dict, wls_config)
         self.assertEqual(len(messages_dict), 1)
 
+    def test_start_traffic_injection_async_slow_setup(self):
+        self.create_patch('src.wls._limited_inject_message_async')
+
+        async def slow_probe_start(*args):
+            await asyncio.sleep(0.4)
+            return None, {}
+
+        self.create_patch('src.wls._start_delivery_probe').side_effect = slow_probe_start
+
+        wls_config = {'message_rate': 10, 'dist_type': 'uniform', 'inter_msg_type': 'uniform',
+                      'simulation_time': 0.5, 'progress_log_s': 0}
+        random_emitters = {'test1': {'ip_address': 1, 'ports': {'rpc-test1': (2, 'tcp')}, 'topics': ['t']}}
+
+        _, stats = asyncio.run(wls.start_traffic_injection_async(wls_config, random_emitters))
+
+        # The whole schedule is injected, however long the setup took
+        self.assertEqual(stats['num_msgs'], len(list(wls._get_send_deadlines(wls_config))))
+
+    def test_start_traffic_injection_async_inter_msg_type(self):
+        self.create_patch('src.wls._limited_inject_message_async')
+        get_send_deadlines = wls._get_send_deadlines
+        inter_msg_types = []
+
+        def record_deadlines(wls_config, *args):
+            inter_msg_types.append(wls_config['inter_msg_type'])
+            return get_send_deadlines(wls_config, *args)
+
+        self.create_patch('src.wls._get_send_deadlines').side_effect = record_deadlines
+
+        class InterControl(wls.control.InjectionControl):
+            # Switched to uniform inter-message times right after the injection starts
+            def __init__(self, *args):
+                super().__init__(*args)
+                asyncio.get_running_loop().call_soon(self.execute, 'inter uniform')
+
+        wls_config = {'message_rate': 10, 'dist_type': 'uniform', 'inter_msg_type': 'poisson',
+                      'simulation_time': 0.3, 'progress_log_s': 0}
+        random_emitters = {'test1': {'ip_address': 1, 'ports': {'rpc-test1': (2, 'tcp')}, 'topics': ['t']}}
+
+        with patch('src.wls.control.InjectionControl', InterControl):
+            asyncio.run(wls.start_traffic_injection_async(wls_config, random_emitters))
+
+        self.assertEqual(inter_msg_types, ['poisson', 'uniform'])
+
+    def test_start_traffic_injection_async_paused_until_the_end(self):
+        self.create_patch('src.wls._limited_inject_message_async')
+
+        class PausedControl(wls.control.InjectionControl):
+            # Paused right after the injection starts, and never resumed
+            def __init__(self, *args):
+                super().__init__(*args)
+                asyncio.get_running_loop().call_soon(self.pause)
+
+        wls_config = {'message_rate': 10, 'dist_type': 'uniform', 'inter_msg_type': 'uniform',
+                      'simulation_time': 0.5, 'progress_log_s': 0}
+        random_emitters = {'test1': {'ip_address': 1, 'ports': {'rpc-test1': (2, 'tcp')}, 'topics': ['t']}}
+
+        with patch('src.wls.control.InjectionControl', PausedControl):
+            start = time.monotonic()
+            _, stats = asyncio.run(asyncio.wait_for(
+                wls.start_traffic_injection_async(wls_config, random_emitters), 5))
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(stats['num_msgs'], 0)
@@ -0,0 +1,149 @@
+# Python Imports
+import asyncio
+from collections import defaultdict, deque
+
+# Project Imports
+from src.utils import wls_logger
+
+""" Globals """
+G_DEFAULT_MAX_IN_FLIGHT = 1000
+G_DEFAULT_MAX_IN_FLIGHT_PER_EMITTER = 0
+G_DEFAULT_POLICY = 'block'
+G_POLICIES = ('block', 'queue', 'drop')
+
+# Outcomes of admit()
+G_ADMITTED = 'admitted'
+G_QUEUED = 'queued'
+G_DROPPED = 'dropped'
+
+
+class InFlightLimiter:
+    """ Caps the number of in-flight requests, globally and per emitter. A cap of 0 means unbounded.
+    When a cap is hit the policy decides what happens to the new message:
+        - block: the caller waits until a slot is released.
+        - queue: the message waits for a slot in its own task, up to max_queued waiting messages.
+        - drop: the message is discarded.
+    Waiting messages get the released slots in arrival order, before any new message.
+    """
+
+    def __init__(self, max_in_flight=G_DEFAULT_MAX_IN_FLIGHT,
+                 max_in_flight_per_emitter=G_DEFAULT_MAX_IN_FLIGHT_PER_EMITTER,
+                 policy=G_DEFAULT_POLICY, max_queued=None):
+        if policy not in G_POLICIES:
+            wls_logger.G_LOGGER.error(f"Unknown backpressure policy {policy}")
+            raise ValueError('Unknown backpressure policy %s' % policy)
+
+        self._max_in_flight = max_in_flight
+        self._max_in_flight_per_emitter = max_in_flight_per_emitter
+        self._policy = policy
+        self._max_queued = max_in_flight if max_queued is None else max_queued
+        self._in_flight = 0
+        self._in_flight_per_emitter = defaultdict(int)
+        self._queued = 0
+        # (emitter, future) of every waiting message, oldest first. The future is resolved once
+        # the slot is taken on its behalf
+        self._waiters = deque()
+        # Futures of the queued messages of every emitter, until their task waits for them
+        self._queued_waiters = defaultdict(deque)
+        self.counters = {G_ADMITTED: 0, 'blocked': 0, G_QUEUED: 0, G_DROPPED: 0}
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def _is_full(self):
+        return self._max_in_flight and self._in_flight >= self._max_in_flight
+
+    def _has_slot(self, emitter):
+        if self._is_full():
+            return False
+        if self._max_in_flight_per_emitter and \
+                self._in_flight_per_emitter[emitter] >= self._max_in_flight_per_emitter:
+            return False
+
+        return True
+
+    def _take_slot(self, emitter):
+        self._in_flight += 1
+        self._in_flight_per_emitter[emitter] += 1
+
+    def _release_slot(self, emitter):
+        self._in_flight -= 1
+        self._in_flight_per_emitter[emitter] -= 1
+        self._grant_slots()
+
+    def _grant_slots(self):
+        """ Hand the free slots to the oldest waiters that can take them. A waiter is only passed
+        over when its emitter is at its own cap """
+        i = 0
+        while i < len(self._waiters) and not self._is_full():
+            emitter, future = self._waiters[i]
+            if future.done():
+                # Cancelled while waiting
+                del self._waiters[i]
+            elif self._has_slot(emitter):
+                del self._waiters[i]
+                self._take_slot(emitter)
+                future.set_result(None)
+            else:
+                i += 1
+
+    def _add_waiter(self, emitter):
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((emitter, future))
+
+        return future
+
+    async def _wait_for_grant(self, emitter, future):
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been granted right before the cancellation, give it back
+            if future.done() and not future.cancelled():
+                self._release_slot(emitter)
+            raise
+
+    async def admit(self, emitter):
+        """ Decide what to do with a new message for the emitter. Returns G_ADMITTED when the
+        message holds a slot, G_QUEUED when it must wait_for_slot() first, or G_DROPPED. """
+        # Free slots are granted to the waiters as soon as they are released, so a slot still free
+        # here is one no waiter can take
+        if self._has_slot(emitter):
+            self._take_slot(emitter)
+            self.counters[G_ADMITTED] += 1
+            return G_ADMITTED
+
+        if self._policy == 'block':
+            self.counters['blocked'] += 1
+            await self._wait_for_grant(emitter, self._add_waiter(emitter))
+            return G_ADMITTED
+
+        if self._policy == 'queue' and (not self._max_queued or self._queued < self._max_queued):
+            self.counters[G_QUEUED] += 1
+            self._queued += 1
+            # Take its place in line now, not when its task gets to wait
+            self._queued_waiters[emitter].append(self._add_waiter(emitter))
+            return G_QUEUED
+
+        self.counters[G_DROPPED] += 1
+        return G_DROPPED
+
+    async def wait_for_slot(self, emitter):
+        # Queued messages of an emitter start waiting in the order they were admitted
+        future = self._queued_waiters[emitter].popleft()
+        try:
+            await self._wait_for_grant(emitter, future)
+        finally:
+            self._queued -= 1
+
+    async def release(self, emitter):
+        self._release_slot(emitter)
+
+
+def create_limiter(wls_config):
+    return InFlightLimiter(
+        max_in_flight=wls_config.get('max_in_flight', G_DEFAULT_MAX_IN_FLIGHT),
+        max_in_flight_per_emitter=wls_config.get('max_in_flight_per_emitter',
+                                                 G_DEFAULT_MAX_IN_FLIGHT_PER_EMITTER),
+        policy=wls_config.get('backpressure_policy', G_DEFAULT_POLICY),
+        max_queued=wls_config.get('max_queued', None))
@@ -0,0 +1,199 @@
+# Python Imports
+import os
+import sys
+import json
+import socket
+import asyncio
+
+# Project Imports
+from src.utils import wls_logger
+
+""" Globals """
+G_DEFAULT_CONTROL_SOCKET = '/wls/control.sock'
+G_DIST_TYPES = ('gaussian', 'uniform')
+G_INTER_MSG_TYPES = ('poisson', 'uniform')
+
+
+class InjectionControl:
+    """ Live settings of a running injection, changed through the control socket. Every change
+    bumps version, so the injection loop only has to compare an int per message to notice it. """
+
+    def __init__(self, msg_rate, dist_type, inter_msg_type=None):
+        self.rate = msg_rate
+        self.dist_type = dist_type
+        self.inter_msg_type = inter_msg_type
+        self.paused = False
+        self.stopped = False
+        self.version = 0
+        self.num_msgs = 0
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._waiter = None
+
+    def _changed(self):
+        self.version += 1
+        # Wake the injection loop up if it is sleeping until its next deadline
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def sleep(self, delay):
+        """ Sleep like asyncio.sleep, but return early on any change """
+        if delay <= 0:
+            await asyncio.sleep(0)
+            return
+
+        loop = asyncio.get_running_loop()
+        self._waiter = loop.create_future()
+        handle = loop.call_later(delay, _set_result_unless_done, self._waiter)
+        try:
+            await self._waiter
+        finally:
+            handle.cancel()
+            self._waiter = None
+
+    async def wait_resumed(self, timeout=None):
+        """ Wait until the injection is resumed, for at most timeout seconds. Returns whether it was """
+        try:
+            await asyncio.wait_for(self._resumed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+        return True
+
+    def set_rate(self, rate):
+        if rate <= 0:
+            raise ValueError('The rate must be greater than zero, pause the injection instead')
+        self.rate = rate
+        self._changed()
+
+    def set_dist_type(self, dist_type):
+        if dist_type not in G_DIST_TYPES:
+            raise ValueError('Unknown distribution %s' % dist_type)
+        self.dist_type = dist_type
+        self._changed()
+
+    def set_inter_msg_type(self, inter_msg_type):
+        if inter_msg_type not in G_INTER_MSG_TYPES:
+            raise ValueError('Unknown inter-message times %s' % inter_msg_type)
+        self.inter_msg_type = inter_msg_type
+        self._changed()
+
+    def pause(self):
+        self.paused = True
+        self._resumed.clear()
+        self._changed()
+
+    def resume(self):
+        self.paused = False
+        self._resumed.set()
+        self._changed()
+
+    def stop(self):
+        self.stopped = True
+        # Let a paused injection loop notice it has to stop
+        self._resumed.set()
+        self._changed()
+
+    def status(self):
+        return {'rate': self.rate, 'dist_type': self.dist_type, 'inter_msg_type': self.inter_msg_type,
+                'paused': self.paused,
+                'stopped': self.stopped, 'num_msgs': self.num_msgs}
+
+    def execute(self, command_line):
+        """ Run a command line and return the response to send back """
+        command, *args = command_line.split()
+        if command == 'rate' and len(args) == 1:
+            self.set_rate(float(args[0]))
+        elif command == 'dist' and len(args) == 1:
+            self.set_dist_type(args[0])
+        elif command == 'inter' and len(args) == 1:
+            self.set_inter_msg_type(args[0])
+        elif command == 'pause' and not args:
+            self.pause()
+        elif command == 'resume' and not args:
+            self.resume()
+        elif command == 'stop' and not args:
+            self.stop()
+        elif command != 'status' or args:
+            raise ValueError('Unknown command %s' % command_line)
+
+        wls_logger.G_LOGGER.info(f"Control command '{command_line}': {self.status()}")
+
+        return {'ok': True, 'status': self.status()}
+
+
+def _set_result_unless_done(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def get_control_socket_path(wls_config, worker_id=None):
+    """ Path of the control socket, None if disabled. Every injector process gets its own """
+    path = wls_config.get('control_socket', G_DEFAULT_CONTROL_SOCKET)
+    if not path:
+        return None
+
+    return path if worker_id is None else f"{path}.{worker_id}"
+
+
+async def _handle_client(control, reader, writer):
+    try:
+        while line := await reader.readline():
+            command_line = line.decode().strip()
+            if not command_line:
+                continue
+            try:
+                response = control.execute(command_line)
+            except ValueError as e:
+                response = {'ok': False, 'error': str(e)}
+            writer.write((json.dumps(response) + '\n').encode())
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_control_server(control, path):
+    """ Serve the control commands on a UNIX socket. Returns the server, or None if the socket
+    cannot be created, in which case the injection just runs without live control """
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(
+            lambda reader, writer: _handle_client(control, reader, writer), path=path)
+    except OSError as e:
+        wls_logger.G_LOGGER.warning(f"Could not create the control socket {path}: {e}")
+        return None
+
+    wls_logger.G_LOGGER.info(f"Listening to control commands on {path}")
+
+    return server
+
+
+async def close_control_server(server, path):
+    if server is None:
+        return
+
+    server.close()
+    await server.wait_closed()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def send_command(path, command_line):
+    """ Send a command to a running WLS and return its response """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall((command_line + '\n').encode())
+        response = b''
+        while not response.endswith(b'\n'):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            response += chunk
+
+    return json.loads(response)
+
+
+if __name__ == "__main__":
+    # python -m src.utils.control <socket> <command> [args]
+    print(json.dumps(send_command(sys.argv[1], ' '.join(sys.argv[2:]))))
@@ -0,0 +1,88 @@
+# Python Imports
+import random
+
+# Project Imports
+from src.utils import wls_logger
+from src.utils import traffic
+from src.utils import waku_messaging
+
+
+class AliasTable:
+    """ Walker's alias method: after an O(n) setup, draws an index with probability proportional
+    to its weight using one random index and one random float. Without weights every index is
+    equally likely. """
+
+    def __init__(self, num_items, weights=None):
+        if num_items <= 0:
+            raise ValueError('Cannot build an alias table of %d items' % num_items)
+
+        self._num_items = num_items
+        self._prob = None
+        self._alias = None
+        if weights is None:
+            return
+
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError('Alias table weights must add up to more than zero')
+        if len(set(weights)) == 1:
+            return
+
+        scaled = [weight * num_items / total for weight in weights]
+        self._prob = [1.0] * num_items
+        self._alias = list(range(num_items))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._prob[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            if scaled[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+        # Whatever is left is 1 up to rounding errors, so it keeps its own slot
+
+    def sample(self):
+        i = random.randrange(self._num_items)
+        if self._prob is None or random.random() < self._prob[i]:
+            return i
+
+        return self._alias[i]
+
+
+class EmitterIndex:
+    """ Emitters RPC addresses and topics, plus the tables to pick them, computed once per run so
+    selecting where the next message goes does not allocate anything. """
+
+    def __init__(self, random_emitters, popularity_weights=None,
+                 get_address=waku_messaging.JsonRpcTransport.get_node_address):
+        self.emitters = list(random_emitters)
+        self.addresses = [get_address(emitter, emitter_info)
+                          for emitter, emitter_info in random_emitters.items()]
+        self.topics = [emitter_info['topics'] for emitter_info in random_emitters.values()]
+        self.names = dict(zip(self.addresses, self.emitters))
+
+        emitters_weights, topics_weights = popularity_weights or (None, [None] * len(self.topics))
+        self._emitters_table = AliasTable(len(self.emitters), emitters_weights)
+        self._topics_tables = [AliasTable(len(topics), weights)
+                               for topics, weights in zip(self.topics, topics_weights)]
+
+    def select(self):
+        """ Pick an emitter and one of its topics. Returns the emitter RPC address and the topic """
+        i = self._emitters_table.sample()
+        topics = self.topics[i]
+
+        return self.addresses[i], topics[self._topics_tables[i].sample()]
+
+
+def create_emitter_index(random_emitters, wls_config, transport, popularity_weights=None):
+    """ popularity_weights are computed from wls_config unless given, e.g. sliced out of the weights
+    of all the emitters for a shard of them """
+    if popularity_weights is None:
+        popularity_weights = traffic.get_popularity_weights(random_emitters, wls_config)
+    emitter_index = EmitterIndex(random_emitters, popularity_weights, transport.get_node_address)
+    wls_logger.G_LOGGER.info(f"Indexed {len(emitter_index.emitters)} emitters")
+
+    return emitter_index
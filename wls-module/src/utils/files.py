@@ -4,6 +4,44 @@ import json
 # Project Imports
 from src.utils import wls_logger
 
+""" Globals """
+G_MESSAGES_JSON_FILE = './messages.json'
+G_MESSAGES_NDJSON_FILE = './messages.ndjson'
+
+
+class MessagesWriter:
+    """ Append-only NDJSON log of the injected messages, one record per line written as soon as
+    the message completes. It stands in for the messages dictionary during the injection, but only
+    keeps the message hashes in memory. """
+
+    def __init__(self, path=G_MESSAGES_NDJSON_FILE):
+        # Line buffered, so every completed message reaches the file even if the WLS crashes
+        self._file = open(path, 'w', buffering=1)
+        self._hashes = set()
+        self._num_msgs = 0
+
+    def __contains__(self, msg_hash):
+        return bytes.fromhex(msg_hash) in self._hashes
+
+    def __len__(self):
+        return self._num_msgs
+
+    def __setitem__(self, msg_hash, msg):
+        self._hashes.add(bytes.fromhex(msg_hash))
+        self._file.write(json.dumps({'hash': msg_hash, **msg}) + '\n')
+        self._num_msgs += 1
+
+    def append_log(self, path):
+        """ Append the records of another messages log, e.g. the one of an injector process """
+        with open(path, 'r') as log_file:
+            for line in log_file:
+                self._file.write(line)
+                self._num_msgs += 1
+
+    def close(self):
+        self._file.close()
+        wls_logger.G_LOGGER.info(f'Wrote {self._num_msgs} messages to {self._file.name}')
+
 
 def load_config_file(config_file):
     """ Load config file """
@@ -24,9 +62,31 @@ def load_topology(topology_file):
     return topology
 
 
+def create_messages_log(messages_format, path=G_MESSAGES_NDJSON_FILE):
+    """ Where the injected messages are recorded: a dictionary dumped to messages.json at the end
+    of the simulation, or a streaming NDJSON log """
+    if messages_format == 'json':
+        return {}
+
+    if messages_format == 'ndjson':
+        return MessagesWriter(path)
+
+    wls_logger.G_LOGGER.error(f"Unknown messages format {messages_format}")
+
+    raise ValueError('Unknown messages format %s' % messages_format)
+
+
+def save_messages(msgs_dict):
+    if isinstance(msgs_dict, MessagesWriter):
+        msgs_dict.close()
+        wls_logger.G_LOGGER.info('Ended')
+    else:
+        save_messages_to_json(msgs_dict)
+
+
 def save_messages_to_json(msgs_dict):
     # Save messages for further analysis
-    with open('./messages.json', 'w') as f:
+    with open(G_MESSAGES_JSON_FILE, 'w') as f:
         f.write(json.dumps(msgs_dict, indent=4))
 
     """ We are done """
@@ -0,0 +1,46 @@
+# Python Imports
+import os
+import tempfile
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, multiprocess, \
+    start_http_server
+
+# Project Imports
+from src.utils import wls_logger
+
+""" Globals """
+G_DEFAULT_METRICS_PORT = 8001
+
+# Live metrics of the injector itself, so we can tell when the load generator is the bottleneck
+G_MESSAGES = Counter('wls_messages', 'Messages injected, by HTTP status of the RPC call', ['status'])
+G_DROPPED = Counter('wls_messages_dropped', 'Messages dropped by the backpressure policy')
+G_PAYLOAD_BYTES = Counter('wls_payload_bytes', 'Payload bytes injected')
+G_IN_FLIGHT = Gauge('wls_in_flight', 'Messages being injected', multiprocess_mode='livesum')
+G_TARGET_RATE = Gauge('wls_target_rate', 'Target injection rate in msg/s', multiprocess_mode='livesum')
+G_INJECTION_LATENCY = Histogram('wls_injection_latency_seconds', 'Duration of the RPC call injecting a message',
+                                buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+                                         5, 10))
+G_SCHEDULER_LATENESS = Histogram('wls_scheduler_lateness_seconds',
+                                 'Delay between the deadline of a message and when it was scheduled',
+                                 buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+# Delivery probe. The live delivery rate is the rate of deliveries over the rate of expected ones
+G_PROBE_EXPECTED = Counter('wls_probe_expected_deliveries', 'Deliveries expected at the probe nodes')
+G_PROBE_DELIVERED = Counter('wls_probe_deliveries', 'Messages received by the probe nodes in time')
+G_PROBE_LATENCY = Histogram('wls_probe_delivery_latency_seconds',
+                            'Time from the injection of a message to its reception by a probe node',
+                            buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+
+
+def start_metrics_server(port, multiprocess_workers=False):
+    """ Serve the metrics over HTTP. With multiprocess_workers, the metrics of the injector
+    processes spawned afterwards are collected instead of those of this process """
+    registry = REGISTRY
+    if multiprocess_workers:
+        # Spawned processes inherit the variable, and write their metrics to files in this
+        # directory that are merged on every scrape
+        metrics_dir = tempfile.mkdtemp(prefix='wls_metrics_')
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = metrics_dir
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=metrics_dir)
+
+    start_http_server(port, registry=registry)
+    wls_logger.G_LOGGER.info(f"Serving WLS metrics on port {port}")
@@ -1,11 +1,50 @@
 # Python Imports
 import random
 import base64
+import numpy as np
 
 # Project Imports
 from src.utils import wls_logger
 from src.utils import rtnorm
 
+""" Globals """
+G_DEFAULT_PAYLOAD_POOL_SIZE = 4 * 1024 * 1024
+# Random buffer payloads are sliced from, and its base64 encoding
+G_PAYLOAD_POOL = None
+G_PAYLOAD_POOL_BASE64 = None
+# Number of gaussian sizes drawn at once, and the buffered sizes per (min_size, max_size)
+G_GAUSSIAN_SIZES_BATCH = 4096
+G_GAUSSIAN_SIZES = {}
+
+
+def init_payload_pool(max_size, pool_size=G_DEFAULT_PAYLOAD_POOL_SIZE):
+    """ Generate, once per run, the random buffer payloads are sliced from. Bytes come from the
+    seeded PRNG, so payloads stay reproducible for a given prng_seed. """
+    global G_PAYLOAD_POOL, G_PAYLOAD_POOL_BASE64
+
+    pool_size = max(pool_size, 2 * max_size)
+    # Keep the pool 3-byte aligned so its base64 encoding has no padding
+    pool_size -= pool_size % 3
+
+    G_PAYLOAD_POOL = random.randbytes(pool_size)
+    G_PAYLOAD_POOL_BASE64 = base64.b64encode(G_PAYLOAD_POOL).decode('utf-8')
+
+    wls_logger.G_LOGGER.info(f"Generated a payload pool of {pool_size} bytes")
+
+
+def _slice_base64_payload(bytes_size):
+    # The base64 encoding of a 3-byte aligned slice of the pool is a substring of the base64
+    # encoding of the pool, so only the trailing (< 3 bytes) chunk has to be encoded
+    offset = 3 * random.randrange((len(G_PAYLOAD_POOL) - bytes_size) // 3 + 1)
+    aligned_size = bytes_size - bytes_size % 3
+
+    base64_string = G_PAYLOAD_POOL_BASE64[offset // 3 * 4:(offset + aligned_size) // 3 * 4]
+    if aligned_size < bytes_size:
+        tail = memoryview(G_PAYLOAD_POOL)[offset + aligned_size:offset + bytes_size]
+        base64_string += base64.b64encode(tail).decode('utf-8')
+
+    return base64_string
+
 
 def _make_hex_payload(bytes_size):
     # Multiplied by 4 because each character in a string is one byte, so in a hex
@@ -17,7 +56,7 @@ def _make_hex_payload(bytes_size):
 
     payload = hex(random.getrandbits(4 * bytes_size))
 
-    wls_logger.G_LOGGER.debug(f"Payload of size {bytes_size} bytes: {payload}")
+    wls_logger.G_LOGGER.debug("Payload of size %d bytes: %s", bytes_size, payload)
     return payload
 
 
@@ -26,7 +65,10 @@ def _make_base64_payload(bytes_size):
     if bytes_size == 0:
         raise ValueError('Payload size cannot be 0')
 
-    random_bytes = bytes(random.choices(range(256), k=bytes_size))
+    if G_PAYLOAD_POOL is not None and bytes_size <= len(G_PAYLOAD_POOL):
+        return _slice_base64_payload(bytes_size)
+
+    random_bytes = random.randbytes(bytes_size)
     base64_bytes = base64.b64encode(random_bytes)
     base64_string = base64_bytes.decode('utf-8')
 
@@ -43,18 +85,35 @@ def _make_uniform_dist(min_size, max_size):
     return _make_base64_payload(size), size
 
 
-def _make_gaussian_dist(min_size, max_size):
+def _sample_gaussian_sizes(min_size, max_size):
     σ = (max_size - min_size) / 5.
     μ = (max_size - min_size) / 2.
-    size = int(rtnorm.rtnorm(min_size, max_size, sigma=σ, mu=μ, size=1))
+    # Seed the numpy generator from the global PRNG so sizes follow prng_seed
+    rng = np.random.default_rng(random.getrandbits(64))
+    sizes = rtnorm.rtnorm_batch(min_size, max_size, sigma=σ, mu=μ, size=G_GAUSSIAN_SIZES_BATCH,
+                                rng=rng).astype(int)
 
     # Reject non even sizes
-    while (size % 2) != 0:
-        size = int(rtnorm.rtnorm(min_size, max_size, sigma=σ, mu=μ, size=1))
+    sizes = sizes[sizes % 2 == 0]
+
+    # Reversed so that pop() hands out the sizes in the order they were drawn
+    return sizes[::-1].tolist()
+
+
+def _make_gaussian_dist(min_size, max_size):
+    sizes = G_GAUSSIAN_SIZES.get((min_size, max_size))
+    while not sizes:
+        sizes = _sample_gaussian_sizes(min_size, max_size)
+        G_GAUSSIAN_SIZES[(min_size, max_size)] = sizes
+    size = sizes.pop()
 
     return _make_base64_payload(size), size
 
 
+def make_payload(bytes_size):
+    return _make_base64_payload(bytes_size)
+
+
 def make_payload_dist(dist_type, min_size, max_size):
     # Check if min and max packet sizes are the same
     if min_size == max_size:
@@ -0,0 +1,222 @@
+# Python Imports
+import re
+import time
+import base64
+import random
+import asyncio
+import binascii
+from array import array
+from collections import deque
+
+# Project Imports
+from src.utils import wls_logger
+from src.utils import waku_messaging
+from src.utils import metrics
+
+""" Globals """
+G_DEFAULT_PROBE_NODES = 0
+G_DEFAULT_POLL_INTERVAL_MS = 100
+G_DEFAULT_REPORT_S = 10
+G_DEFAULT_TIMEOUT_S = 5
+# Waku payloads start with the nonce and timestamp, so only the start of the payload is decoded
+G_PAYLOAD_HEADER = re.compile(rb'\{"nonce": (\d+), "ts": (\d+)')
+G_PAYLOAD_HEADER_CHARS = 96
+
+
+def select_probe_nodes(topology, wls_config, prng_seed):
+    """ Sample the nodes to probe, with their own PRNG so the injected traffic does not change """
+    num_nodes = min(wls_config.get('probe_nodes', G_DEFAULT_PROBE_NODES), len(topology['nodes']))
+    if num_nodes <= 0:
+        return {}
+
+    nodes = random.Random(f"{prng_seed}-probe").sample(sorted(topology['nodes']), num_nodes)
+    wls_logger.G_LOGGER.info(f"Probing the delivery at {num_nodes} nodes")
+
+    return {node: topology['nodes'][node] for node in nodes}
+
+
+def _parse_payload_header(payload):
+    """ Nonce and timestamp of a base64 Waku payload, None if it was not injected by the WLS """
+    try:
+        header = base64.b64decode(payload[:G_PAYLOAD_HEADER_CHARS])
+    except (binascii.Error, ValueError):
+        return None
+
+    match = G_PAYLOAD_HEADER.match(header)
+    if match is None:
+        return None
+
+    return int(match.group(1)), int(match.group(2))
+
+
+def _percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0
+
+    return sorted_values[min(int(len(sorted_values) * percentile / 100), len(sorted_values) - 1)]
+
+
+class DeliveryProbe:
+    """ Polls a sample of nodes for the messages they receive and matches them by nonce with the
+    injected ones. A message is expected at every probe node subscribed to its topic, and counts
+    as delivered there if it shows up within timeout_s. Latencies are measured against the
+    timestamp in the payload, up to the poll interval late. """
+
+    def __init__(self, transport, node_topics, poll_interval_ms=G_DEFAULT_POLL_INTERVAL_MS,
+                 report_s=G_DEFAULT_REPORT_S, timeout_s=G_DEFAULT_TIMEOUT_S):
+        self._transport = transport
+        self.node_topics = node_topics
+        self._poll_interval_s = poll_interval_ms / 1000
+        self._report_s = report_s
+        self._timeout_s = timeout_s
+        self._nodes_by_topic = {}
+        for node_address, topics in node_topics.items():
+            for topic in topics:
+                self._nodes_by_topic.setdefault(topic, []).append(node_address)
+        # nonce -> (nodes expected to receive it, nodes that received it). Settled in send order once
+        # timeout_s old, so the delivery rates logged are those of the messages sent timeout_s ago
+        self._pending = {}
+        self._sent = deque()
+        self._settled_expected = 0
+        self._settled_delivered = 0
+        self._latencies = array('d')
+        self._window_latencies = []
+        self._tasks = []
+        self.expected = 0
+        self.delivered = 0
+        self.unmatched = 0
+
+    def record_sent(self, nonce, topic):
+        nodes = self._nodes_by_topic.get(topic)
+        if nodes:
+            self._pending[nonce] = (nodes, set())
+            self._sent.append((time.monotonic(), nonce))
+
+    def discard(self, nonce):
+        # The injection failed, so nobody is expected to receive it
+        self._pending.pop(nonce, None)
+
+    def record_received(self, node_address, payload, received_ns):
+        header = _parse_payload_header(payload)
+        pending = self._pending.get(header[0]) if header is not None else None
+        if pending is None or node_address in pending[1] or node_address not in pending[0]:
+            self.unmatched += 1
+            return
+
+        pending[1].add(node_address)
+        latency_s = (received_ns - header[1]) / 1e9
+        self._latencies.append(latency_s)
+        self._window_latencies.append(latency_s)
+        metrics.G_PROBE_LATENCY.observe(latency_s)
+
+    def _settle(self, expected, delivered):
+        self._settled_expected += expected
+        self._settled_delivered += delivered
+        self.expected += expected
+        self.delivered += delivered
+        metrics.G_PROBE_EXPECTED.inc(expected)
+        metrics.G_PROBE_DELIVERED.inc(delivered)
+
+    def expire(self, timeout_s=None):
+        """ Settle the messages sent more than timeout_s ago """
+        deadline = time.monotonic() - (self._timeout_s if timeout_s is None else timeout_s)
+        while self._sent and self._sent[0][0] <= deadline:
+            _, nonce = self._sent.popleft()
+            pending = self._pending.pop(nonce, None)
+            if pending is not None:
+                self._settle(len(pending[0]), len(pending[1]))
+
+    def report(self, timeout_s=None):
+        """ Log the deliveries settled and the latencies measured since the last report """
+        self.expire(timeout_s)
+        expected, delivered = self._settled_expected, self._settled_delivered
+        self._settled_expected = self._settled_delivered = 0
+        latencies = sorted(self._window_latencies)
+        self._window_latencies = []
+        if expected or latencies:
+            delivery_rate = delivered / expected * 100 if expected else 0
+            wls_logger.G_LOGGER.info(f"Delivery probe: {delivered}/{expected} deliveries "
+                                     f"({delivery_rate:.2f}%), latency "
+                                     f"p50 {_percentile(latencies, 50) * 1000:.1f} ms, "
+                                     f"p99 {_percentile(latencies, 99) * 1000:.1f} ms")
+
+    def summary(self):
+        latencies = sorted(self._latencies)
+        return {'probe_expected': self.expected, 'probe_delivered': self.delivered,
+                'probe_delivery_rate': self.delivered / self.expected if self.expected else 0,
+                'probe_latency_p50_ms': _percentile(latencies, 50) * 1000,
+                'probe_latency_p99_ms': _percentile(latencies, 99) * 1000}
+
+    async def _subscribe(self, session, node_address, topics):
+        method, url, body = self._transport.get_subscribe_request(node_address, topics)
+        try:
+            status, _ = await waku_messaging.request_waku_json_async(session, method, url, body)
+        except Exception as e:
+            status = e
+        if status != 200:
+            wls_logger.G_LOGGER.warning(f"Could not subscribe {node_address} to {topics}: {status}")
+
+    async def _poll_node(self, session, node_address, topics):
+        requests = [self._transport.get_messages_request(node_address, topic) for topic in topics]
+        while True:
+            for method, url, body in requests:
+                try:
+                    status, response = await waku_messaging.request_waku_json_async(session, method, url, body)
+                except Exception as e:
+                    wls_logger.G_LOGGER.debug("Probe poll of %s failed: %s", url, e)
+                    continue
+                received_ns = time.time_ns()
+                for waku_msg in self._transport.get_messages(response) if status == 200 else []:
+                    self.record_received(node_address, waku_msg.get('payload', ''), received_ns)
+            await asyncio.sleep(self._poll_interval_s)
+
+    async def _report_periodically(self):
+        while True:
+            await asyncio.sleep(self._report_s)
+            self.report()
+
+    async def start(self, sessions):
+        """ Subscribe the probe nodes and start polling them, through a session per node """
+        await asyncio.gather(*[self._subscribe(sessions[node_address], node_address, topics)
+                               for node_address, topics in self.node_topics.items()])
+        self._tasks = [asyncio.create_task(self._poll_node(sessions[node_address], node_address, topics))
+                       for node_address, topics in self.node_topics.items()]
+        if self._report_s:
+            self._tasks.append(asyncio.create_task(self._report_periodically()))
+
+    def _is_drained(self):
+        return all(len(received) == len(nodes) for nodes, received in self._pending.values())
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def stop(self):
+        """ Keep polling until the last messages are delivered or time out, then stop. Returns the
+        summary of the run """
+        drain_start = time.monotonic()
+        while not self._is_drained() and time.monotonic() - drain_start < self._timeout_s:
+            await asyncio.sleep(self._poll_interval_s)
+        await self.close()
+
+        self.report(timeout_s=0)
+        summary = self.summary()
+        wls_logger.G_LOGGER.info(f"Delivery probe summary: {summary}")
+
+        return summary
+
+
+def create_probe(wls_config, probe_nodes, transport):
+    """ The delivery probe of the given nodes, None if there are none """
+    if not probe_nodes:
+        return None
+
+    node_topics = {transport.get_node_address(node, node_info): node_info['topics']
+                   for node, node_info in probe_nodes.items()}
+
+    return DeliveryProbe(transport, node_topics,
+                         poll_interval_ms=wls_config.get('probe_poll_interval_ms', G_DEFAULT_POLL_INTERVAL_MS),
+                         report_s=wls_config.get('probe_report_s', G_DEFAULT_REPORT_S),
+                         timeout_s=wls_config.get('probe_timeout_s', G_DEFAULT_TIMEOUT_S))
@@ -1,35 +1,125 @@
 # Python Imports
+import csv
 import json
+import os
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from prometheus_api_client import PrometheusConnect
 
+# Project Imports
+from src.utils import wls_logger
+
+""" Globals """
+G_PROMETHEUS_DATA_FILE = '/wls/prometheus_data.csv'
+# Series are spooled next to the CSV file until all their label keys are known
+G_SERIES_SPOOL_SUFFIX = '.series'
+G_QUERY_STEP_S = 1
+# 600 points per series and chunk, well below the Prometheus limit of 11000
+G_DEFAULT_CHUNK_S = 600
+G_DEFAULT_QUERY_WORKERS = 8
+G_DEFAULT_QUERY_RETRIES = 3
+G_RETRY_BACKOFF_S = 1
+
 
 def connect_to_prometheus(ip, port):
-    print(f"Connecting to {ip}:{port}")
+    wls_logger.G_LOGGER.info(f"Connecting to {ip}:{port}")
     url = f"http://{ip}:{port}"
     try:
         prometheus = PrometheusConnect(url, disable_ssl=True)
     except Exception as e:
-        print("Cannot connect to Prometheus Service")
-        print(e)
+        wls_logger.G_LOGGER.error(f"Cannot connect to Prometheus Service: {e}")
         return None
 
     return prometheus
 
 
-def dump_prometheus(config, prometheus_ip, prometheus_port, start_time, finish_time):
-    to_query = config["plotting"]["by_node"]
+def _get_time_chunks(start_time, finish_time, chunk_s):
+    """ Split [start_time, finish_time] in consecutive chunks that do not share any sample """
+    chunks = []
+    chunk_start = start_time
+    while chunk_start <= finish_time:
+        chunk_end = min(chunk_start + timedelta(seconds=chunk_s - G_QUERY_STEP_S), finish_time)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(seconds=G_QUERY_STEP_S)
+
+    return chunks
+
+
+def _query_chunk(prometheus_connection, metric, chunk_start, chunk_end, retries):
+    query = f"{{__name__=\"{metric}\"}}"
+    for attempt in range(retries + 1):
+        try:
+            return prometheus_connection.custom_query_range(query, start_time=chunk_start,
+                                                            end_time=chunk_end,
+                                                            step=f"{G_QUERY_STEP_S}s")
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wls_logger.G_LOGGER.warning(f"Query of {metric} from {chunk_start} to {chunk_end} failed: "
+                                        f"{e}. Retrying")
+            time.sleep(G_RETRY_BACKOFF_S * 2 ** attempt)
 
-    to_query = "|".join(to_query)
 
-    print(to_query)
+def _write_series(series_file, series_list, label_keys):
+    """ Spool the series of a chunk, one JSON line each, and collect their label keys """
+    for series in series_list:
+        labels = dict(series['metric'])
+        metric = labels.pop('__name__', '')
+        label_keys.update(labels)
+        series_file.write(json.dumps([metric, labels, series['values']]) + '\n')
+
+
+def _write_columns(series_file, out_file, label_keys):
+    """ Write the spooled series as CSV, one row per sample and one column per label """
+    label_keys = sorted(label_keys)
+    writer = csv.writer(out_file)
+    writer.writerow(['metric', *label_keys, 'timestamp', 'value'])
+    for line in series_file:
+        metric, labels, values = json.loads(line)
+        row = [metric, *(labels.get(key, '') for key in label_keys)]
+        writer.writerows(row + [timestamp, value] for timestamp, value in values)
+
+
+def dump_prometheus(config, prometheus_ip, prometheus_port, start_time, finish_time,
+                    out_file_name=G_PROMETHEUS_DATA_FILE):
+    """ Dump the by_node metrics of the run. Every metric and chunk of the run is queried
+    separately and in parallel, and spooled to disk as it arrives. The label keys are only known
+    once every chunk is in, so the spool is then written to a CSV file with one row per sample and
+    one column per label, empty for the series without it. Rows are not sorted. """
+    wls_config = config['wls']
+    chunk_s = wls_config.get('prometheus_chunk_s', G_DEFAULT_CHUNK_S)
+    workers = wls_config.get('prometheus_query_workers', G_DEFAULT_QUERY_WORKERS)
+    retries = wls_config.get('prometheus_query_retries', G_DEFAULT_QUERY_RETRIES)
 
     prometheus_connection = connect_to_prometheus(prometheus_ip, prometheus_port)
+    if prometheus_connection is None:
+        return
+
+    chunks = _get_time_chunks(start_time, finish_time, chunk_s)
+    metrics = config["plotting"]["by_node"]
+    wls_logger.G_LOGGER.info(f"Dumping {len(metrics)} metrics in {len(chunks)} chunks of {chunk_s} s")
 
-    query = f"{{__name__=~\"{to_query}\"}}"
-    print(query)
+    failed = 0
+    label_keys = set()
+    series_file_name = out_file_name + G_SERIES_SPOOL_SUFFIX
+    with open(series_file_name, 'w') as series_file, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_query_chunk, prometheus_connection, metric, chunk_start, chunk_end,
+                                   retries): (metric, chunk_start, chunk_end)
+                   for metric in metrics for chunk_start, chunk_end in chunks}
+        num_queries = len(futures)
+        for future in as_completed(futures):
+            # Forget every chunk once written, so only the chunks in flight are held in memory
+            metric, chunk_start, chunk_end = futures.pop(future)
+            try:
+                _write_series(series_file, future.result(), label_keys)
+            except Exception as e:
+                failed += 1
+                wls_logger.G_LOGGER.error(f"Could not dump {metric} from {chunk_start} to {chunk_end}: {e}")
 
-    metrics = prometheus_connection.custom_query_range(query, start_time=start_time,
-                                                       end_time=finish_time, step="1s")
+    with open(series_file_name, 'r') as series_file, open(out_file_name, 'w', newline='') as out_file:
+        _write_columns(series_file, out_file, label_keys)
+    os.remove(series_file_name)
 
-    with open("/wls/prometheus_data.json", "w") as out_file:
-        json.dump(metrics, out_file)
+    wls_logger.G_LOGGER.info(f"Prometheus data saved to {out_file_name}. "
+                             f"{num_queries - failed}/{num_queries} queries succeeded")
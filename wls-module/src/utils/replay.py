@@ -0,0 +1,161 @@
+# Python Imports
+import json
+import heapq
+
+# Project Imports
+from src.utils import wls_logger
+
+""" Globals """
+# Messages logs are written in completion order, so records can be this late with respect to
+# the injection order
+G_DEFAULT_REORDER_WINDOW_S = 10
+G_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _iter_json_object(trace_file):
+    """ Yield the values of a JSON object, like messages.json, without loading it whole """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = trace_file.read(G_READ_CHUNK_SIZE)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    def decode():
+        # The decoder needs the whole value in the buffer, so read more until it parses
+        nonlocal pos
+        while True:
+            try:
+                value, pos = decoder.raw_decode(buffer, pos)
+                return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+
+    while True:
+        skip(' \t\r\n,' if started else ' \t\r\n')
+        if pos == len(buffer):
+            raise ValueError('Unexpected end of the trace')
+        if not started:
+            if buffer[pos] != '{':
+                raise ValueError('The trace is not a JSON object')
+            pos += 1
+            started = True
+            continue
+        if buffer[pos] == '}':
+            return
+        decode()
+        skip(' \t\r\n')
+        if pos == len(buffer) or buffer[pos] != ':':
+            raise ValueError('Malformed JSON object in the trace')
+        pos += 1
+        skip(' \t\r\n')
+        yield decode()
+
+
+def _iter_ndjson(trace_file):
+    for line in trace_file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_trace_records(trace_path):
+    """ Yield the records of a trace as they are read: a messages.json dictionary if the file ends
+    in .json, one JSON record per line otherwise (messages.ndjson or an external trace) """
+    with open(trace_path, 'r') as trace_file:
+        records = _iter_json_object(trace_file) if trace_path.endswith('.json') else _iter_ndjson(trace_file)
+        yield from records
+
+
+def reorder_records(records, window_s=G_DEFAULT_REORDER_WINDOW_S):
+    """ Yield the records sorted by ts, holding at most window_s worth of them in a heap. A record
+    that shows up later than that is yielded as soon as it is read, and counted as late """
+    window_ns = window_s * 1e9
+    heap = []
+    newest_ts = None
+    last_ts = None
+    late = 0
+
+    def pop():
+        nonlocal last_ts, late
+        ts, _, record = heapq.heappop(heap)
+        if last_ts is not None and ts < last_ts:
+            late += 1
+        else:
+            last_ts = ts
+        return record
+
+    for seq, record in enumerate(records):
+        # The sequence number keeps the order of equal timestamps and avoids comparing records
+        heapq.heappush(heap, (record['ts'], seq, record))
+        newest_ts = record['ts'] if newest_ts is None else max(newest_ts, record['ts'])
+        while heap[0][0] <= newest_ts - window_ns:
+            yield pop()
+
+    while heap:
+        yield pop()
+
+    if late:
+        wls_logger.G_LOGGER.warning(f"{late} trace records were more than {window_s} s out of order "
+                                    f"and were replayed late")
+
+
+class EmitterResolver:
+    """ Maps the emitter of a trace record to the name of a node of the topology. Records name
+    their emitter, older messages logs only have the address they were injected through. """
+
+    def __init__(self, nodes, get_address):
+        self._nodes = nodes
+        self._names_by_address = {}
+        for node, node_info in nodes.items():
+            try:
+                self._names_by_address[get_address(node, node_info)] = node
+            except KeyError:
+                continue
+        self.unknown = 0
+
+    def resolve(self, record):
+        emitter = record.get('emitter')
+        if emitter is None:
+            emitter = self._names_by_address.get(record.get('injection_point'))
+        if emitter not in self._nodes:
+            self.unknown += 1
+            return None
+
+        return emitter
+
+
+def iter_replay_messages(trace_path, nodes, get_address, window_s=G_DEFAULT_REORDER_WINDOW_S):
+    """ Yield (deadline, emitter, topic, payload_size) for every record of the trace, with the
+    deadline in seconds relative to the first message. Records whose emitter is not in the
+    topology are skipped. """
+    resolver = EmitterResolver(nodes, get_address)
+    first_ts = None
+    for record in reorder_records(iter_trace_records(trace_path), window_s):
+        emitter = resolver.resolve(record)
+        if emitter is None:
+            continue
+        if first_ts is None:
+            first_ts = record['ts']
+        # Records replayed late are sent right away
+        yield max(record['ts'] - first_ts, 0) / 1e9, emitter, record['topic'], record['payload_size']
+
+    if resolver.unknown:
+        wls_logger.G_LOGGER.warning(f"Skipped {resolver.unknown} trace records of emitters that are "
+                                    f"not in the topology")
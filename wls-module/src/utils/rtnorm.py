@@ -14,8 +14,8 @@ Update on 11/27/2014: Added `erf` fallback implementation for missing
 @author: Christoph Lassner
 """
 
-from numpy.random import uniform as rand, normal as randn, randint as randi
-from numpy import sqrt, pi, exp, log, floor, array
+from numpy.random import uniform as rand, normal as randn, randint as randi, default_rng
+from numpy import sqrt, pi, exp, log, floor, array, empty
 try:
   from scipy.special import erf
 except:
@@ -35,7 +35,7 @@ except:
       x = math.erf(x) # Calculate the erf for this value
     return output
 
-def rtnorm(a, b, mu=0., sigma=1., size=1, probabilities=False):
+def rtnorm(a, b, mu=0., sigma=1., size=1, probabilities=False, rng=None):
     r"""
     Pseudorandom numbers from a truncated Gaussian distribution.
 
@@ -93,7 +93,7 @@ def rtnorm(a, b, mu=0., sigma=1., size=1, probabilities=False):
         b = (b-mu) / sigma
 
     # Generate the random variables
-    r = array([rtstdnorm(a, b) for x in range(size)])
+    r = array([rtstdnorm(a, b, rng) for x in range(size)])
 
     # Scaling
     if not mu == 0. or not sigma == 1.:
@@ -109,11 +109,61 @@ def rtnorm(a, b, mu=0., sigma=1., size=1, probabilities=False):
         return r
 
 
-def rtstdnorm(a, b):
+# Below this acceptance rate plain rejection of normal draws wastes too many samples and
+# rtnorm_batch falls back to Chopin's algorithm
+G_MIN_BATCH_ACCEPTANCE = 0.1
+
+
+def rtnorm_batch(a, b, mu=0., sigma=1., size=1, rng=None):
+    r"""
+    Vectorized pseudorandom numbers from a normal distribution with mean MU
+    and standard deviation SIGMA truncated to the interval [a, b].
+
+    Draws normal samples in bulk with NumPy and rejects the ones outside of
+    [a, b], which is much faster than rtnorm for large sizes as long as the
+    interval holds a reasonable share of the probability mass. Otherwise it
+    falls back to rtnorm. The optional rng (a numpy.random.Generator) makes
+    the draws reproducible, in the fallback too.
+    """
+    mu = float(mu)
+    sigma = float(sigma)
+    a = float(a)
+    b = float(b)
+
+    if a >= b:
+        raise Exception('For a truncated ndst in [a,b] b must be greater than a.')
+
+    # Probability mass of [a, b] is the expected acceptance rate
+    acceptance = (erf((b-mu)/sigma/sqrt(2)) - erf((a-mu)/sigma/sqrt(2))) / 2
+    if rng is None:
+        rng = default_rng()
+
+    if acceptance < G_MIN_BATCH_ACCEPTANCE:
+        return rtnorm(a, b, mu=mu, sigma=sigma, size=size, rng=rng)
+
+    r = empty(size)
+    filled = 0
+    while filled < size:
+        # Oversample by the expected acceptance rate so a single pass is usually enough
+        draws = rng.normal(mu, sigma, size=int((size - filled) / acceptance * 1.1) + 16)
+        draws = draws[(draws >= a) & (draws <= b)][:size - filled]
+        r[filled:filled + len(draws)] = draws
+        filled += len(draws)
+
+    return r
+
+
+def rtstdnorm(a, b, rng=None):
     r"""
     RTNORM    Pseudorandom numbers from a truncated (normalized) Gaussian
-    distribution (i.e. rtnorm(a,b,0,1)).
+    distribution (i.e. rtnorm(a,b,0,1)). Draws from the optional rng (a
+    numpy.random.Generator), or from the global numpy random state.
     """
+    if rng is None:
+        uniform, normal, integers = rand, randn, randi
+    else:
+        uniform, normal, integers = rng.uniform, rng.normal, rng.integers
+
     # Left and right limits
     xmin = -2.00443204036
     xmax = 3.48672170399
@@ -123,7 +173,7 @@ def rtstdnorm(a, b):
         raise Exception('For a truncated ndst in [a,b] b must be greater than a.')
     # Check if |a| < |b|
     elif abs(a) > abs(b):
-        r = -rtstdnorm(-b, -a)
+        r = -rtstdnorm(-b, -a, rng)
     # If a in the right tail (a > xmax), use rejection algorithm with
     # a truncated exponential proposal
     elif a > xmax:
@@ -135,8 +185,8 @@ def rtstdnorm(a, b):
             # uniformly distributed in (0, 1). The numpy version includes
             # the left border of the interval, so the numbers are drawn from
             # [0, 1). Hence use a low lower border.
-            z = log(1 + rand(low=1E-15)*expab)
-            e = -log(rand(low=1E-15))
+            z = log(1 + uniform(low=1E-15)*expab)
+            e = -log(uniform(low=1E-15))
             stop = (twoasq*e > z ** 2)
         r = a - z/a
     # If a in the left tail (a < xmin), use rejection algorithm with
@@ -144,7 +194,7 @@ def rtstdnorm(a, b):
     elif a < xmin:
         stop = False
         while not stop:
-            r = randn()
+            r = normal()
             stop = (r>=a) and (r<=b)
     # In other cases (xmin < a < xmax), use Chopin's algorithm
     else:
@@ -173,8 +223,8 @@ def rtstdnorm(a, b):
             twoasq = 2 * a**2
             expab = exp(-a*(b-a)) - 1
             while not stop:
-                z = log( 1 + rand()*expab )
-                e = -log(rand())
+                z = log( 1 + uniform()*expab )
+                e = -log(uniform())
                 stop = (twoasq*e > z**2)
             r = a - z/a
             return r
@@ -182,12 +232,12 @@ def rtstdnorm(a, b):
             # Sample integer between ka and kb
             # Note that while matlab randi has including border, for numpy the high
             # border is exclusive. Hence add one.
-            k = randi(low=ka, high=(kb+1))      # not: +1 due to index offset in Matlab
+            k = integers(low=ka, high=(kb+1))      # not: +1 due to index offset in Matlab
             if k == N:
                 # Right tail
                 lbound = x[-1]
-                z = -log(rand())
-                e = -log(rand())
+                z = -log(uniform())
+                e = -log(uniform())
                 z = z / lbound
                 if (z**2 <= 2*e) and (z < b-lbound):
                     # Accept this proposition, otherwise reject
@@ -195,10 +245,10 @@ def rtstdnorm(a, b):
                     return r
             elif (k<=ka+2) or (k>=kb and b<xmax):
                 # Two leftmost and rightmost regions
-                sim = x[k] + (x[k+1]-x[k]) * rand()
+                sim = x[k] + (x[k+1]-x[k]) * uniform()
                 if (sim >= a) and (sim <= b):
                     # Accept this proposition, otherwise reject
-                    simy = yu[k]*rand()
+                    simy = yu[k]*uniform()
 
                     # Compute y_l from y_k
                     if k == 0:
@@ -215,7 +265,7 @@ def rtstdnorm(a, b):
                         return r
             else:
                 # All the other boxes
-                u = rand()
+                u = uniform()
                 simy = yu[k] * u
                 d = x[k+1] - x[k]
 
@@ -232,7 +282,7 @@ def rtstdnorm(a, b):
                 if simy < ylk:  # That's what happens most of the time
                     r = x[k] + u*d*yu[k]/ylk
                     return r
-                sim = x[k] + d * rand()
+                sim = x[k] + d * uniform()
                 # Otherwise, check you're below the pdf curve
                 if sim**2 + 2*log(simy) + ALPHA < 0:
                     r = sim
@@ -0,0 +1,113 @@
+# Python Imports
+import json
+
+# Project Imports
+from src.utils import wls_logger
+
+""" Globals """
+G_DEFAULT_SATURATION_CONFIG = {
+    # Rate of the first step and maximum rate to try, in msg/s
+    'start_rate': 10,
+    'max_rate': 10000,
+    # linear: add rate_step msg/s per step. exponential: multiply the rate by rate_step per step
+    'ramp': 'exponential',
+    'rate_step': 2,
+    # Duration of every step in seconds
+    'step_time': 30,
+    # A step is sustainable if none of these thresholds is exceeded
+    'max_latency_ms': 1000,
+    'latency_percentile': 99,
+    'max_error_rate': 0.01,
+    # Number of bisection steps between the last sustainable and the first unsustainable rate
+    'backoff_steps': 3,
+}
+G_SATURATION_FILE = './saturation.json'
+
+
+def get_saturation_config(wls_config):
+    saturation_config = dict(G_DEFAULT_SATURATION_CONFIG)
+    saturation_config.update(wls_config.get('saturation', {}))
+
+    if saturation_config['ramp'] not in ('linear', 'exponential'):
+        wls_logger.G_LOGGER.error(f"Unknown saturation ramp {saturation_config['ramp']}")
+        raise ValueError('Unknown saturation ramp %s' % saturation_config['ramp'])
+
+    return saturation_config
+
+
+def _percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0
+
+    return sorted_values[min(int(len(sorted_values) * percentile / 100), len(sorted_values) - 1)]
+
+
+def evaluate_step(rate, msgs_dict, stats, saturation_config):
+    """ Summarise a step and decide if the network sustained its rate """
+    latencies = sorted(msg['injection_time'] for msg in msgs_dict.values() if msg['status'] == 200)
+    # Dropped messages and failed requests both count as errors
+    attempted = stats['num_msgs'] + stats['dropped']
+    error_rate = 1 - len(latencies) / attempted if attempted > 0 else 0
+    latency = _percentile(latencies, saturation_config['latency_percentile'])
+
+    sustainable = error_rate <= saturation_config['max_error_rate'] and \
+        latency <= saturation_config['max_latency_ms']
+
+    return {'rate': rate, 'achieved_rate': stats['achieved_rate'], 'messages': attempted,
+            'error_rate': error_rate, 'latency_ms': latency, 'sustainable': sustainable}
+
+
+class SaturationSearch:
+    """ Ramps the injection rate up until a step is not sustainable, then bisects between the last
+    sustainable rate and that one to get closer to the knee """
+
+    def __init__(self, saturation_config):
+        self._config = saturation_config
+        self._rate = saturation_config['start_rate']
+        self._backoff_steps = saturation_config['backoff_steps']
+        self._ramping = True
+        self._done = False
+        self.max_sustainable_rate = None
+        self.first_unsustainable_rate = None
+
+    def next_rate(self):
+        """ Rate of the next step, or None when the search is over """
+        if self._done:
+            return None
+
+        return self._rate
+
+    def _ramp_up(self):
+        if self._config['ramp'] == 'linear':
+            return self._rate + self._config['rate_step']
+
+        return self._rate * self._config['rate_step']
+
+    def record(self, rate, sustainable):
+        if sustainable:
+            self.max_sustainable_rate = rate
+        else:
+            self.first_unsustainable_rate = rate
+
+        if self._ramping and sustainable:
+            self._rate = self._ramp_up()
+            self._done = self._rate > self._config['max_rate']
+            return
+
+        # Past the knee: bisect between the best sustainable and the worst unsustainable rates
+        self._ramping = False
+        if self.max_sustainable_rate is None or self._backoff_steps <= 0:
+            self._done = True
+            return
+
+        self._backoff_steps -= 1
+        self._rate = (self.max_sustainable_rate + self.first_unsustainable_rate) / 2
+        # Not worth splitting hairs below 1 msg/s
+        self._done = self.first_unsustainable_rate - self.max_sustainable_rate < 1
+
+
+def save_saturation_report(report):
+    with open(G_SATURATION_FILE, 'w') as f:
+        f.write(json.dumps(report, indent=4))
+
+    wls_logger.G_LOGGER.info(f"Saturation report saved to {G_SATURATION_FILE}")
@@ -0,0 +1,51 @@
+# Python Imports
+import sys
+import math
+import itertools
+
+# Project Imports
+from src.utils import wls_logger
+from src.utils import waku_messaging
+
+
+def _uniform_deadlines(msg_rate, simulation_time, start_time=0):
+    # Compute every deadline from its index so rounding errors do not accumulate
+    num_msgs = int(msg_rate * simulation_time)
+    for i in range(math.ceil(msg_rate * start_time), num_msgs):
+        yield i / msg_rate
+
+
+def _poisson_deadlines(msg_rate, simulation_time, start_time=0):
+    deadline = float(start_time)
+    while deadline < simulation_time:
+        yield deadline
+        deadline += waku_messaging._poisson_interval(msg_rate)
+
+
+def _poisson_unit_arrivals():
+    arrival = 0.0
+    while True:
+        yield arrival
+        arrival += waku_messaging._poisson_interval(1)
+
+
+def get_send_deadlines(inter_msg_type, msg_rate, simulation_time, rate_schedule=None, start_time=0):
+    """ Return the absolute send deadlines (seconds from the injection start) of the simulation,
+    from start_time on. Deadlines do not depend on when the previous message was actually sent,
+    so the achieved rate does not drift when the injection loop falls behind. With a
+    traffic.RateSchedule the rate follows the schedule instead of being constant. """
+    if rate_schedule is not None and inter_msg_type == 'poisson':
+        return rate_schedule.warp(_poisson_unit_arrivals(), start_time)
+
+    if rate_schedule is not None and inter_msg_type == 'uniform':
+        return rate_schedule.warp(itertools.count(), start_time)
+
+    if inter_msg_type == 'poisson':
+        return _poisson_deadlines(msg_rate, simulation_time, start_time)
+
+    if inter_msg_type == 'uniform':
+        return _uniform_deadlines(msg_rate, simulation_time, start_time)
+
+    wls_logger.G_LOGGER.error(f'{inter_msg_type} is not a valid inter_msg_type. Aborting.')
+    sys.exit(1)
+
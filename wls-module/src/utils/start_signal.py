@@ -0,0 +1,62 @@
+# Python Imports
+import os
+import time
+import select
+
+# Project Imports
+from src.utils import wls_logger
+
+""" Globals """
+G_START_FIFO = '/wls/start.fifo'
+# Legacy signal, still honoured for signallers that just touch it
+G_START_SIGNAL_FILE = '/wls/start.signal'
+G_SIGNAL_FILE_POLL_S = 1
+
+
+def create_start_fifo(fifo_path=G_START_FIFO):
+    """ Create the FIFO the start signal is written to. Returns its file descriptor, or None if it
+    cannot be created, in which case only the signal file is watched """
+    try:
+        if os.path.exists(fifo_path):
+            os.remove(fifo_path)
+        os.mkfifo(fifo_path)
+        # Opened read-write so there is always a writer, and select() only wakes up on data
+        return os.open(fifo_path, os.O_RDWR | os.O_NONBLOCK)
+    except OSError as e:
+        wls_logger.G_LOGGER.warning(f"Could not create the start FIFO {fifo_path}: {e}. "
+                                    f"Falling back to polling {G_START_SIGNAL_FILE}")
+        return None
+
+
+def _parse_sent_time(data):
+    # Signallers may write the time they sent the signal, to measure how long it took to arrive
+    try:
+        return float(data.decode().split()[0])
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None
+
+
+def wait_for_start_signal(fifo_fd, signal_file=G_START_SIGNAL_FILE):
+    """ Block until the start signal is written to the FIFO or the signal file shows up.
+    Returns the time the signal arrived and the time it was sent, or None if unknown """
+    while True:
+        if os.path.exists(signal_file):
+            return time.time(), None
+
+        if fifo_fd is None:
+            time.sleep(G_SIGNAL_FILE_POLL_S)
+            continue
+
+        # Wake up now and then to look for the signal file too
+        readable, _, _ = select.select([fifo_fd], [], [], G_SIGNAL_FILE_POLL_S)
+        if readable:
+            received_time = time.time()
+            return received_time, _parse_sent_time(os.read(fifo_fd, 64))
+
+
+def remove_start_signal(fifo_fd, fifo_path=G_START_FIFO, signal_file=G_START_SIGNAL_FILE):
+    if fifo_fd is not None:
+        os.close(fifo_fd)
+    for path in (fifo_path, signal_file):
+        if os.path.exists(path):
+            os.remove(path)
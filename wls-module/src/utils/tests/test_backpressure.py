@@ -0,0 +1,115 @@
+# Python Imports
+import asyncio
+import unittest
+
+# Project Imports
+from src.utils import backpressure
+
+
+class TestBackpressure(unittest.IsolatedAsyncioTestCase):
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            backpressure.InFlightLimiter(policy='test')
+
+    async def test_admit_unbounded(self):
+        limiter = backpressure.InFlightLimiter(max_in_flight=0)
+        for _ in range(100):
+            self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+        self.assertEqual(limiter.in_flight, 100)
+
+    async def test_admit_drop(self):
+        limiter = backpressure.InFlightLimiter(max_in_flight=2, policy='drop')
+        self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+        self.assertEqual(await limiter.admit('b'), backpressure.G_ADMITTED)
+        self.assertEqual(await limiter.admit('a'), backpressure.G_DROPPED)
+
+        await limiter.release('a')
+        self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+        self.assertEqual(limiter.counters, {'admitted': 3, 'blocked': 0, 'queued': 0, 'dropped': 1})
+
+    async def test_admit_drop_per_emitter(self):
+        limiter = backpressure.InFlightLimiter(max_in_flight=0, max_in_flight_per_emitter=1,
+                                               policy='drop')
+        self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+        self.assertEqual(await limiter.admit('a'), backpressure.G_DROPPED)
+        self.assertEqual(await limiter.admit('b'), backpressure.G_ADMITTED)
+
+    async def test_admit_queue(self):
+        limiter = backpressure.InFlightLimiter(max_in_flight=1, policy='queue', max_queued=1)
+        self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+        self.assertEqual(await limiter.admit('a'), backpressure.G_QUEUED)
+        self.assertEqual(await limiter.admit('a'), backpressure.G_DROPPED)
+
+        waiter = asyncio.create_task(limiter.wait_for_slot('a'))
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+
+        await limiter.release('a')
+        await asyncio.wait_for(waiter, 1)
+        self.assertEqual(limiter.in_flight, 1)
+        self.assertEqual(limiter.counters, {'admitted': 1, 'blocked': 0, 'queued': 1, 'dropped': 1})
+
+    async def test_admit_block(self):
+        limiter = backpressure.InFlightLimiter(max_in_flight=1, policy='block')
+        self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+
+        blocked = asyncio.create_task(limiter.admit('b'))
+        await asyncio.sleep(0)
+        self.assertFalse(blocked.done())
+
+        await limiter.release('a')
+        self.assertEqual(await asyncio.wait_for(blocked, 1), backpressure.G_ADMITTED)
+        self.assertEqual(limiter.counters, {'admitted': 1, 'blocked': 1, 'queued': 0, 'dropped': 0})
+
+    async def test_admit_queue_fifo(self):
+        limiter = backpressure.InFlightLimiter(max_in_flight=1, policy='queue', max_queued=2)
+        self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+        self.assertEqual(await limiter.admit('b'), backpressure.G_QUEUED)
+        self.assertEqual(await limiter.admit('c'), backpressure.G_QUEUED)
+
+        # The released slot goes to the oldest queued message, even before its task waits for it
+        await limiter.release('a')
+        self.assertEqual(await limiter.admit('d'), backpressure.G_DROPPED)
+
+        order = []
+
+        async def wait(emitter):
+            await limiter.wait_for_slot(emitter)
+            order.append(emitter)
+            await limiter.release(emitter)
+
+        waiters = [asyncio.create_task(wait('c')), asyncio.create_task(wait('b'))]
+        await asyncio.wait_for(asyncio.gather(*waiters), 1)
+        self.assertEqual(order, ['b', 'c'])
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_admit_block_fifo(self):
+        limiter = backpressure.InFlightLimiter(max_in_flight=1, policy='block')
+        self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+
+        blocked = asyncio.create_task(limiter.admit('b'))
+        await asyncio.sleep(0)
+
+        # A new message does not take the slot the blocked one is waiting for
+        await limiter.release('a')
+        late = asyncio.create_task(limiter.admit('c'))
+        await asyncio.sleep(0)
+        self.assertTrue(blocked.done())
+        self.assertFalse(late.done())
+
+        await limiter.release('b')
+        self.assertEqual(await asyncio.wait_for(late, 1), backpressure.G_ADMITTED)
+
+    async def test_admit_queue_per_emitter(self):
+        # A waiter at its emitter cap does not hold up the other emitters
+        limiter = backpressure.InFlightLimiter(max_in_flight=2, max_in_flight_per_emitter=1, policy='queue')
+        self.assertEqual(await limiter.admit('a'), backpressure.G_ADMITTED)
+        self.assertEqual(await limiter.admit('a'), backpressure.G_QUEUED)
+        self.assertEqual(await limiter.admit('b'), backpressure.G_ADMITTED)
+
+    def test_create_limiter(self):
+        limiter = backpressure.create_limiter({'max_in_flight': 5, 'backpressure_policy': 'queue'})
+        self.assertEqual(limiter._max_in_flight, 5)
+        self.assertEqual(limiter._max_queued, 5)
+        self.assertEqual(limiter._policy, 'queue')
@@ -0,0 +1,76 @@
+# Python Imports
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+
+# Project Imports
+from src.utils import control
+
+
+class TestControl(unittest.IsolatedAsyncioTestCase):
+
+    def test_get_control_socket_path(self):
+        self.assertEqual(control.get_control_socket_path({}), control.G_DEFAULT_CONTROL_SOCKET)
+        self.assertEqual(control.get_control_socket_path({'control_socket': '/tmp/c.sock'}, 2),
+                         '/tmp/c.sock.2')
+        self.assertIsNone(control.get_control_socket_path({'control_socket': ''}))
+
+    async def test_execute(self):
+        injection_control = control.InjectionControl(10, 'uniform', 'poisson')
+
+        response = injection_control.execute('rate 20.5')
+        self.assertEqual(response['status']['rate'], 20.5)
+        injection_control.execute('dist gaussian')
+        injection_control.execute('inter uniform')
+        injection_control.execute('pause')
+        self.assertEqual(injection_control.status(),
+                         {'rate': 20.5, 'dist_type': 'gaussian', 'inter_msg_type': 'uniform',
+                          'paused': True, 'stopped': False, 'num_msgs': 0})
+        self.assertEqual(injection_control.version, 4)
+
+        injection_control.execute('resume')
+        injection_control.execute('stop')
+        self.assertFalse(injection_control.paused)
+        self.assertTrue(injection_control.stopped)
+
+    async def test_execute_error(self):
+        injection_control = control.InjectionControl(10, 'uniform')
+        for command_line in ('rate 0', 'rate a', 'dist test', 'inter test', 'pause now', 'test'):
+            with self.assertRaises(ValueError):
+                injection_control.execute(command_line)
+        self.assertEqual(injection_control.version, 0)
+
+    async def test_sleep_wakes_up_on_change(self):
+        injection_control = control.InjectionControl(10, 'uniform')
+        asyncio.get_running_loop().call_later(0.05, injection_control.pause)
+
+        start = time.monotonic()
+        await injection_control.sleep(5)
+        self.assertLess(time.monotonic() - start, 1)
+
+    async def test_wait_resumed_timeout(self):
+        injection_control = control.InjectionControl(10, 'uniform')
+        self.assertTrue(await injection_control.wait_resumed(0.01))
+
+        injection_control.pause()
+        self.assertFalse(await injection_control.wait_resumed(0.01))
+        asyncio.get_running_loop().call_later(0.01, injection_control.resume)
+        self.assertTrue(await injection_control.wait_resumed(5))
+
+    async def test_control_server(self):
+        injection_control = control.InjectionControl(10, 'uniform')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'control.sock')
+            server = await control.start_control_server(injection_control, path)
+
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, control.send_command, path, 'rate 5')
+            self.assertEqual(response, {'ok': True, 'status': injection_control.status()})
+            response = await loop.run_in_executor(None, control.send_command, path, 'test')
+            self.assertFalse(response['ok'])
+
+            await control.close_control_server(server, path)
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(injection_control.rate, 5)
@@ -0,0 +1,63 @@
+# Python Imports
+import unittest
+import random
+from collections import Counter
+
+# Project Imports
+from src.utils import emitters
+from src.utils import waku_messaging
+
+
+class TestEmitters(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+        self.emitters = {"test1": {"ip_address": 1, "ports": {"rpc-test1": (2, "tcp")},
+                                   "topics": ["test1a", "test1b"]},
+                         "test2": {"ip_address": 5, "ports": {"rpc-test2": (6, "tcp")},
+                                   "topics": ["test2a"]}}
+
+    def test_alias_table_uniform(self):
+        table = emitters.AliasTable(4)
+        counts = Counter(table.sample() for _ in range(4000))
+        self.assertEqual(sorted(counts), [0, 1, 2, 3])
+        for count in counts.values():
+            self.assertAlmostEqual(count, 1000, delta=150)
+
+    def test_alias_table_weighted(self):
+        table = emitters.AliasTable(3, [1, 3, 0])
+        counts = Counter(table.sample() for _ in range(8000))
+        self.assertEqual(counts[2], 0)
+        self.assertAlmostEqual(counts[0], 2000, delta=200)
+        self.assertAlmostEqual(counts[1], 6000, delta=200)
+
+    def test_alias_table_same_weights(self):
+        table = emitters.AliasTable(3, [2, 2, 2])
+        self.assertEqual(sorted(set(table.sample() for _ in range(300))), [0, 1, 2])
+
+    def test_alias_table_zero_weights(self):
+        with self.assertRaises(ValueError):
+            emitters.AliasTable(3, [0, 0, 0])
+
+    def test_alias_table_empty(self):
+        with self.assertRaises(ValueError):
+            emitters.AliasTable(0)
+
+    def test_emitter_index(self):
+        emitter_index = emitters.EmitterIndex(self.emitters)
+        self.assertEqual(emitter_index.emitters, ["test1", "test2"])
+        self.assertEqual(emitter_index.addresses, ["http://1:2/", "http://5:6/"])
+        self.assertEqual(emitter_index.topics, [["test1a", "test1b"], ["test2a"]])
+
+        selected = {emitter_index.select() for _ in range(100)}
+        self.assertEqual(selected, {("http://1:2/", "test1a"), ("http://1:2/", "test1b"),
+                                    ("http://5:6/", "test2a")})
+
+    def test_create_emitter_index_weighted(self):
+        wls_config = {'traffic_schedule': {'emitter_weights': {'test1': 0}}}
+        emitter_index = emitters.create_emitter_index(self.emitters, wls_config,
+                                                      waku_messaging.JsonRpcTransport(wls_config))
+
+        selected = {emitter_index.select() for _ in range(100)}
+        self.assertEqual(selected, {("http://5:6/", "test2a")})
+
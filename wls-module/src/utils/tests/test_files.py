@@ -33,3 +33,36 @@ class TestFiles(unittest.TestCase):
         with open("messages.json", "r") as f:
             self.assertEqual(json.load(f), msgs_dict)
         os.remove("messages.json")
+
+    def test_messages_writer(self):
+        writer = files.MessagesWriter("messages.ndjson")
+        writer["ab"] = {"nonce": 0}
+        writer["cd"] = {"nonce": 1}
+        self.assertIn("ab", writer)
+        self.assertNotIn("ef", writer)
+        self.assertEqual(len(writer), 2)
+        files.save_messages(writer)
+
+        with open("messages.ndjson", "r") as f:
+            self.assertEqual([json.loads(line) for line in f],
+                             [{"hash": "ab", "nonce": 0}, {"hash": "cd", "nonce": 1}])
+        os.remove("messages.ndjson")
+
+    def test_messages_writer_append_log(self):
+        with open("messages.0.ndjson", "w") as f:
+            f.write(json.dumps({"hash": "ab", "nonce": 0}) + "\n")
+        writer = files.MessagesWriter("messages.ndjson")
+        writer.append_log("messages.0.ndjson")
+        writer["cd"] = {"nonce": 1}
+        self.assertEqual(len(writer), 2)
+        writer.close()
+
+        with open("messages.ndjson", "r") as f:
+            self.assertEqual(len(f.readlines()), 2)
+        os.remove("messages.0.ndjson")
+        os.remove("messages.ndjson")
+
+    def test_create_messages_log(self):
+        self.assertEqual(files.create_messages_log("json"), {})
+        with self.assertRaises(ValueError):
+            files.create_messages_log("test")
@@ -0,0 +1,23 @@
+# Python Imports
+import socket
+import unittest
+import urllib.request
+
+# Project Imports
+from src.utils import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_start_metrics_server(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        metrics.start_metrics_server(port)
+        metrics.G_MESSAGES.labels(status=200).inc()
+
+        body = urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics').read().decode()
+        self.assertIn('wls_messages_total{status="200"}', body)
+        self.assertIn('wls_injection_latency_seconds_bucket', body)
+        self.assertIn('wls_scheduler_lateness_seconds_bucket', body)
@@ -2,6 +2,8 @@
 import unittest
 from unittest.mock import patch
 import random
+import base64
+import numpy as np
 
 # Project Imports
 from src.utils import payloads
@@ -13,6 +15,11 @@ class TestPayloads(unittest.TestCase):
     def setUp(cls):
         random.seed(1)
 
+    def tearDown(self):
+        payloads.G_PAYLOAD_POOL = None
+        payloads.G_PAYLOAD_POOL_BASE64 = None
+        payloads.G_GAUSSIAN_SIZES.clear()
+
     def create_patch(self, name):
         patcher = patch(name)
         thing = patcher.start()
@@ -35,19 +42,71 @@ class TestPayloads(unittest.TestCase):
         print(b"a")
         self.assertEqual(payload, 'Ig==')
 
+    def test_init_payload_pool(self):
+        payloads.init_payload_pool(10, pool_size=100)
+        self.assertEqual(len(payloads.G_PAYLOAD_POOL), 99)
+        self.assertEqual(base64.b64decode(payloads.G_PAYLOAD_POOL_BASE64), payloads.G_PAYLOAD_POOL)
+
+    def test_init_payload_pool_min_size(self):
+        payloads.init_payload_pool(100, pool_size=10)
+        self.assertEqual(len(payloads.G_PAYLOAD_POOL), 198)
+
+    def test_init_payload_pool_reproducible(self):
+        payloads.init_payload_pool(10, pool_size=100)
+        first_pool = payloads.G_PAYLOAD_POOL
+        random.seed(1)
+        payloads.init_payload_pool(10, pool_size=100)
+        self.assertEqual(payloads.G_PAYLOAD_POOL, first_pool)
+
+    def test__make_base64_payload_from_pool(self):
+        payloads.init_payload_pool(10, pool_size=30)
+        for size in range(1, 31):
+            payload = payloads._make_base64_payload(size)
+            random_bytes = base64.b64decode(payload)
+            self.assertEqual(len(random_bytes), size)
+            self.assertIn(random_bytes, payloads.G_PAYLOAD_POOL)
+
+    def test__make_base64_payload_bigger_than_pool(self):
+        payloads.init_payload_pool(10, pool_size=30)
+        payload = payloads._make_base64_payload(64)
+        self.assertEqual(len(base64.b64decode(payload)), 64)
+
     def test__make_uniform_dist(self):
         payload, size = payloads._make_uniform_dist(1, 10)
-        self.assertEqual(payload, '2MM=')
+        self.assertEqual(payload, '8dg=')
         self.assertEqual(size, 2)
 
     def test__make_gaussian_dist(self):
-        mock_rtnorm = self.create_patch('src.utils.rtnorm.rtnorm')
-        mock_rtnorm.return_value = 6
+        mock_rtnorm = self.create_patch('src.utils.rtnorm.rtnorm_batch')
+        mock_rtnorm.return_value = np.array([6.5, 7.2, 4.])
 
         payload, size = payloads._make_gaussian_dist(1, 10)
-        self.assertEqual(payload, 'ItjDQX5z')
+        self.assertEqual(payload, '32rx2GHN')
         self.assertEqual(size, 6)
 
+        payload, size = payloads._make_gaussian_dist(1, 10)
+        self.assertEqual(size, 4)
+        mock_rtnorm.assert_called_once()
+
+    def test__make_gaussian_dist_sizes(self):
+        sizes = [payloads._make_gaussian_dist(2, 1024)[1] for _ in range(5000)]
+        self.assertTrue(all(size % 2 == 0 and 2 <= size <= 1024 for size in sizes))
+        self.assertAlmostEqual(sum(sizes) / len(sizes), 511, delta=15)
+
+    def test__make_gaussian_dist_reproducible(self):
+        sizes = [payloads._make_gaussian_dist(2, 1024)[1] for _ in range(10)]
+        payloads.G_GAUSSIAN_SIZES.clear()
+        random.seed(1)
+        self.assertEqual([payloads._make_gaussian_dist(2, 1024)[1] for _ in range(10)], sizes)
+
+    def test__make_gaussian_dist_reproducible_narrow_range(self):
+        # Too little mass in [1000, 1100] for rejection, rtnorm_batch falls back to rtnorm
+        sizes = [payloads._make_gaussian_dist(1000, 1100)[1] for _ in range(10)]
+        payloads.G_GAUSSIAN_SIZES.clear()
+        random.seed(1)
+        np.random.seed(2)
+        self.assertEqual([payloads._make_gaussian_dist(1000, 1100)[1] for _ in range(10)], sizes)
+
     def test_make_payload_dist_same(self):
         payload, size = payloads.make_payload_dist('test', 1, 1)
         self.assertEqual(payload, 'Ig==')
@@ -55,7 +114,7 @@ class TestPayloads(unittest.TestCase):
 
     def test_make_payload_dist_uniform(self):
         payload, size = payloads.make_payload_dist('uniform', 1, 10)
-        self.assertEqual(payload, '2MM=')
+        self.assertEqual(payload, '8dg=')
         self.assertEqual(size, 2)
 
     def test_make_payload_dist_gaussian(self):
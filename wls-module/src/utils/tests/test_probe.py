@@ -0,0 +1,106 @@
+# Python Imports
+import base64
+import asyncio
+import unittest
+from unittest.mock import patch
+
+# Project Imports
+from src.utils import probe
+from src.utils import waku_messaging
+
+
+def get_payload(nonce, ts):
+    return base64.b64encode(b'{"nonce": %d, "ts": %d, "payload": "dGVzdA=="}' % (nonce, ts)).decode()
+
+
+class TestProbe(unittest.TestCase):
+
+    def create_patch(self, name):
+        patcher = patch(name)
+        thing = patcher.start()
+        self.addCleanup(patcher.stop)
+        return thing
+
+    def setUp(self):
+        self.delivery_probe = probe.DeliveryProbe(waku_messaging.JsonRpcTransport({}),
+                                                  {'http://1:2/': ['t1', 't2'], 'http://3:4/': ['t1']},
+                                                  timeout_s=0)
+
+    def test_select_probe_nodes(self):
+        topology = {'nodes': {f'node_{i}': {'i': i} for i in range(10)}}
+
+        nodes = probe.select_probe_nodes(topology, {'probe_nodes': 3}, 1)
+
+        self.assertEqual(len(nodes), 3)
+        self.assertEqual(nodes, probe.select_probe_nodes(topology, {'probe_nodes': 3}, 1))
+        self.assertEqual(probe.select_probe_nodes(topology, {}, 1), {})
+
+    def test__parse_payload_header(self):
+        self.assertEqual(probe._parse_payload_header(get_payload(12, 345)), (12, 345))
+        self.assertIsNone(probe._parse_payload_header(base64.b64encode(b'test').decode()))
+        self.assertIsNone(probe._parse_payload_header('!'))
+
+    def test_delivery(self):
+        self.delivery_probe.record_sent(1, 't1')
+        self.delivery_probe.record_sent(2, 't2')
+        self.delivery_probe.record_sent(3, 't3')
+        self.delivery_probe.record_received('http://1:2/', get_payload(1, 0), 10 ** 9)
+        self.delivery_probe.record_received('http://1:2/', get_payload(1, 0), 10 ** 9)
+        self.delivery_probe.record_received('http://3:4/', get_payload(2, 0), 10 ** 9)
+        self.delivery_probe.record_received('http://1:2/', get_payload(2, 0), 3 * 10 ** 9)
+
+        self.delivery_probe.report()
+        summary = self.delivery_probe.summary()
+
+        # 1 was expected at both nodes but only reached one, 2 at one node, 3 at none
+        self.assertEqual(summary['probe_expected'], 3)
+        self.assertEqual(summary['probe_delivered'], 2)
+        self.assertEqual(summary['probe_latency_p50_ms'], 3000)
+        self.assertEqual(self.delivery_probe.unmatched, 2)
+
+    def test_discard(self):
+        self.delivery_probe.record_sent(1, 't1')
+        self.delivery_probe.discard(1)
+
+        self.delivery_probe.report()
+
+        self.assertEqual(self.delivery_probe.expected, 0)
+
+    def test_expire_timeout(self):
+        delivery_probe = probe.DeliveryProbe(waku_messaging.JsonRpcTransport({}), {'http://1:2/': ['t1']},
+                                             timeout_s=60)
+        delivery_probe.record_sent(1, 't1')
+
+        delivery_probe.expire()
+
+        self.assertEqual(delivery_probe.expected, 0)
+
+    def test_start_stop(self):
+        mock_request = self.create_patch('src.utils.waku_messaging.request_waku_json_async')
+        mock_request.side_effect = [(200, {'result': True}), (200, {'result': True}),
+                                    (200, {'result': [{'payload': get_payload(1, 0)}]}),
+                                    (200, {'result': []}), (200, {'result': [{'payload': get_payload(1, 0)}]})] + \
+            [(200, {'result': []})] * 100
+        delivery_probe = probe.DeliveryProbe(waku_messaging.JsonRpcTransport({}),
+                                             {'http://1:2/': ['t1', 't2'], 'http://3:4/': ['t1']},
+                                             poll_interval_ms=1, report_s=0, timeout_s=1)
+
+        async def run():
+            await delivery_probe.start({'http://1:2/': 'session1', 'http://3:4/': 'session2'})
+            delivery_probe.record_sent(1, 't1')
+            return await delivery_probe.stop()
+
+        summary = asyncio.run(run())
+
+        self.assertEqual(summary['probe_expected'], 2)
+        self.assertEqual(summary['probe_delivered'], 2)
+        self.assertEqual(mock_request.await_args_list[0].args[1], 'POST')
+
+    def test_create_probe(self):
+        self.assertIsNone(probe.create_probe({}, {}, waku_messaging.JsonRpcTransport({})))
+
+        delivery_probe = probe.create_probe({}, {'node_0': {'ip_address': '1', 'ports': {'rpc-node_0': [2]},
+                                                            'topics': ['t1']}},
+                                            waku_messaging.JsonRpcTransport({}))
+
+        self.assertEqual(delivery_probe.node_topics, {'http://1:2/': ['t1']})
@@ -0,0 +1,70 @@
+# Python Imports
+import csv
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+# Project Imports
+from src.utils import prometheus
+
+
+class TestPrometheus(unittest.TestCase):
+
+    def setUp(self):
+        self.start = datetime(2023, 1, 1)
+        self.config = {'wls': {'prometheus_chunk_s': 10, 'prometheus_query_retries': 1},
+                       'plotting': {'by_node': ['metric_a', 'metric_b']}}
+
+    def test__get_time_chunks(self):
+        chunks = prometheus._get_time_chunks(self.start, self.start + timedelta(seconds=25), 10)
+        self.assertEqual(chunks, [(self.start, self.start + timedelta(seconds=9)),
+                                  (self.start + timedelta(seconds=10), self.start + timedelta(seconds=19)),
+                                  (self.start + timedelta(seconds=20), self.start + timedelta(seconds=25))])
+
+    @patch('time.sleep')
+    def test__query_chunk_retries(self, mock_sleep):
+        connection = MagicMock()
+        connection.custom_query_range.side_effect = [Exception('timeout'), ['series']]
+
+        self.assertEqual(prometheus._query_chunk(connection, 'metric_a', 1, 2, 1), ['series'])
+        self.assertEqual(connection.custom_query_range.call_count, 2)
+
+    @patch('time.sleep')
+    def test__query_chunk_error(self, mock_sleep):
+        connection = MagicMock()
+        connection.custom_query_range.side_effect = Exception('timeout')
+
+        with self.assertRaises(Exception):
+            prometheus._query_chunk(connection, 'metric_a', 1, 2, 1)
+        self.assertEqual(connection.custom_query_range.call_count, 2)
+
+    @patch('time.sleep')
+    @patch('src.utils.prometheus.connect_to_prometheus')
+    def test_dump_prometheus(self, mock_connect, mock_sleep):
+        def query_range(query, start_time, end_time, step):
+            if 'metric_b' in query and start_time != self.start:
+                raise Exception('timeout')
+            name = query.split('"')[1]
+            labels = {'__name__': name, 'instance': 'node_0'}
+            if name == 'metric_b':
+                labels['job'] = 'cadvisor'
+            return [{'metric': labels, 'values': [[start_time.timestamp(), '1']]}]
+        mock_connect.return_value.custom_query_range.side_effect = query_range
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_file_name = os.path.join(tmp_dir, 'prometheus_data.csv')
+            prometheus.dump_prometheus(self.config, 'ip', 'port', self.start,
+                                       self.start + timedelta(seconds=15), out_file_name)
+
+            with open(out_file_name, newline='') as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(os.listdir(tmp_dir), ['prometheus_data.csv'])
+
+        # One column per label key of any series
+        self.assertEqual(rows[0], ['metric', 'instance', 'job', 'timestamp', 'value'])
+        # The second chunk of metric_b fails every retry and is skipped
+        self.assertEqual(sorted(row[:3] for row in rows[1:]), [['metric_a', 'node_0', ''],
+                                                               ['metric_a', 'node_0', ''],
+                                                               ['metric_b', 'node_0', 'cadvisor']])
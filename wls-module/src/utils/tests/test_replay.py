@@ -0,0 +1,82 @@
+# Python Imports
+import io
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Project Imports
+from src.utils import replay
+from src.utils import waku_messaging
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = {'node_0': {'ip_address': '1', 'ports': {'rpc-node_0': [2, 'tcp']}},
+                      'node_1': {'ip_address': '3', 'ports': {'rpc-node_1': [4, 'tcp']}}}
+        self.msgs = {'a': {'ts': 3000000000, 'emitter': 'node_1', 'topic': 't2', 'payload_size': 20},
+                     'b': {'ts': 1000000000, 'emitter': 'node_0', 'topic': 't1', 'payload_size': 10},
+                     'c': {'ts': 2000000000, 'injection_point': 'http://3:4/', 'topic': 't3',
+                           'payload_size': 30}}
+
+    def write_trace(self, suffix, content):
+        trace_file = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False)
+        self.addCleanup(os.remove, trace_file.name)
+        trace_file.write(content)
+        trace_file.close()
+
+        return trace_file.name
+
+    def test__iter_json_object(self):
+        with patch('src.utils.replay.G_READ_CHUNK_SIZE', 7):
+            records = list(replay._iter_json_object(io.StringIO(json.dumps(self.msgs, indent=4))))
+
+        self.assertEqual(records, list(self.msgs.values()))
+
+    def test__iter_json_object_empty(self):
+        self.assertEqual(list(replay._iter_json_object(io.StringIO(' {} '))), [])
+
+    def test__iter_json_object_error(self):
+        with self.assertRaises(ValueError):
+            list(replay._iter_json_object(io.StringIO('[]')))
+        with self.assertRaises(ValueError):
+            list(replay._iter_json_object(io.StringIO('{"a": {}')))
+
+    def test_iter_trace_records_ndjson(self):
+        trace = self.write_trace('.ndjson', ''.join(json.dumps({'hash': msg_hash, **msg}) + '\n\n'
+                                                    for msg_hash, msg in self.msgs.items()))
+
+        records = list(replay.iter_trace_records(trace))
+
+        self.assertEqual([record['hash'] for record in records], ['a', 'b', 'c'])
+
+    def test_reorder_records(self):
+        records = [{'ts': ts * 1e9} for ts in (3, 1, 2, 20, 4, 21)]
+
+        with patch('src.utils.replay.wls_logger.G_LOGGER') as mock_logger:
+            ordered = [record['ts'] / 1e9 for record in replay.reorder_records(records, window_s=10)]
+
+        # 4 shows up after 20, but within the window of it
+        self.assertEqual(ordered, [1, 2, 3, 4, 20, 21])
+        mock_logger.warning.assert_not_called()
+
+    def test_reorder_records_late(self):
+        records = [{'ts': ts * 1e9} for ts in (1, 20, 30, 2)]
+
+        with patch('src.utils.replay.wls_logger.G_LOGGER') as mock_logger:
+            ordered = [record['ts'] / 1e9 for record in replay.reorder_records(records, window_s=10)]
+
+        # 20 is already out by the time 2 shows up
+        self.assertEqual(ordered, [1, 20, 2, 30])
+        mock_logger.warning.assert_called_once()
+
+    def test_iter_replay_messages(self):
+        self.msgs['d'] = {'ts': 2500000000, 'emitter': 'node_9', 'topic': 't4', 'payload_size': 40}
+        trace = self.write_trace('.json', json.dumps(self.msgs))
+
+        messages = list(replay.iter_replay_messages(trace, self.nodes,
+                                                    waku_messaging.JsonRpcTransport.get_node_address))
+
+        self.assertEqual(messages, [(0, 'node_0', 't1', 10), (1, 'node_1', 't3', 30), (2, 'node_1', 't2', 20)])
@@ -0,0 +1,74 @@
+# Python Imports
+import unittest
+
+# Project Imports
+from src.utils import saturation
+
+
+class TestSaturation(unittest.TestCase):
+
+    def test_get_saturation_config(self):
+        config = saturation.get_saturation_config({'saturation': {'start_rate': 5}})
+        self.assertEqual(config['start_rate'], 5)
+        self.assertEqual(config['ramp'], saturation.G_DEFAULT_SATURATION_CONFIG['ramp'])
+
+    def test_get_saturation_config_error(self):
+        with self.assertRaises(ValueError):
+            saturation.get_saturation_config({'saturation': {'ramp': 'test'}})
+
+    def test_evaluate_step(self):
+        config = saturation.get_saturation_config({'saturation': {'max_latency_ms': 50,
+                                                                  'max_error_rate': 0.3}})
+        msgs_dict = {'a': {'status': 200, 'injection_time': 10},
+                     'b': {'status': 200, 'injection_time': 40},
+                     'c': {'status': 500, 'injection_time': 100}}
+        stats = {'num_msgs': 3, 'dropped': 1, 'achieved_rate': 3}
+
+        step = saturation.evaluate_step(4, msgs_dict, stats, config)
+        self.assertEqual(step['messages'], 4)
+        self.assertEqual(step['error_rate'], 0.5)
+        self.assertEqual(step['latency_ms'], 40)
+        self.assertFalse(step['sustainable'])
+
+    def test_evaluate_step_sustainable(self):
+        config = saturation.get_saturation_config({'saturation': {'max_latency_ms': 50}})
+        msgs_dict = {'a': {'status': 200, 'injection_time': 10}}
+        stats = {'num_msgs': 1, 'dropped': 0, 'achieved_rate': 1}
+
+        self.assertTrue(saturation.evaluate_step(1, msgs_dict, stats, config)['sustainable'])
+
+    def run_search(self, config, capacity):
+        search = saturation.SaturationSearch(saturation.get_saturation_config({'saturation': config}))
+        rates = []
+        rate = search.next_rate()
+        while rate is not None:
+            rates.append(rate)
+            search.record(rate, rate <= capacity)
+            rate = search.next_rate()
+
+        return search, rates
+
+    def test_search_linear(self):
+        search, rates = self.run_search({'ramp': 'linear', 'start_rate': 10, 'rate_step': 10,
+                                         'backoff_steps': 0}, 35)
+        self.assertEqual(rates, [10, 20, 30, 40])
+        self.assertEqual(search.max_sustainable_rate, 30)
+        self.assertEqual(search.first_unsustainable_rate, 40)
+
+    def test_search_exponential_backoff(self):
+        search, rates = self.run_search({'ramp': 'exponential', 'start_rate': 10, 'rate_step': 2,
+                                         'backoff_steps': 2}, 50)
+        self.assertEqual(rates, [10, 20, 40, 80, 60, 50])
+        self.assertEqual(search.max_sustainable_rate, 50)
+        self.assertEqual(search.first_unsustainable_rate, 60)
+
+    def test_search_max_rate(self):
+        search, rates = self.run_search({'start_rate': 10, 'rate_step': 2, 'max_rate': 40}, 1000)
+        self.assertEqual(rates, [10, 20, 40])
+        self.assertEqual(search.max_sustainable_rate, 40)
+        self.assertIsNone(search.first_unsustainable_rate)
+
+    def test_search_first_step_unsustainable(self):
+        search, rates = self.run_search({'start_rate': 10}, 5)
+        self.assertEqual(rates, [10])
+        self.assertIsNone(search.max_sustainable_rate)
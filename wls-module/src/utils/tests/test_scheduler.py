@@ -0,0 +1,46 @@
+# Python Imports
+import unittest
+import random
+
+# Project Imports
+from src.utils import scheduler
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+
+    def test_get_send_deadlines_uniform(self):
+        deadlines = list(scheduler.get_send_deadlines('uniform', 4, 2))
+        self.assertEqual(deadlines, [0, 0.25, 0.5, 0.75, 1, 1.25, 1.5, 1.75])
+
+    def test_get_send_deadlines_uniform_no_drift(self):
+        deadlines = list(scheduler.get_send_deadlines('uniform', 1000, 10))
+        self.assertEqual(len(deadlines), 10000)
+        self.assertEqual(deadlines[-1], 9.999)
+
+    def test_get_send_deadlines_uniform_start_time(self):
+        deadlines = list(scheduler.get_send_deadlines('uniform', 4, 2, start_time=1.1))
+        self.assertEqual(deadlines, [1.25, 1.5, 1.75])
+
+    def test_get_send_deadlines_poisson(self):
+        deadlines = list(scheduler.get_send_deadlines('poisson', 1, 1))
+        self.assertEqual(deadlines, [0.0, 0.1442910641095092])
+
+    def test_get_send_deadlines_poisson_rate(self):
+        deadlines = list(scheduler.get_send_deadlines('poisson', 1000, 10))
+        self.assertEqual(deadlines, sorted(deadlines))
+        self.assertLess(deadlines[-1], 10)
+        self.assertAlmostEqual(len(deadlines) / 10, 1000, delta=50)
+
+    def test_get_send_deadlines_poisson_start_time(self):
+        deadlines = list(scheduler.get_send_deadlines('poisson', 1000, 10, start_time=5))
+        self.assertEqual(deadlines[0], 5)
+        self.assertAlmostEqual(len(deadlines) / 5, 1000, delta=75)
+
+    def test_get_send_deadlines_invalid(self):
+        with self.assertRaises(SystemExit) as cm:
+            scheduler.get_send_deadlines('test', 1, 1)
+
+        self.assertEqual(cm.exception.code, 1)
@@ -0,0 +1,55 @@
+# Python Imports
+import os
+import time
+import tempfile
+import threading
+import unittest
+
+# Project Imports
+from src.utils import start_signal
+
+
+class TestStartSignal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.fifo_path = os.path.join(self.tmp_dir.name, 'start.fifo')
+        self.signal_file = os.path.join(self.tmp_dir.name, 'start.signal')
+
+    def test_wait_for_start_signal_fifo(self):
+        fifo_fd = start_signal.create_start_fifo(self.fifo_path)
+        self.assertIsNotNone(fifo_fd)
+
+        def signal():
+            with open(self.fifo_path, 'w') as f:
+                f.write('1000.5\n')
+        threading.Timer(0.1, signal).start()
+
+        received_time, sent_time = start_signal.wait_for_start_signal(fifo_fd, self.signal_file)
+        self.assertEqual(sent_time, 1000.5)
+        self.assertAlmostEqual(received_time, time.time(), delta=1)
+
+        start_signal.remove_start_signal(fifo_fd, self.fifo_path, self.signal_file)
+        self.assertFalse(os.path.exists(self.fifo_path))
+
+    def test_wait_for_start_signal_fifo_no_time(self):
+        fifo_fd = start_signal.create_start_fifo(self.fifo_path)
+        with open(self.fifo_path, 'w') as f:
+            f.write('\n')
+
+        _, sent_time = start_signal.wait_for_start_signal(fifo_fd, self.signal_file)
+        self.assertIsNone(sent_time)
+        start_signal.remove_start_signal(fifo_fd, self.fifo_path, self.signal_file)
+
+    def test_wait_for_start_signal_file(self):
+        open(self.signal_file, 'w').close()
+
+        _, sent_time = start_signal.wait_for_start_signal(None, self.signal_file)
+        self.assertIsNone(sent_time)
+
+        start_signal.remove_start_signal(None, self.fifo_path, self.signal_file)
+        self.assertFalse(os.path.exists(self.signal_file))
+
+    def test_create_start_fifo_error(self):
+        self.assertIsNone(start_signal.create_start_fifo(os.path.join(self.tmp_dir.name, 'a', 'b')))
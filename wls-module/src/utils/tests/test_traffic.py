@@ -0,0 +1,81 @@
+# Python Imports
+import unittest
+import random
+import numpy as np
+
+# Project Imports
+from src.utils import traffic
+from src.utils import scheduler
+
+
+class TestTraffic(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+
+    def test__get_rate_multiplier_profile(self):
+        t = np.array([0, 5, 10, 20])
+        multiplier = traffic._get_rate_multiplier({'rate_profile': [[10, 3], [0, 1]]}, t)
+        self.assertEqual(multiplier.tolist(), [1, 2, 3, 3])
+
+    def test__get_rate_multiplier_diurnal(self):
+        t = np.array([0, 25, 75])
+        multiplier = traffic._get_rate_multiplier({'diurnal': {'period': 100, 'amplitude': 0.5}}, t)
+        np.testing.assert_allclose(multiplier, [1, 1.5, 0.5])
+
+    def test__get_rate_multiplier_bursts(self):
+        t = np.array([0, 1, 2, 3])
+        multiplier = traffic._get_rate_multiplier({'rate_profile': [[0, 2]],
+                                                   'bursts': [{'start': 1, 'duration': 2,
+                                                               'multiplier': 10}]}, t)
+        self.assertEqual(multiplier.tolist(), [2, 20, 20, 2])
+
+    def test_get_rate_schedule_none(self):
+        self.assertIsNone(traffic.get_rate_schedule({'message_rate': 1, 'simulation_time': 1}))
+        self.assertIsNone(traffic.get_rate_schedule({'message_rate': 1, 'simulation_time': 1,
+                                                     'traffic_schedule': {'emitter_zipf': 1}}))
+
+    def test_rate_schedule_uniform(self):
+        wls_config = {'message_rate': 10, 'simulation_time': 4,
+                      'traffic_schedule': {'rate_profile': [[0, 1], [1.999, 1], [2, 2]]}}
+        rate_schedule = traffic.get_rate_schedule(wls_config)
+        deadlines = list(scheduler.get_send_deadlines('uniform', 10, 4, rate_schedule))
+
+        self.assertAlmostEqual(len([d for d in deadlines if d < 2]), 20, delta=1)
+        self.assertAlmostEqual(len(deadlines), 60, delta=1)
+        self.assertAlmostEqual(deadlines[1], 0.1)
+        self.assertAlmostEqual(deadlines[-1] - deadlines[-2], 0.05)
+
+    def test_rate_schedule_start_time(self):
+        wls_config = {'message_rate': 10, 'simulation_time': 4,
+                      'traffic_schedule': {'bursts': [{'start': 2, 'duration': 2, 'multiplier': 2}]}}
+        rate_schedule = traffic.get_rate_schedule(wls_config)
+        deadlines = list(scheduler.get_send_deadlines('uniform', 10, 4, rate_schedule, start_time=3))
+
+        self.assertAlmostEqual(deadlines[0], 3)
+        self.assertAlmostEqual(deadlines[1], 3.05)
+        self.assertAlmostEqual(len(deadlines), 20, delta=1)
+        self.assertEqual(list(rate_schedule.warp(iter([0]), start_time=5)), [])
+
+    def test_rate_schedule_poisson(self):
+        wls_config = {'message_rate': 100, 'simulation_time': 10,
+                      'traffic_schedule': {'bursts': [{'start': 5, 'duration': 5, 'multiplier': 4}]}}
+        rate_schedule = traffic.get_rate_schedule(wls_config)
+        deadlines = list(scheduler.get_send_deadlines('poisson', 100, 10, rate_schedule))
+
+        self.assertEqual(deadlines, sorted(deadlines))
+        self.assertAlmostEqual(len([d for d in deadlines if d < 5]), 500, delta=75)
+        self.assertAlmostEqual(len([d for d in deadlines if d >= 5]), 2000, delta=150)
+
+    def test_get_zipf_weights(self):
+        self.assertEqual(traffic.get_zipf_weights(3, 1), [1, 0.5, 1 / 3])
+        self.assertEqual(traffic.get_zipf_weights(3, 0), [1, 1, 1])
+
+    def test_get_popularity_weights(self):
+        emitters = {"test1": {"topics": ["a", "b"]}, "test2": {"topics": ["c"]}}
+        self.assertIsNone(traffic.get_popularity_weights(emitters, {}))
+
+        weights, topics_weights = traffic.get_popularity_weights(emitters, {'traffic_schedule': {
+            'emitter_zipf': 1, 'topic_zipf': 2, 'emitter_weights': {'test2': 4}}})
+        self.assertEqual(weights, [1, 2])
+        self.assertEqual(topics_weights, [[1, 0.25], [1]])
@@ -1,8 +1,11 @@
 # Python Imports
 import unittest
 import json
+import hashlib
 import random
-from unittest.mock import patch
+import asyncio
+import aiohttp
+from unittest.mock import patch, MagicMock, AsyncMock
 
 # Project Imports
 from src.utils import waku_messaging
@@ -54,6 +57,205 @@ class TestPayloads(unittest.TestCase):
         self.assertEqual(test_response, 'test')
         self.assertEqual(test_time, 0)
 
+    def test__send_waku_rpc_async(self):
+        mock_time = self.create_patch('time.time')
+        mock_time.return_value = 10
+
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_response.read = AsyncMock()
+        mock_session = MagicMock()
+        mock_session.post.return_value.__aenter__.return_value = mock_response
+
+        test_status, test_time = asyncio.run(waku_messaging._send_waku_rpc_async(b'test', 'test',
+                                                                                 mock_session))
+        mock_session.post.assert_called_once_with('test', data=b'test',
+                                                  headers={'content-type': 'application/json'})
+        mock_response.read.assert_awaited_once()
+        self.assertEqual(test_status, 200)
+        self.assertEqual(test_time, 0)
+
+    def test_build_waku_message(self):
+        mock_time = self.create_patch('time.time_ns')
+        mock_time.return_value = 10
+
+        waku_msg_bytes, msg_hash, ts = waku_messaging.build_waku_message('dGVzdA==', 3)
+
+        waku_msg = waku_messaging._create_waku_msg(waku_messaging._get_waku_payload(3, 'dGVzdA=='))
+        self.assertEqual(waku_msg_bytes, json.dumps(waku_msg).encode('utf-8'))
+        self.assertEqual(msg_hash, hashlib.sha256(json.dumps(waku_msg).encode('utf-8')).hexdigest())
+        self.assertEqual(ts, 10)
+
+    def test_jsonrpc_transport_get_request(self):
+        transport = waku_messaging.JsonRpcTransport({})
+        waku_msg = {'payload': 'dGVzdA=='}
+
+        url, body = transport.get_request('http://1:2/', 'test"topic', json.dumps(waku_msg).encode('utf-8'))
+
+        data = waku_messaging._create_waku_rpc_data('test"topic', waku_msg, 'test')
+        self.assertEqual(url, 'http://1:2/')
+        self.assertEqual(body, json.dumps(data).encode('utf-8'))
+
+    def test_jsonrpc_transport_get_batch_request(self):
+        transport = waku_messaging.JsonRpcTransport({})
+
+        url, body = transport.get_batch_request('http://1:2/', [('a', b'{"payload": "YQ=="}'),
+                                                                ('b', b'{"payload": "Yg=="}')])
+
+        self.assertEqual(url, 'http://1:2/')
+        self.assertEqual(json.loads(body),
+                         [waku_messaging._create_waku_rpc_data('a', {'payload': 'YQ=='}, 'test'),
+                          dict(waku_messaging._create_waku_rpc_data('b', {'payload': 'Yg=='}, 'test'), id=2)])
+
+    def test_jsonrpc_transport_get_batch_statuses(self):
+        transport = waku_messaging.JsonRpcTransport({})
+        response = [{'jsonrpc': '2.0', 'id': 3, 'result': True},
+                    {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32000, 'message': 'test'}}]
+
+        self.assertEqual(transport.get_batch_statuses(200, response, 3),
+                         [-32000, waku_messaging.G_RPC_NO_RESPONSE, 200])
+        self.assertEqual(transport.get_batch_statuses(500, None, 2), [500, 500])
+
+    def test_jsonrpc_transport_get_node_address(self):
+        address = waku_messaging.JsonRpcTransport.get_node_address('test', {'ip_address': '1',
+                                                                            'ports': {'rpc-test': [2]}})
+        self.assertEqual(address, 'http://1:2/')
+
+    def test_rest_transport(self):
+        transport = waku_messaging.RestTransport({'rest_port': 8000})
+
+        address = transport.get_node_address('test', {'ip_address': '1', 'port_shift': 5})
+        url, body = transport.get_request(address, '/waku/2/default-waku/proto', b'test')
+
+        self.assertEqual(address, 'http://1:8005/')
+        self.assertEqual(url, 'http://1:8005/relay/v1/messages/%2Fwaku%2F2%2Fdefault-waku%2Fproto')
+        self.assertEqual(body, b'test')
+        self.assertFalse(transport.supports_batching)
+
+    def test_jsonrpc_transport_probe_requests(self):
+        transport = waku_messaging.JsonRpcTransport({})
+
+        method, url, body = transport.get_subscribe_request('http://1:2/', ['a', 'b'])
+        self.assertEqual((method, url), ('POST', 'http://1:2/'))
+        self.assertEqual(json.loads(body)['method'], 'post_waku_v2_relay_v1_subscriptions')
+        self.assertEqual(json.loads(body)['params'], [['a', 'b']])
+
+        method, url, body = transport.get_messages_request('http://1:2/', 'a')
+        self.assertEqual(json.loads(body)['method'], 'get_waku_v2_relay_v1_messages')
+        self.assertEqual(transport.get_messages({'result': [{'payload': 'x'}]}), [{'payload': 'x'}])
+        self.assertEqual(transport.get_messages({'result': None}), [])
+
+    def test_rest_transport_probe_requests(self):
+        transport = waku_messaging.RestTransport({})
+
+        method, url, body = transport.get_subscribe_request('http://1:2/', ['/a'])
+        self.assertEqual((method, url, json.loads(body)), ('POST', 'http://1:2/relay/v1/subscriptions', ['/a']))
+        self.assertEqual(transport.get_messages_request('http://1:2/', '/a'),
+                         ('GET', 'http://1:2/relay/v1/messages/%2Fa', None))
+
+    def test_request_waku_json_async(self):
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_response.json = AsyncMock(return_value={'result': []})
+        mock_session = MagicMock()
+        mock_session.request.return_value.__aenter__.return_value = mock_response
+
+        status, response = asyncio.run(waku_messaging.request_waku_json_async(mock_session, 'GET', 'test'))
+
+        mock_session.request.assert_called_once_with('GET', 'test', data=None,
+                                                     headers={'content-type': 'application/json'})
+        self.assertEqual((status, response), (200, {'result': []}))
+
+    def test_request_waku_json_async_error(self):
+        mock_response = MagicMock()
+        mock_response.status = 500
+        mock_response.read = AsyncMock()
+        mock_session = MagicMock()
+        mock_session.request.return_value.__aenter__.return_value = mock_response
+
+        status, response = asyncio.run(waku_messaging.request_waku_json_async(mock_session, 'GET', 'test'))
+
+        self.assertEqual((status, response), (500, None))
+
+    def test_create_transport(self):
+        self.assertIsInstance(waku_messaging.create_transport({}), waku_messaging.JsonRpcTransport)
+        self.assertIsInstance(waku_messaging.create_transport({'transport': 'rest'}),
+                              waku_messaging.RestTransport)
+
+    def test_create_transport_invalid(self):
+        with self.assertRaises(ValueError):
+            waku_messaging.create_transport({'transport': 'test'})
+
+    def test_create_senders(self):
+        sessions = {'http://1:2/': 'session1', 'http://3:4/': 'session2'}
+
+        senders = waku_messaging.create_senders(sessions, waku_messaging.JsonRpcTransport({}), batch_size=4)
+        self.assertTrue(all(isinstance(sender, waku_messaging.BatchSender) for sender in senders.values()))
+        self.assertEqual(list(senders.keys()), list(sessions.keys()))
+
+        senders = waku_messaging.create_senders(sessions, waku_messaging.RestTransport({}), batch_size=4)
+        self.assertTrue(all(type(sender) is waku_messaging.Sender for sender in senders.values()))
+
+    def test_sender_send(self):
+        mock_send = self.create_patch('src.utils.waku_messaging._send_waku_rpc_async')
+        mock_send.return_value = (200, 1)
+        sender = waku_messaging.Sender('session', waku_messaging.RestTransport({}), 'http://1:2/')
+
+        result = asyncio.run(sender.send('test', b'test'))
+
+        mock_send.assert_awaited_once_with(b'test', 'http://1:2/relay/v1/messages/test', 'session')
+        self.assertEqual(result, (200, 1))
+
+    def test_batch_sender_send(self):
+        mock_send = self.create_patch('src.utils.waku_messaging._send_waku_rpc_batch_async')
+        mock_send.side_effect = [(200, [{'id': 1, 'result': True}, {'id': 2, 'error': {'code': -32000}}], 1),
+                                 (200, [{'id': 1, 'result': True}], 2)]
+        sender = waku_messaging.BatchSender('session', waku_messaging.JsonRpcTransport({}), 'http://1:2/',
+                                            batch_size=2, batch_linger_ms=1000)
+
+        async def send_all():
+            results = await asyncio.gather(*[sender.send(topic, b'{}') for topic in ('a', 'b', 'c')])
+            await sender.close()
+            return results
+
+        # The first two messages fill a batch, the last one is sent on close instead of after lingering
+        results = asyncio.run(send_all())
+
+        self.assertEqual(results, [(200, 1), (-32000, 1), (200, 2)])
+        self.assertEqual(mock_send.await_count, 2)
+        self.assertEqual(len(json.loads(mock_send.await_args_list[0].args[0])), 2)
+        self.assertEqual(len(json.loads(mock_send.await_args_list[1].args[0])), 1)
+
+    def test_batch_sender_send_error(self):
+        mock_send = self.create_patch('src.utils.waku_messaging._send_waku_rpc_batch_async')
+        mock_send.side_effect = aiohttp.ClientError('test')
+        sender = waku_messaging.BatchSender('session', waku_messaging.JsonRpcTransport({}), 'http://1:2/',
+                                            batch_size=2, batch_linger_ms=1)
+
+        async def send_all():
+            return await asyncio.gather(*[sender.send(topic, b'{}') for topic in ('a', 'b')],
+                                        return_exceptions=True)
+
+        results = asyncio.run(send_all())
+
+        self.assertTrue(all(isinstance(result, aiohttp.ClientError) for result in results))
+
+    def test_create_sessions(self):
+        async def create_and_close():
+            sessions = waku_messaging.create_sessions(['http://1:2/', 'http://3:4/', 'http://1:2/'],
+                                                      limit_per_host=5)
+            addresses = list(sessions.keys())
+            limits = [session.connector.limit_per_host for session in sessions.values()]
+            closed = list(sessions.values())
+            await waku_messaging.close_sessions(sessions)
+            return addresses, limits, closed, sessions
+
+        addresses, limits, closed, sessions = asyncio.run(create_and_close())
+        self.assertEqual(addresses, ['http://1:2/', 'http://3:4/'])
+        self.assertEqual(limits, [5, 5])
+        self.assertTrue(all(session.closed for session in closed))
+        self.assertEqual(sessions, {})
+
     def test_send_msg_to_node(self):
         mock_waku_payload = self.create_patch('src.utils.waku_messaging._get_waku_payload')
         mock_create_waku_msg = self.create_patch('src.utils.waku_messaging._create_waku_msg')
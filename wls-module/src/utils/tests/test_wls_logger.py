@@ -0,0 +1,62 @@
+# Python Imports
+import io
+import queue
+import unittest
+import logging
+import logging.handlers
+
+# Project Imports
+from src.utils import wls_logger
+
+
+class TestWlsLogger(unittest.TestCase):
+
+    def create_record(self, level, msg, args=None):
+        return logging.LogRecord(wls_logger.G_APP_NAME, level, 'test.py', 1, msg, args, None, 'test')
+
+    def test_custom_formatter(self):
+        formatter = wls_logger.CustomFormatter()
+
+        info = formatter.format(self.create_record(logging.INFO, 'Injected %d messages', (3,)))
+        warning = formatter.format(self.create_record(logging.WARNING, 'test'))
+
+        self.assertTrue(info.endswith('[WLS] Injected 3 messages'))
+        self.assertTrue(warning.endswith('[WLS] WARNING - test'))
+
+    def test_custom_formatter_default(self):
+        formatter = wls_logger.CustomFormatter()
+
+        test = formatter.format(self.create_record(5, 'test'))
+
+        self.assertTrue(test.endswith('[WLS] test'))
+
+    def test_queue_logging(self):
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(wls_logger.CustomFormatter())
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, handler)
+        logger = logging.getLogger('test_queue_logging')
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        logger.setLevel(logging.INFO)
+        self.addCleanup(logger.removeHandler, logger.handlers[0])
+
+        listener.start()
+        logger.info('Topic %s', 'test')
+        logger.debug('Not %s', 'formatted')
+        listener.stop()
+
+        self.assertEqual(stream.getvalue().count('\n'), 1)
+        self.assertIn('[WLS] Topic test', stream.getvalue())
+
+    def test_flush_logging(self):
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(wls_logger.CustomFormatter())
+        wls_logger.G_LISTENER.handlers += (handler,)
+        self.addCleanup(setattr, wls_logger.G_LISTENER, 'handlers', wls_logger.G_LISTENER.handlers[:-1])
+
+        wls_logger.G_LOGGER.warning('test')
+        wls_logger.flush_logging()
+
+        self.assertIn('[WLS] WARNING - test', stream.getvalue())
@@ -0,0 +1,108 @@
+# Python Imports
+import math
+import bisect
+import numpy as np
+
+# Project Imports
+from src.utils import wls_logger
+
+""" Globals """
+# Resolution of the compiled rate curve. Coarser for long simulations to bound its size
+G_RATE_STEP_S = 0.01
+G_MAX_RATE_STEPS = 1000000
+
+
+def _get_rate_multiplier(traffic_schedule, t):
+    """ Multiplier of message_rate at times t (numpy array) """
+    multiplier = np.ones_like(t, dtype=float)
+
+    # Piecewise linear curve through [time, multiplier] points, constant beyond its ends
+    rate_profile = traffic_schedule.get('rate_profile')
+    if rate_profile:
+        times, values = zip(*sorted(rate_profile))
+        multiplier *= np.interp(t, times, values)
+
+    diurnal = traffic_schedule.get('diurnal')
+    if diurnal:
+        multiplier *= 1 + diurnal['amplitude'] * np.sin(2 * math.pi * t / diurnal['period'] +
+                                                        diurnal.get('phase', 0))
+
+    for burst in traffic_schedule.get('bursts', []):
+        in_burst = (t >= burst['start']) & (t < burst['start'] + burst['duration'])
+        multiplier *= np.where(in_burst, burst['multiplier'], 1)
+
+    return np.clip(multiplier, 0, None)
+
+
+class RateSchedule:
+    """ Time-varying message rate compiled into a piecewise constant curve and its integral, so
+    that arrivals of a unit rate process can be warped onto it with O(1) work per message """
+
+    def __init__(self, traffic_schedule, msg_rate, simulation_time):
+        step = max(G_RATE_STEP_S, simulation_time / G_MAX_RATE_STEPS)
+        starts = np.arange(0, simulation_time, step)
+        rates = msg_rate * _get_rate_multiplier(traffic_schedule, starts + step / 2)
+
+        self._simulation_time = simulation_time
+        # Plain lists: scalar indexing is much cheaper than on numpy arrays
+        self._starts = starts.tolist()
+        self._rates = rates.tolist()
+        self._cumulative = np.concatenate(([0.], np.cumsum(rates * step))).tolist()
+
+        wls_logger.G_LOGGER.info(f"Compiled traffic schedule: {len(self._starts)} steps of {step} s, "
+                                 f"{self._cumulative[-1]:.0f} messages expected")
+
+    def warp(self, unit_arrivals, start_time=0):
+        """ Map the arrival times of a rate 1 process to send deadlines following the schedule,
+        starting at start_time """
+        num_steps = len(self._starts)
+        i = max(bisect.bisect_right(self._starts, start_time) - 1, 0)
+        if i >= num_steps or start_time >= self._simulation_time:
+            return
+        offset = self._cumulative[i] + (start_time - self._starts[i]) * self._rates[i]
+
+        for arrival in unit_arrivals:
+            arrival += offset
+            # Deadlines are increasing, so the current step only ever moves forward
+            while i < num_steps and self._cumulative[i + 1] <= arrival:
+                i += 1
+            if i == num_steps:
+                return
+
+            deadline = self._starts[i] + (arrival - self._cumulative[i]) / self._rates[i]
+            if deadline >= self._simulation_time:
+                return
+
+            yield deadline
+
+
+def get_rate_schedule(wls_config):
+    traffic_schedule = wls_config.get('traffic_schedule', {})
+    if not any(key in traffic_schedule for key in ('rate_profile', 'diurnal', 'bursts')):
+        return None
+
+    return RateSchedule(traffic_schedule, wls_config['message_rate'], wls_config['simulation_time'])
+
+
+def get_zipf_weights(n, exponent):
+    """ Zipf weights of n items; the first item is the most popular. Exponent 0 is uniform """
+    return [1 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+def get_popularity_weights(random_emitters, wls_config):
+    """ Weights of every emitter, in the order they were drawn, and of every emitter topic, in the
+    order the node lists them. None when the traffic is not skewed """
+    traffic_schedule = wls_config.get('traffic_schedule', {})
+    if not any(key in traffic_schedule for key in ('emitter_zipf', 'topic_zipf', 'emitter_weights')):
+        return None
+
+    emitter_weights = traffic_schedule.get('emitter_weights', {})
+    topic_exponent = traffic_schedule.get('topic_zipf', 0)
+
+    weights = get_zipf_weights(len(random_emitters), traffic_schedule.get('emitter_zipf', 0))
+    weights = [weight * emitter_weights.get(emitter, 1)
+               for weight, emitter in zip(weights, random_emitters)]
+    topics_weights = [get_zipf_weights(len(emitter_info['topics']), topic_exponent)
+                      for emitter_info in random_emitters.values()]
+
+    return weights, topics_weights
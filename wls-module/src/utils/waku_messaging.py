@@ -5,11 +5,26 @@ import requests
 import sys
 import random
 import base64
+import hashlib
+import asyncio
 import aiohttp
+import urllib.parse
 
 # Project Imports
 from src.utils import wls_logger
 
+""" Globals """
+G_DEFAULT_CONNECTIONS_PER_HOST = 100
+G_DEFAULT_KEEPALIVE_TIMEOUT_S = 30
+G_RELAY_RPC_BODY_PREFIX = b'{"jsonrpc": "2.0", "method": "post_waku_v2_relay_v1_message", "id": %d, "params": ['
+# Status of a batched message whose request got no response in the batch response
+G_RPC_NO_RESPONSE = -1
+G_JSON_HEADERS = {'content-type': 'application/json'}
+G_DEFAULT_TRANSPORT = 'jsonrpc'
+G_DEFAULT_REST_PORT = 8645
+G_DEFAULT_BATCH_SIZE = 1
+G_DEFAULT_BATCH_LINGER_MS = 5
+
 
 def _poisson_interval(rate):
     # Generate a random interval using a Poisson distribution
@@ -42,11 +57,134 @@ def _create_waku_rpc_data(topic, waku_msg, node_address):
         'params': [topic, waku_msg]
     }
 
-    wls_logger.G_LOGGER.debug(f"Waku RPC: {data['method']} from {node_address} Topic: {topic}")
+    wls_logger.G_LOGGER.debug("Waku RPC: %s from %s Topic: %s", data['method'], node_address, topic)
 
     return data
 
 
+def build_waku_message(payload, nonce):
+    """ Build the JSON of a Waku message in a single pass. Returns it, its hash and its timestamp.
+    The JSON and hash are byte for byte json.dumps(waku_msg) and its sha256, with waku_msg
+    _create_waku_msg(_get_waku_payload(nonce, payload)), as the payload is base64 and never needs
+    escaping. """
+    ts = time.time_ns()
+    waku_payload = b'{"nonce": %d, "ts": %d, "payload": "%s"}' % (nonce, ts, payload.encode('ascii'))
+    waku_msg = b'{"payload": "%s"}' % base64.b64encode(waku_payload)
+
+    return waku_msg, hashlib.sha256(waku_msg).hexdigest(), ts
+
+
+class JsonRpcTransport:
+    """ post_waku_v2_relay_v1_message over the JSON-RPC server of the nodes. Several messages can
+    go in one JSON-RPC batch request """
+    supports_batching = True
+
+    def __init__(self, wls_config):
+        pass
+
+    @staticmethod
+    def get_node_address(node, node_info):
+        return f"http://{node_info['ip_address']}:{node_info['ports']['rpc-' + node][0]}/"
+
+    @staticmethod
+    def _get_body(topic, waku_msg, rpc_id=1):
+        # Same bytes as json.dumps(_create_waku_rpc_data(topic, waku_msg, ...)), with id rpc_id
+        return b'%s%s, %s]}' % (G_RELAY_RPC_BODY_PREFIX % rpc_id, json.dumps(topic).encode('utf-8'), waku_msg)
+
+    def get_request(self, node_address, topic, waku_msg):
+        """ URL and body of the request relaying a message """
+        return node_address, self._get_body(topic, waku_msg)
+
+    def get_batch_request(self, node_address, messages):
+        """ URL and body of the request relaying a list of (topic, waku_msg). The requests have ids
+        1 to len(messages), in order """
+        return node_address, b'[%s]' % b', '.join(self._get_body(topic, waku_msg, rpc_id)
+                                                  for rpc_id, (topic, waku_msg) in enumerate(messages, 1))
+
+    @staticmethod
+    def get_batch_statuses(status, response, num_msgs):
+        """ Status of every message of a batch request: 200 if its own response has a result, the
+        JSON-RPC error code if it has an error, G_RPC_NO_RESPONSE if it has none. Every message gets
+        the HTTP status if the whole request failed """
+        if status != 200 or not isinstance(response, list):
+            return [status] * num_msgs
+
+        responses = {rpc_response.get('id'): rpc_response for rpc_response in response
+                     if isinstance(rpc_response, dict)}
+        statuses = []
+        for rpc_id in range(1, num_msgs + 1):
+            rpc_response = responses.get(rpc_id)
+            if rpc_response is None:
+                statuses.append(G_RPC_NO_RESPONSE)
+            elif 'error' in rpc_response:
+                error = rpc_response['error']
+                statuses.append(error.get('code', G_RPC_NO_RESPONSE) if isinstance(error, dict)
+                                else G_RPC_NO_RESPONSE)
+            else:
+                statuses.append(200)
+
+        return statuses
+
+    @staticmethod
+    def _get_rpc_body(method, params):
+        return json.dumps({'jsonrpc': '2.0', 'method': method, 'id': 1, 'params': params}).encode('utf-8')
+
+    def get_subscribe_request(self, node_address, topics):
+        """ HTTP method, URL and body of the request subscribing to topics through the API """
+        return 'POST', node_address, self._get_rpc_body('post_waku_v2_relay_v1_subscriptions', [topics])
+
+    def get_messages_request(self, node_address, topic):
+        """ HTTP method, URL and body of the request fetching the messages received on topic since
+        the last one """
+        return 'POST', node_address, self._get_rpc_body('get_waku_v2_relay_v1_messages', [topic])
+
+    @staticmethod
+    def get_messages(response):
+        return response.get('result') or []
+
+
+class RestTransport:
+    """ POST /relay/v1/messages/{topic} on the REST server of the nodes. The message is the body,
+    so there is no RPC framing, but there is no batching either. The nodes need the rest trait. """
+    supports_batching = False
+
+    def __init__(self, wls_config):
+        self._rest_port = wls_config.get('rest_port', G_DEFAULT_REST_PORT)
+
+    def get_node_address(self, node, node_info):
+        # The REST port is not published, but it is shifted like every other port of the node
+        return f"http://{node_info['ip_address']}:{self._rest_port + node_info.get('port_shift', 0)}/"
+
+    @staticmethod
+    def _get_messages_url(node_address, topic):
+        return f"{node_address}relay/v1/messages/{urllib.parse.quote(topic, safe='')}"
+
+    def get_request(self, node_address, topic, waku_msg):
+        return self._get_messages_url(node_address, topic), waku_msg
+
+    def get_subscribe_request(self, node_address, topics):
+        return 'POST', f"{node_address}relay/v1/subscriptions", json.dumps(topics).encode('utf-8')
+
+    def get_messages_request(self, node_address, topic):
+        return 'GET', self._get_messages_url(node_address, topic), None
+
+    @staticmethod
+    def get_messages(response):
+        return response or []
+
+
+G_TRANSPORTS = {'jsonrpc': JsonRpcTransport, 'rest': RestTransport}
+
+
+def create_transport(wls_config):
+    transport = wls_config.get('transport', G_DEFAULT_TRANSPORT)
+    if transport not in G_TRANSPORTS:
+        wls_logger.G_LOGGER.error(f"Unknown transport {transport}")
+        raise ValueError('Unknown transport %s' % transport)
+
+    return G_TRANSPORTS[transport](wls_config)
+
+
 def _send_waku_rpc(data, node_address):
     s_time = time.time()
 
@@ -59,26 +197,171 @@ def _send_waku_rpc(data, node_address):
 
     response_obj = response.json()
 
-    wls_logger.G_LOGGER.debug(f"Response from {node_address}: {response_obj} [{elapsed_ms:.4f} ms.]")
+    wls_logger.G_LOGGER.debug("Response from %s: %s [%.4f ms.]", node_address, response_obj, elapsed_ms)
 
     return response_obj, elapsed_ms
 
-async def _send_waku_rpc_async(data, node_address):
+async def _send_waku_rpc_async(body, node_address, session):
     s_time = time.time()
 
-    json_data = json.dumps(data)
+    async with session.post(node_address, data=body, headers=G_JSON_HEADERS) as response:
+        # Drain the body so the connection goes back to the pool instead of being closed
+        await response.read()
+
+        elapsed_ms = (time.time() - s_time) * 1000
+
+        wls_logger.G_LOGGER.debug("Response from %s: %s [%.4f ms.]", node_address, response.status, elapsed_ms)
+
+        return response.status, elapsed_ms
+
+
+async def _send_waku_rpc_batch_async(body, node_address, session):
+    """ Returns the HTTP status, the JSON response (None unless the status is 200) and the elapsed
+    time in ms """
+    s_time = time.time()
 
-    async with aiohttp.ClientSession() as session:
-        
-        async with session.post(node_address, data=json_data, headers={'content-type': 'application/json'}) as response:
-            
-            elapsed_ms = (time.time() - s_time) * 1000
-                        
-            wls_logger.G_LOGGER.debug(f"Response from {node_address}: {response.status} [{elapsed_ms:.4f} ms.]")
+    async with session.post(node_address, data=body, headers=G_JSON_HEADERS) as response:
+        data = await response.read()
+
+        elapsed_ms = (time.time() - s_time) * 1000
+
+        wls_logger.G_LOGGER.debug("Response from %s: %s [%.4f ms.]", node_address, response.status, elapsed_ms)
+
+        if response.status != 200:
+            return response.status, None, elapsed_ms
+        try:
+            return response.status, json.loads(data), elapsed_ms
+        except ValueError:
+            return response.status, None, elapsed_ms
+
+
+async def request_waku_json_async(session, method, url, body=None):
+    """ Send a request and return its HTTP status and JSON response, None unless the status is 200 """
+    async with session.request(method, url, data=body, headers=G_JSON_HEADERS) as response:
+        if response.status != 200:
+            await response.read()
+            return response.status, None
+
+        return response.status, await response.json(content_type=None)
+
+
+def create_sessions(node_addresses, limit_per_host=G_DEFAULT_CONNECTIONS_PER_HOST,
+                    keepalive_timeout=G_DEFAULT_KEEPALIVE_TIMEOUT_S):
+    """ Create one keep-alive session (and connection pool) per node address.
+    Must be called from within a running event loop. """
+    sessions = {}
+    for node_address in node_addresses:
+        if node_address in sessions:
+            continue
+        connector = aiohttp.TCPConnector(limit_per_host=limit_per_host,
+                                         keepalive_timeout=keepalive_timeout)
+        sessions[node_address] = aiohttp.ClientSession(connector=connector,
+                                                       headers={'content-type': 'application/json'})
+
+    wls_logger.G_LOGGER.info(f"Created {len(sessions)} HTTP sessions "
+                             f"({limit_per_host} connections per host)")
+
+    return sessions
+
+
+async def close_sessions(sessions):
+    await asyncio.gather(*[session.close() for session in sessions.values()])
+    sessions.clear()
+
+
+class Sender:
+    """ Sends messages to a node through its session, one request per message """
+
+    def __init__(self, session, transport, node_address):
+        self._session = session
+        self._transport = transport
+        self._node_address = node_address
+
+    async def send(self, topic, waku_msg):
+        """ Returns the HTTP status and the elapsed time in ms """
+        url, body = self._transport.get_request(self._node_address, topic, waku_msg)
+
+        return await _send_waku_rpc_async(body, url, self._session)
+
+    async def close(self):
+        pass
+
+
+class BatchSender(Sender):
+    """ Gathers the messages to a node and sends up to batch_size of them per request. A batch
+    that is not full is sent batch_linger_ms after its first message. Every message of a batch
+    gets the status of its own response in the batch, and the elapsed time of the whole request. """
+
+    def __init__(self, session, transport, node_address, batch_size, batch_linger_ms):
+        super().__init__(session, transport, node_address)
+        self._batch_size = batch_size
+        self._batch_linger_s = batch_linger_ms / 1000
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def send(self, topic, waku_msg):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((topic, waku_msg, future))
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._batch_linger_s, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, batch):
+        url, body = self._transport.get_batch_request(self._node_address,
+                                                      [(topic, waku_msg) for topic, waku_msg, _ in batch])
+        try:
+            status, response, elapsed_ms = await _send_waku_rpc_batch_async(body, url, self._session)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        statuses = self._transport.get_batch_statuses(status, response, len(batch))
+        for (_, _, future), msg_status in zip(batch, statuses):
+            if not future.done():
+                future.set_result((msg_status, elapsed_ms))
+
+    async def close(self):
+        self._flush()
+        await asyncio.gather(*self._tasks)
+
+
+def create_senders(sessions, transport, batch_size=G_DEFAULT_BATCH_SIZE,
+                   batch_linger_ms=G_DEFAULT_BATCH_LINGER_MS):
+    """ Create a sender per node address, on top of its session """
+    if batch_size > 1 and not transport.supports_batching:
+        wls_logger.G_LOGGER.warning(f"{type(transport).__name__} does not support batching. "
+                                    f"Sending one message per request")
+        batch_size = 1
+
+    if batch_size > 1:
+        return {node_address: BatchSender(session, transport, node_address, batch_size, batch_linger_ms)
+                for node_address, session in sessions.items()}
+
+    return {node_address: Sender(session, transport, node_address) for node_address, session in sessions.items()}
+
+
+async def close_senders(senders):
+    await asyncio.gather(*[sender.close() for sender in senders.values()])
 
-            return response.status, elapsed_ms
 
-   
 def send_msg_to_node(node_address, topic, payload, nonce=1):
     my_payload = _get_waku_payload(nonce, payload)
     waku_msg = _create_waku_msg(my_payload)
@@ -88,14 +371,13 @@ def send_msg_to_node(node_address, topic, payload, nonce=1):
 
     return response_obj, elapsed_ms, json.dumps(waku_msg), my_payload['ts']
 
-async def send_msg_to_node_async(node_address, topic, payload, nonce=1):
-    my_payload = _get_waku_payload(nonce, payload)
-    waku_msg = _create_waku_msg(my_payload)
-    data = _create_waku_rpc_data(topic, waku_msg, node_address)
+async def send_msg_to_node_async(sender, topic, payload, nonce=1):
+    """ Returns the HTTP status, the elapsed time in ms, the message hash and its timestamp """
+    waku_msg, msg_hash, ts = build_waku_message(payload, nonce)
 
-    response_obj, elapsed_ms = await _send_waku_rpc_async(data, node_address)
+    response_obj, elapsed_ms = await sender.send(topic, waku_msg)
 
-    return response_obj, elapsed_ms, json.dumps(waku_msg), my_payload['ts']
+    return response_obj, elapsed_ms, msg_hash, ts
 
 def get_next_time_to_msg(inter_msg_type, msg_rate, simulation_time):
     if inter_msg_type == 'poisson':
@@ -1,6 +1,9 @@
 # Python Imports
 import sys
+import queue
+import atexit
 import logging
+import logging.handlers
 
 G_APP_NAME = 'WLS'
 
@@ -10,29 +13,40 @@ class CustomFormatter(logging.Formatter):
     # Set different formats for every logging level
     time_name_stamp = "[%(asctime)s.%(msecs)03d] [" + G_APP_NAME + "]"
     FORMATS = {
-        logging.ERROR: time_name_stamp + " ERROR in %(module)s.py %(funcName)s() %(lineno)d - %(msg)s",
-        logging.WARNING: time_name_stamp + " WARNING - %(msg)s",
-        logging.CRITICAL: time_name_stamp + " CRITICAL in %(module)s.py %(funcName)s() %(lineno)d - %(msg)s",
-        logging.INFO:  time_name_stamp + " %(msg)s",
-        logging.DEBUG: time_name_stamp + " %(funcName)s() %(msg)s",
-        'DEFAULT': time_name_stamp + " %(msg)s",
+        logging.ERROR: time_name_stamp + " ERROR in %(module)s.py %(funcName)s() %(lineno)d - %(message)s",
+        logging.WARNING: time_name_stamp + " WARNING - %(message)s",
+        logging.CRITICAL: time_name_stamp + " CRITICAL in %(module)s.py %(funcName)s() %(lineno)d - %(message)s",
+        logging.INFO:  time_name_stamp + " %(message)s",
+        logging.DEBUG: time_name_stamp + " %(funcName)s() %(message)s",
+        'DEFAULT': time_name_stamp + " %(message)s",
     }
 
+    def __init__(self):
+        super().__init__()
+        # One formatter per level, built once instead of on every record
+        self._formatters = {level: logging.Formatter(log_fmt, '%d-%m-%Y %H:%M:%S')
+                            for level, log_fmt in self.FORMATS.items()}
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno, self.FORMATS['DEFAULT'])
-        formatter = logging.Formatter(log_fmt, '%d-%m-%Y %H:%M:%S')
+        formatter = self._formatters.get(record.levelno, self._formatters['DEFAULT'])
         return formatter.format(record)
 
 
 def innit_logging():
-    """ Init Logging """
+    """ Init Logging. Records are put in a queue and written to stdout by a background thread, so
+    logging never blocks the caller on the stream """
     handler = logging.StreamHandler(sys.stdout)
     G_LOGGER = logging.getLogger(G_APP_NAME)
     handler.setFormatter(CustomFormatter())
-    G_LOGGER.addHandler(handler)
+    log_queue = queue.SimpleQueue()
+    G_LOGGER.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    # Write whatever is still queued before exiting
+    atexit.register(listener.stop)
     G_LOGGER.info('Started')
 
-    return G_LOGGER, handler
+    return G_LOGGER, handler, listener
 
 
 def configure_logging(G_LOGGER, handler, wls_config, config_file):
@@ -42,4 +56,11 @@ def configure_logging(G_LOGGER, handler, wls_config, config_file):
     G_LOGGER.info('Configuration loaded from %s' % config_file)
 
 
-G_LOGGER, handler = innit_logging()
+def flush_logging():
+    """ Wait until every queued record is written. Needed by processes that exit without running
+    the atexit handlers, like the injector processes """
+    G_LISTENER.stop()
+    G_LISTENER.start()
+
+
+G_LOGGER, handler, G_LISTENER = innit_logging()
@@ -1,12 +1,16 @@
 # Python Imports
 import argparse
 import hashlib
+import math
 import random
 import sys
 import time
 import tomllib
 import asyncio
 import os
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 
 # Project Imports
@@ -15,10 +19,26 @@ from src.utils import waku_messaging
 from src.utils import payloads
 from src.utils import files
 from src.utils import prometheus
+from src.utils import scheduler
+from src.utils import backpressure
+from src.utils import saturation
+from src.utils import traffic
+from src.utils import emitters
+from src.utils import start_signal
+from src.utils import control
+from src.utils import metrics
+from src.utils import replay
+from src.utils import probe
 
 """ Globals """
 G_DEFAULT_CONFIG_FILE = 'config.json'
 G_DEFAULT_TOPOLOGY_FILE = 'topology_generated/network_data.json'
+G_TOMLS_FOLDER = 'tomls/'
+# Written by gennet next to the node tomls
+G_TOPICS_INDEX_FILE = 'topics.json'
+G_TOPICS_LOADER_THREADS = 16
+# Messages are logged one by one at DEBUG only, at INFO they are summed up every this many seconds
+G_DEFAULT_PROGRESS_LOG_S = 10
 
 
 def parse_cli(args):
@@ -32,35 +52,55 @@ def parse_cli(args):
                         default=None)
     parser.add_argument("-pp", "--prometheus-port", type=str, help="Prometheus Port",
                         default=None)
+    parser.add_argument("-mp", "--metrics-port", type=int, help="Port to serve WLS metrics on, 0 to disable",
+                        default=metrics.G_DEFAULT_METRICS_PORT)
 
     parsed_args = parser.parse_args(args)
 
     return parsed_args
 
 
-def _load_topics(node_info, nodes, node):
-    topics = None
-    with open("tomls/" + node_info["node_config"], mode='rb') as read_file:
+def _parse_topics(node_info, tomls_folder=G_TOMLS_FOLDER):
+    with open(tomls_folder + node_info["node_config"], mode='rb') as read_file:
         toml_config = tomllib.load(read_file)
         if node_info["image"] == "nim-waku":
-            topics = list(toml_config["topics"].split(" "))
+            return list(toml_config["topics"].split(" "))
         elif node_info["image"] == "go-waku":
-            topics = toml_config["topics"]
+            return toml_config["topics"]
         else:
             raise ValueError("Unknown image type")
-    # Load topics into topology for easier access
-    nodes[node]["topics"] = topics
 
 
-def load_topics_into_topology(topology):
-    """ Load Topics """
+def _load_topics_index(tomls_folder):
+    index_file = tomls_folder + G_TOPICS_INDEX_FILE
+    if not os.path.exists(index_file):
+        return None
+
+    with open(index_file, 'r') as read_file:
+        return json.load(read_file)
+
+
+def load_topics_into_topology(topology, tomls_folder=G_TOMLS_FOLDER):
+    """ Load Topics. From the gennet topics index if there is one, otherwise parse the node tomls
+    in a thread pool """
     nodes = topology["nodes"]
-    for node, node_info in nodes.items():
-        try:
-            _load_topics(node_info, nodes, node)
-        except ValueError as e:
-            wls_logger.G_LOGGER.error('%s: %s' % (e.__doc__, e))
-            sys.exit()
+
+    topics_index = _load_topics_index(tomls_folder)
+    if topics_index is not None and all(node in topics_index for node in nodes):
+        for node, node_info in nodes.items():
+            node_info["topics"] = topics_index[node]
+        wls_logger.G_LOGGER.info('Loaded nodes topics from the topics index')
+        return
+
+    try:
+        with ThreadPoolExecutor(max_workers=G_TOPICS_LOADER_THREADS) as executor:
+            results = executor.map(lambda node_info: _parse_topics(node_info, tomls_folder), nodes.values())
+            # Load topics into topology for easier access
+            for node_info, topics in zip(nodes.values(), results):
+                node_info["topics"] = topics
+    except ValueError as e:
+        wls_logger.G_LOGGER.error('%s: %s' % (e.__doc__, e))
+        sys.exit()
 
     wls_logger.G_LOGGER.info('Loaded nodes topics from toml files')
 
@@ -92,32 +132,55 @@ def _is_simulation_finished(start_time, wls_config, msgs_dict):
     return False
 
 
-def _select_emitter_with_topic(random_emitters):
-    # Pick an emitter at random from the emitters list
-    random_emitter, random_emitter_info = random.choice(list(random_emitters.items()))
-    emitter_address = f"http://{random_emitter_info['ip_address']}:" \
-                      f"{random_emitter_info['ports']['rpc-' + random_emitter][0]}/"
-    emitter_topics = random_emitter_info["topics"]
-    # Pick a topic at random from the topics supported by the emitter
-    emitter_topic = random.choice(emitter_topics)
+def _select_emitter_with_topic(emitter_index):
+    # Pick an emitter and one of its topics from the precomputed index
+    emitter_address, emitter_topic = emitter_index.select()
 
-    wls_logger.G_LOGGER.info(f"Injecting message of topic {emitter_topic} to network "
-                  f"through Waku node {emitter_address} ...")
+    wls_logger.G_LOGGER.debug("Injecting message of topic %s to network through Waku node %s ...",
+                              emitter_topic, emitter_address)
 
     return emitter_address, emitter_topic
 
 
-async def _inject_message_async(emitter_address, emitter_topic, msgs_dict, msgs_dict_lock, wls_config):
-    payload, size = payloads.make_payload_dist(dist_type=wls_config['dist_type'].lower(),
-                                               min_size=wls_config['min_packet_size'],
-                                               max_size=wls_config['max_packet_size'])
-
-    response, elapsed, waku_msg, ts = await waku_messaging.send_msg_to_node_async(emitter_address,
-                                                                      topic=emitter_topic,
-                                                                      payload=payload,
-                                                                      nonce=len(msgs_dict))
+async def _inject_message_async(sender, emitter_address, emitter_topic, msgs_dict, msgs_dict_lock,
+                                wls_config, nonce, lateness, emitter=None, payload_size=None,
+                                delivery_probe=None):
+    if payload_size is None:
+        payload, size = payloads.make_payload_dist(dist_type=wls_config['dist_type'].lower(),
+                                                   min_size=wls_config['min_packet_size'],
+                                                   max_size=wls_config['max_packet_size'])
+    else:
+        payload, size = payloads.make_payload(payload_size), payload_size
+
+    # Recorded before sending, as a probe node may receive the message before the response arrives
+    if delivery_probe is not None:
+        delivery_probe.record_sent(nonce, emitter_topic)
+
+    try:
+        response, elapsed, msg_hash, ts = await waku_messaging.send_msg_to_node_async(sender,
+                                                                                      topic=emitter_topic,
+                                                                                      payload=payload,
+                                                                                      nonce=nonce)
+    except Exception:
+        if delivery_probe is not None:
+            delivery_probe.discard(nonce)
+        raise
+
+    if delivery_probe is not None and response != 200:
+        delivery_probe.discard(nonce)
+
+    metrics.G_MESSAGES.labels(status=response).inc()
+    metrics.G_INJECTION_LATENCY.observe(elapsed / 1000)
+    metrics.G_PAYLOAD_BYTES.inc(size)
+
+    msg = {'ts': ts, 'emitter': emitter, 'injection_point': emitter_address, 'status' : response,
+           'nonce': nonce, 'topic': emitter_topic, 'payload_size': size, 'injection_time': elapsed,
+           'lateness': lateness}
+    if wls_config.get('store_payloads', True):
+        msg['payload'] = payload
+    else:
+        msg['payload_hash'] = hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
-    msg_hash = hashlib.sha256(waku_msg.encode('utf-8')).hexdigest()
     async with msgs_dict_lock:
         
         if msg_hash in msgs_dict:
@@ -125,45 +188,481 @@ async def _inject_message_async(emitter_address, emitter_topic, msgs_dict, msgs_
             return
         
         # Update the messages dictionary
-        msgs_dict[msg_hash] = {'ts': ts, 'injection_point': emitter_address, 'status' : response,
-                               'nonce': len(msgs_dict), 'topic': emitter_topic,
-                               'payload': payload, 'payload_size': size, 'injection_time': elapsed}
+        msgs_dict[msg_hash] = msg
+
+
+async def _limited_inject_message_async(limiter, admission, sender, emitter_address, emitter_topic,
+                                        msgs_dict, msgs_dict_lock, wls_config, nonce, lateness,
+                                        emitter=None, payload_size=None, delivery_probe=None):
+    # Queued messages wait here, in their own task, until the limiter frees a slot
+    if admission == backpressure.G_QUEUED:
+        await limiter.wait_for_slot(emitter_address)
+
+    metrics.G_IN_FLIGHT.inc()
+    try:
+        await _inject_message_async(sender, emitter_address, emitter_topic, msgs_dict, msgs_dict_lock,
+                                    wls_config, nonce, lateness, emitter, payload_size, delivery_probe)
+    except Exception:
+        metrics.G_MESSAGES.labels(status='error').inc()
+        raise
+    finally:
+        metrics.G_IN_FLIGHT.dec()
+        await limiter.release(emitter_address)
+
+
+def _log_progress(num_msgs, interval_msgs, interval_s, num_in_flight):
+    wls_logger.G_LOGGER.info(f"Injected {num_msgs} messages. Last {interval_s:.1f} s: {interval_msgs} messages "
+                             f"({interval_msgs / interval_s:.2f} msg/s), {num_in_flight} in flight")
+
+
+def _reap_task(tasks, task):
+    # Done tasks are dropped right away so they do not pile up until the end of the simulation
+    tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        wls_logger.G_LOGGER.error(f"Message injection failed: {task.exception()}")
+
+
+def _create_sessions(wls_config, node_addresses):
+    # One pooled keep-alive session per node, reused for every request to it
+    return waku_messaging.create_sessions(
+        node_addresses,
+        limit_per_host=wls_config.get('connections_per_host',
+                                      waku_messaging.G_DEFAULT_CONNECTIONS_PER_HOST),
+        keepalive_timeout=wls_config.get('keepalive_timeout',
+                                         waku_messaging.G_DEFAULT_KEEPALIVE_TIMEOUT_S))
+
+
+def _get_send_deadlines(wls_config, start_time=0):
+    return scheduler.get_send_deadlines(wls_config['inter_msg_type'], wls_config['message_rate'],
+                                        wls_config['simulation_time'],
+                                        traffic.get_rate_schedule(wls_config), start_time)
+
+
+async def _start_delivery_probe(wls_config, transport, probe_nodes):
+    """ Returns the running delivery probe of probe_nodes and its sessions, None and no sessions if
+    there are no probe nodes """
+    delivery_probe = probe.create_probe(wls_config, probe_nodes, transport)
+    if delivery_probe is None:
+        return None, {}
+
+    probe_sessions = _create_sessions(wls_config, list(delivery_probe.node_topics))
+    await delivery_probe.start(probe_sessions)
+
+    return delivery_probe, probe_sessions
+
+
+async def _stop_delivery_probe(delivery_probe, probe_sessions):
+    if delivery_probe is not None:
+        await delivery_probe.close()
+    await waku_messaging.close_sessions(probe_sessions)
+
+
+async def start_traffic_injection_async(wls_config, random_emitters, msgs_dict=None, nonce_start=0,
+                                        nonce_step=1, signal_time=None, control_socket=None,
+                                        probe_nodes=None, popularity_weights=None):
+    """ Start simulation. signal_time is when the start signal arrived, to log how long it took to
+    inject the first message. With a control_socket, the injection can be changed while it runs.
+    With probe_nodes, the delivery of the messages to them is measured while it runs.
+    popularity_weights override the ones computed over random_emitters """
+    # Control commands change the settings of this run only
+    wls_config = dict(wls_config)
+    if msgs_dict is None:
+        msgs_dict = {}
+    msgs_dict_lock = asyncio.Lock()
+    tasks = set()
+    num_msgs = 0
+    total_lateness_ms = max_lateness_ms = 0.0
+    progress_log_s = wls_config.get('progress_log_s', G_DEFAULT_PROGRESS_LOG_S)
+
+    transport = waku_messaging.create_transport(wls_config)
+    emitter_index = emitters.create_emitter_index(random_emitters, wls_config, transport, popularity_weights)
+    sessions = _create_sessions(wls_config, emitter_index.addresses)
+    senders = waku_messaging.create_senders(
+        sessions, transport,
+        batch_size=wls_config.get('batch_size', waku_messaging.G_DEFAULT_BATCH_SIZE),
+        batch_linger_ms=wls_config.get('batch_linger_ms', waku_messaging.G_DEFAULT_BATCH_LINGER_MS))
+    limiter = backpressure.create_limiter(wls_config)
+    injection_control = control.InjectionControl(wls_config['message_rate'], wls_config['dist_type'],
+                                                 wls_config['inter_msg_type'])
+    control_server = None
+    if control_socket is not None:
+        control_server = await control.start_control_server(injection_control, control_socket)
+    control_version = injection_control.version
+    delivery_probe, probe_sessions = await _start_delivery_probe(wls_config, transport, probe_nodes)
+    probe_stats = {}
+
+    # Open-loop schedule: send times are fixed up front and not shifted by how long sending takes
+    deadlines = _get_send_deadlines(wls_config)
 
+    wls_logger.G_LOGGER.info(f"Starting a simulation of {wls_config['simulation_time']} seconds...")
 
-async def start_traffic_injection_async(wls_config, random_emitters):
-    """ Start simulation """
+    metrics.G_TARGET_RATE.set(wls_config['message_rate'])
+    # Measured from here like the deadlines, so the setup above does not cut the schedule short
     start_time = time.time()
-    next_time_to_msg = 0
-    msgs_dict = {}
+    loop_start = progress_time = time.monotonic()
+    progress_msgs = 0
+    try:
+        while (deadline := next(deadlines, None)) is not None:
+            if _is_simulation_finished(start_time, wls_config, msgs_dict):
+                break
+
+            # Sleep until the deadline; always yield so in-flight tasks progress when running late
+            await injection_control.sleep(max(loop_start + deadline - time.monotonic(), 0))
+
+            if injection_control.version != control_version:
+                # Simulation time keeps running while paused
+                await injection_control.wait_resumed(max(wls_config['simulation_time'] -
+                                                         (time.time() - start_time), 0))
+                if _is_simulation_finished(start_time, wls_config, msgs_dict):
+                    break
+                if injection_control.stopped:
+                    wls_logger.G_LOGGER.info("Injection stopped through the control socket")
+                    break
+                # Apply the new settings and reschedule from now on, dropping the pending deadline
+                control_version = injection_control.version
+                wls_config['message_rate'] = injection_control.rate
+                wls_config['dist_type'] = injection_control.dist_type
+                wls_config['inter_msg_type'] = injection_control.inter_msg_type
+                metrics.G_TARGET_RATE.set(injection_control.rate)
+                deadlines = _get_send_deadlines(wls_config, time.monotonic() - loop_start)
+                continue
+
+            now = time.monotonic()
+            lateness_ms = (now - loop_start - deadline) * 1000
+            total_lateness_ms += lateness_ms
+            max_lateness_ms = max(max_lateness_ms, lateness_ms)
+            metrics.G_SCHEDULER_LATENESS.observe(lateness_ms / 1000)
+
+            emitter_address, emitter_topic = _select_emitter_with_topic(emitter_index)
+
+            admission = await limiter.admit(emitter_address)
+            if admission == backpressure.G_DROPPED:
+                metrics.G_DROPPED.inc()
+                continue
+
+            task = asyncio.create_task(_limited_inject_message_async(limiter, admission,
+                                                                     senders[emitter_address],
+                                                                     emitter_address, emitter_topic,
+                                                                     msgs_dict, msgs_dict_lock,
+                                                                     wls_config,
+                                                                     nonce_start + num_msgs * nonce_step,
+                                                                     lateness_ms,
+                                                                     emitter_index.names[emitter_address],
+                                                                     delivery_probe=delivery_probe))
+            tasks.add(task)
+            task.add_done_callback(lambda done_task: _reap_task(tasks, done_task))
+
+            if num_msgs == 0 and signal_time is not None:
+                wls_logger.G_LOGGER.info(f"First message injected {(time.time() - signal_time) * 1000:.3f} ms "
+                                         f"after the start signal")
+            num_msgs += 1
+            injection_control.num_msgs = num_msgs
+
+            if progress_log_s and now - progress_time >= progress_log_s:
+                _log_progress(num_msgs, num_msgs - progress_msgs, now - progress_time, len(tasks))
+                progress_time, progress_msgs = now, num_msgs
+
+        elapsed_s = time.monotonic() - loop_start
+
+        # Wait for all the tasks to complete
+        await asyncio.gather(*tasks)
+        if delivery_probe is not None:
+            probe_stats = await delivery_probe.stop()
+    finally:
+        metrics.G_TARGET_RATE.set(0)
+        await control.close_control_server(control_server, control_socket)
+        await _stop_delivery_probe(delivery_probe, probe_sessions)
+        await waku_messaging.close_senders(senders)
+        await waku_messaging.close_sessions(sessions)
+
+    achieved_rate = num_msgs / elapsed_s if elapsed_s > 0 else 0
+    mean_lateness_ms = total_lateness_ms / num_msgs if num_msgs > 0 else 0
+    wls_logger.G_LOGGER.info(f"Injected {num_msgs} messages in {elapsed_s:.3f} s. Achieved rate "
+                             f"{achieved_rate:.2f} msg/s (target {wls_config['message_rate']} msg/s). "
+                             f"Scheduler lateness: mean {mean_lateness_ms:.3f} ms, "
+                             f"max {max_lateness_ms:.3f} ms.")
+    wls_logger.G_LOGGER.info(f"Backpressure: {limiter.counters}")
+
+    stats = {'num_msgs': num_msgs, 'elapsed_s': elapsed_s, 'achieved_rate': achieved_rate,
+             'mean_lateness_ms': mean_lateness_ms, 'max_lateness_ms': max_lateness_ms,
+             **limiter.counters, **probe_stats}
+
+    return msgs_dict, stats
+
+
+async def start_replay_injection_async(wls_config, topology, msgs_dict, signal_time=None, probe_nodes=None):
+    """ Re-inject the messages of a trace with the same emitters, topics, payload sizes and
+    relative timings. The trace is streamed, and sessions are opened as its emitters show up """
     msgs_dict_lock = asyncio.Lock()
-    tasks = []
-    nonce = 0
+    tasks = set()
+    num_msgs = 0
+    total_lateness_ms = max_lateness_ms = 0.0
+    progress_log_s = wls_config.get('progress_log_s', G_DEFAULT_PROGRESS_LOG_S)
+
+    transport = waku_messaging.create_transport(wls_config)
+    sessions = {}
+    senders = {}
+    limiter = backpressure.create_limiter(wls_config)
+    # Messages logs record the JSON-RPC address of the emitters
+    messages = replay.iter_replay_messages(wls_config['replay_file'], topology['nodes'],
+                                           waku_messaging.JsonRpcTransport.get_node_address,
+                                           wls_config.get('replay_reorder_window_s',
+                                                          replay.G_DEFAULT_REORDER_WINDOW_S))
+    delivery_probe, probe_sessions = await _start_delivery_probe(wls_config, transport, probe_nodes)
+
+    wls_logger.G_LOGGER.info(f"Replaying {wls_config['replay_file']} ...")
+
+    loop_start = progress_time = time.monotonic()
+    progress_msgs = 0
+    try:
+        for deadline, emitter, emitter_topic, payload_size in messages:
+            emitter_address = transport.get_node_address(emitter, topology['nodes'][emitter])
+            if emitter_address not in senders:
+                new_sessions = _create_sessions(wls_config, [emitter_address])
+                sessions.update(new_sessions)
+                senders.update(waku_messaging.create_senders(
+                    new_sessions, transport,
+                    batch_size=wls_config.get('batch_size', waku_messaging.G_DEFAULT_BATCH_SIZE),
+                    batch_linger_ms=wls_config.get('batch_linger_ms',
+                                                   waku_messaging.G_DEFAULT_BATCH_LINGER_MS)))
+
+            await asyncio.sleep(max(loop_start + deadline - time.monotonic(), 0))
+
+            now = time.monotonic()
+            lateness_ms = (now - loop_start - deadline) * 1000
+            total_lateness_ms += lateness_ms
+            max_lateness_ms = max(max_lateness_ms, lateness_ms)
+            metrics.G_SCHEDULER_LATENESS.observe(lateness_ms / 1000)
+
+            admission = await limiter.admit(emitter_address)
+            if admission == backpressure.G_DROPPED:
+                metrics.G_DROPPED.inc()
+                continue
+
+            task = asyncio.create_task(_limited_inject_message_async(limiter, admission,
+                                                                     senders[emitter_address],
+                                                                     emitter_address, emitter_topic,
+                                                                     msgs_dict, msgs_dict_lock,
+                                                                     wls_config, num_msgs, lateness_ms,
+                                                                     emitter, payload_size, delivery_probe))
+            tasks.add(task)
+            task.add_done_callback(lambda done_task: _reap_task(tasks, done_task))
+
+            if num_msgs == 0 and signal_time is not None:
+                wls_logger.G_LOGGER.info(f"First message injected {(time.time() - signal_time) * 1000:.3f} ms "
+                                         f"after the start signal")
+            num_msgs += 1
+
+            if progress_log_s and now - progress_time >= progress_log_s:
+                _log_progress(num_msgs, num_msgs - progress_msgs, now - progress_time, len(tasks))
+                progress_time, progress_msgs = now, num_msgs
+
+        elapsed_s = time.monotonic() - loop_start
+
+        # Wait for all the tasks to complete
+        await asyncio.gather(*tasks)
+        if delivery_probe is not None:
+            await delivery_probe.stop()
+    finally:
+        await _stop_delivery_probe(delivery_probe, probe_sessions)
+        await waku_messaging.close_senders(senders)
+        await waku_messaging.close_sessions(sessions)
+
+    mean_lateness_ms = total_lateness_ms / num_msgs if num_msgs > 0 else 0
+    wls_logger.G_LOGGER.info(f"Replayed {num_msgs} messages in {elapsed_s:.3f} s through {len(senders)} "
+                             f"emitters. Scheduler lateness: mean {mean_lateness_ms:.3f} ms, "
+                             f"max {max_lateness_ms:.3f} ms.")
+    wls_logger.G_LOGGER.info(f"Backpressure: {limiter.counters}")
 
-    wls_logger.G_LOGGER.info(f"Starting a simulation of {wls_config['simulation_time']} seconds...")
+    return msgs_dict
+
+
+def _init_payload_pool(wls_config):
+    payloads.init_payload_pool(wls_config['max_packet_size'],
+                               wls_config.get('payload_pool_size', payloads.G_DEFAULT_PAYLOAD_POOL_SIZE))
+
+
+def _uses_injector_processes(wls_config):
+    # Only the fixed mode shards its injection, and only if it injects anything
+    return (wls_config.get('mode', 'fixed') == 'fixed' and wls_config['message_rate'] != 0 and
+            wls_config.get('injector_processes', 1) > 1)
+
+
+def _shard_emitters(random_emitters, num_shards):
+    # Round-robin the emitters so every shard gets a similar share of them
+    shards = [{} for _ in range(num_shards)]
+    for i, (emitter, emitter_info) in enumerate(random_emitters.items()):
+        shards[i % num_shards][emitter] = emitter_info
+
+    return [shard for shard in shards if shard]
+
+
+def _scale_cap(cap, share):
+    # 0 stays unbounded, any other cap keeps at least one slot
+    return math.ceil(cap * share) if cap else cap
+
+
+def _get_shards_popularity_weights(random_emitters, shards, wls_config):
+    """ Popularity weights computed once over all the emitters and sliced for every shard, so the
+    emitters keep the same popularity as with a single process. None when the traffic is not skewed """
+    popularity_weights = traffic.get_popularity_weights(random_emitters, wls_config)
+    if popularity_weights is None:
+        return None
 
-    while True:
-        if _is_simulation_finished(start_time, wls_config, msgs_dict):
-            break
+    emitters_weights, topics_weights = popularity_weights
+    positions = {emitter: i for i, emitter in enumerate(random_emitters)}
 
-        emitter_address, emitter_topic = _select_emitter_with_topic(random_emitters)
+    return [([emitters_weights[positions[emitter]] for emitter in shard],
+             [topics_weights[positions[emitter]] for emitter in shard]) for shard in shards]
 
-        task = asyncio.create_task(_inject_message_async(emitter_address, emitter_topic, msgs_dict, msgs_dict_lock, wls_config))
-        tasks.append(task)
 
-        nonce += 1
+def _get_shares(random_emitters, shards, shards_weights):
+    """ Share of the traffic of every shard: its share of the popularity of the emitters, or of
+    the emitters themselves when the traffic is not skewed """
+    if shards_weights is None:
+        return [len(shard) / len(random_emitters) for shard in shards]
 
-        # Compute the time to next message
-        next_time_to_msg = waku_messaging.get_next_time_to_msg(wls_config['inter_msg_type'],
-                                                            wls_config['message_rate'],
-                                                            wls_config['simulation_time'])
+    total = sum(sum(emitters_weights) for emitters_weights, _ in shards_weights)
+    return [sum(emitters_weights) / total for emitters_weights, _ in shards_weights]
 
-        # Wait for the specified time before sending the next message
-        wls_logger.G_LOGGER.info('Next message will be injected in %d ms.' % (next_time_to_msg * 1000.0))
-        await asyncio.sleep(next_time_to_msg)
 
-    # Wait for all the tasks to complete
-    await asyncio.gather(*tasks)
-    
+def _get_worker_config(wls_config, share):
+    """ Each shard injects its share of the total rate, so per-emitter rates are unchanged, and
+    gets the same share of the global in-flight caps, so all the processes together respect them """
+    worker_config = dict(wls_config)
+    worker_config['message_rate'] = wls_config['message_rate'] * share
+    worker_config['max_in_flight'] = _scale_cap(wls_config.get('max_in_flight',
+                                                               backpressure.G_DEFAULT_MAX_IN_FLIGHT), share)
+    if wls_config.get('max_queued') is not None:
+        worker_config['max_queued'] = _scale_cap(wls_config['max_queued'], share)
+
+    return worker_config
+
+
+def _get_worker_messages_log_path(worker_id):
+    return f"./messages.{worker_id}.ndjson"
+
+
+def _run_injection_worker(wls_config, emitters, prng_seed, worker_id, num_workers, signal_time=None,
+                          popularity_weights=None):
+    """ Entry point of an injector process. Runs its own event loop over its shard of emitters,
+    with their slice of the popularity weights if the traffic is skewed.
+    Returns the messages dictionary, or None when the messages are streamed to the worker log. """
+    wls_logger.G_LOGGER.setLevel(wls_config['debug_level'])
+    wls_logger.handler.setLevel(wls_config['debug_level'])
+
+    # Derive the worker seed from the global one so the whole run stays deterministic
+    random.seed(f"{prng_seed}-{worker_id}")
+    _init_payload_pool(wls_config)
+
+    wls_logger.G_LOGGER.info(f"Injector {worker_id} starting with {len(emitters)} emitters "
+                             f"at {wls_config['message_rate']} msg/s")
+
+    msgs_dict = files.create_messages_log(wls_config.get('messages_format', 'json'),
+                                          _get_worker_messages_log_path(worker_id))
+    try:
+        asyncio.run(start_traffic_injection_async(wls_config, emitters, msgs_dict,
+                                                  nonce_start=worker_id, nonce_step=num_workers,
+                                                  signal_time=signal_time,
+                                                  control_socket=control.get_control_socket_path(wls_config,
+                                                                                                 worker_id),
+                                                  popularity_weights=popularity_weights))
+    finally:
+        # Worker processes exit without running the atexit handlers that write the queued logs
+        wls_logger.flush_logging()
+
+    if isinstance(msgs_dict, files.MessagesWriter):
+        msgs_dict.close()
+        return None
+
+    return msgs_dict
+
+
+async def start_sharded_traffic_injection_async(wls_config, random_emitters, msgs_dict, prng_seed,
+                                                num_processes, signal_time=None):
+    """ Split the emitters across several injector processes and merge their messages """
+    shards = _shard_emitters(random_emitters, num_processes)
+    shards_weights = _get_shards_popularity_weights(random_emitters, shards, wls_config)
+    shares = _get_shares(random_emitters, shards, shards_weights)
+    if shards_weights is None:
+        shards_weights = [None] * len(shards)
+
+    # Shards of emitters that are never picked would not inject anything
+    shards = [(shard, weights, share) for shard, weights, share in zip(shards, shards_weights, shares) if share > 0]
+
+    wls_logger.G_LOGGER.info(f"Sharding {len(random_emitters)} emitters across {len(shards)} "
+                             f"injector processes")
+
+    loop = asyncio.get_running_loop()
+    # Spawn rather than fork, as we are inside a running event loop
+    with ProcessPoolExecutor(max_workers=len(shards),
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = []
+        for worker_id, (shard, weights, share) in enumerate(shards):
+            worker_config = _get_worker_config(wls_config, share)
+            futures.append(loop.run_in_executor(executor, _run_injection_worker, worker_config, shard,
+                                                prng_seed, worker_id, len(shards), signal_time, weights))
+
+        workers_msgs = await asyncio.gather(*futures)
+
+    for worker_id, worker_msgs in enumerate(workers_msgs):
+        if worker_msgs is None:
+            msgs_dict.append_log(_get_worker_messages_log_path(worker_id))
+            os.remove(_get_worker_messages_log_path(worker_id))
+            continue
+        for msg_hash, msg in worker_msgs.items():
+            if msg_hash in msgs_dict:
+                wls_logger.G_LOGGER.error(f"Hash collision. {msg_hash} already exists in dictionary")
+                continue
+            msgs_dict[msg_hash] = msg
+
+    wls_logger.G_LOGGER.info(f"Merged {len(msgs_dict)} messages from {len(shards)} injector processes")
+
+    return msgs_dict
+
+
+async def start_saturation_injection_async(wls_config, random_emitters, msgs_dict, topology,
+                                           signal_time=None, probe_nodes=None):
+    """ Step the injection rate up within a single run until the network cannot sustain it """
+    saturation_config = saturation.get_saturation_config(wls_config)
+    search = saturation.SaturationSearch(saturation_config)
+    steps = []
+    nonce_start = 0
+
+    rate = search.next_rate()
+    while rate is not None:
+        wls_logger.G_LOGGER.info(f"Saturation step {len(steps)}: injecting at {rate} msg/s")
+
+        step_config = dict(wls_config)
+        step_config['message_rate'] = rate
+        step_config['simulation_time'] = saturation_config['step_time']
+        step_msgs_dict, stats = await start_traffic_injection_async(step_config, random_emitters,
+                                                                    nonce_start=nonce_start,
+                                                                    signal_time=signal_time,
+                                                                    probe_nodes=probe_nodes)
+        signal_time = None
+        nonce_start += stats['num_msgs']
+
+        step = saturation.evaluate_step(rate, step_msgs_dict, stats, saturation_config)
+        steps.append(step)
+        wls_logger.G_LOGGER.info(f"Saturation step {len(steps) - 1}: {step}")
+
+        # Keep every step's messages in the run output
+        for msg_hash, msg in step_msgs_dict.items():
+            msgs_dict[msg_hash] = msg
+
+        search.record(rate, step['sustainable'])
+        rate = search.next_rate()
+
+    report = {'num_nodes': len(topology['nodes']), 'num_emitters': len(random_emitters),
+              'max_sustainable_rate': search.max_sustainable_rate,
+              'first_unsustainable_rate': search.first_unsustainable_rate,
+              'config': saturation_config, 'steps': steps}
+    saturation.save_saturation_report(report)
+
+    wls_logger.G_LOGGER.info(f"Max sustainable rate: {search.max_sustainable_rate} msg/s "
+                             f"({len(random_emitters)} emitters, {len(topology['nodes'])} nodes)")
+
     return msgs_dict
 
 
@@ -174,6 +673,7 @@ async def main():
     topology_file = args.topology_file
     prometheus_ip = args.prometheus_ip
     prometheus_port = args.prometheus_port
+    metrics_port = args.metrics_port
         
     config = files.load_config_file(config_file)
 
@@ -182,35 +682,73 @@ async def main():
 
     wls_logger.configure_logging(wls_logger.G_LOGGER, wls_logger.handler, wls_config, config_file)
 
+    mode = wls_config.get('mode', 'fixed')
+    num_processes = wls_config.get('injector_processes', 1)
+    if mode != 'fixed' and num_processes > 1:
+        wls_logger.G_LOGGER.warning(f"The {mode} mode injects from a single process. Ignoring injector_processes")
+    sharded = _uses_injector_processes(wls_config)
+    if metrics_port:
+        metrics.start_metrics_server(metrics_port, multiprocess_workers=sharded)
+
     # Set RPNG seed from config
     random.seed(config['general']['prng_seed'])
 
     topology = files.load_topology(topology_file)
 
+    # Create the start FIFO early, so the signal can be sent while we are still loading
+    start_fifo = start_signal.create_start_fifo()
+
     load_topics_into_topology(topology)
 
     random_emitters = get_random_emitters(topology, wls_config)
 
-    signal_file, t0 = '/wls/start.signal', time.time()
+    probe_nodes = probe.select_probe_nodes(topology, wls_config, config['general']['prng_seed'])
+    if probe_nodes and sharded:
+        # Polling drains the nodes message caches, so several injectors cannot probe the same nodes
+        wls_logger.G_LOGGER.warning("The delivery probe does not support several injector processes. "
+                                    "Disabling it")
+        probe_nodes = {}
+
+    if not sharded and (mode != 'fixed' or wls_config["message_rate"] != 0):
+        # Get it out of the way before the signal. Sharded injectors build their own
+        _init_payload_pool(wls_config)
+
+    t0 = time.time()
     wls_logger.G_LOGGER.info('Waiting for the signal to start ...')
-    while not os.path.exists(signal_file):
-        time.sleep(5)
-    t1 = time.time()
-    wls_logger.G_LOGGER.info(f'Got the signal to start: took {t1-t0} secs')
+    signal_time, sent_time = start_signal.wait_for_start_signal(start_fifo)
+    wls_logger.G_LOGGER.info(f'Got the signal to start: took {signal_time-t0} secs')
+    if sent_time is not None:
+        wls_logger.G_LOGGER.info(f'The start signal arrived {(signal_time - sent_time) * 1000:.3f} ms '
+                                 f'after it was sent')
 
     injection_start_time = datetime.now()
 
-    if wls_config["message_rate"] == 0:
+    # Only the fixed mode injects at message_rate
+    if wls_config["message_rate"] == 0 and mode == 'fixed':
         time.sleep(wls_config["simulation_time"])
         injection_finish_time = datetime.now()
     else:
-        msgs_dict = await start_traffic_injection_async(wls_config, random_emitters)
+        msgs_dict = files.create_messages_log(wls_config.get('messages_format', 'json'))
+        if mode == 'replay':
+            await start_replay_injection_async(wls_config, topology, msgs_dict, signal_time=signal_time,
+                                               probe_nodes=probe_nodes)
+        elif mode == 'saturation':
+            await start_saturation_injection_async(wls_config, random_emitters, msgs_dict, topology,
+                                                   signal_time=signal_time, probe_nodes=probe_nodes)
+        elif sharded:
+            await start_sharded_traffic_injection_async(wls_config, random_emitters, msgs_dict,
+                                                        config['general']['prng_seed'], num_processes,
+                                                        signal_time=signal_time)
+        else:
+            await start_traffic_injection_async(wls_config, random_emitters, msgs_dict,
+                                                signal_time=signal_time,
+                                                control_socket=control.get_control_socket_path(wls_config),
+                                                probe_nodes=probe_nodes)
         injection_finish_time = datetime.now()
-        files.save_messages_to_json(msgs_dict)
+        files.save_messages(msgs_dict)
 
-    # Delete de signal file just in case
-    if os.path.exists('/wls/start.signal'):
-        os.remove('/wls/start.signal')
+    # Delete de signal FIFO and file just in case
+    start_signal.remove_start_signal(start_fifo)
 
     if prometheus_port is not None:
         prometheus.dump_prometheus(config, prometheus_ip, prometheus_port, injection_start_time,